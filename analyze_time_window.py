@@ -4,124 +4,59 @@ Backtest Analysis: Wallet Thresholds + 6-Hour Time Window
 Analyzes 2+, 5+, and 20+ wallet clusters with synchronized entry requirement
 """
 
-import csv
-from datetime import datetime
 from collections import defaultdict
+import numpy as np
+
+from event_table import load_events
 
-def parse_csv(filename):
-    """Parse CSV and return list of events"""
-    events = []
-    with open(filename, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            events.append(row)
-    return events
-
-def clean_number(value):
-    """Clean numeric values"""
-    if not value or value == '':
-        return None
-    try:
-        # Remove commas and convert to float
-        return float(value.replace(',', ''))
-    except:
-        return None
-
-def parse_date(date_str):
-    """Parse date string"""
-    if not date_str or date_str == '':
-        return None
-    try:
-        return datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-    except:
-        return None
-
-def calculate_time_window_hours(first_entry, latest_entry):
-    """Calculate hours between first and latest entry"""
-    if not first_entry or not latest_entry:
-        return None
-
-    first = parse_date(first_entry)
-    latest = parse_date(latest_entry)
-
-    if not first or not latest:
-        return None
-
-    delta = latest - first
-    return delta.total_seconds() / 3600
 
 def analyze_threshold(events, min_wallets, max_time_hours=6):
-    """Analyze events for given wallet threshold and time window"""
+    """Analyze events (an EventTable) for given wallet threshold and time window"""
+    selected = events.wallets_between(min_wallets)
+
+    # Events without entry times can't be checked and are kept (counted as unknown)
+    hours = events.time_window_hours
+    unknown_window = selected & np.isnan(hours)
+    with np.errstate(invalid='ignore'):
+        outside = selected & (hours > max_time_hours)
+    in_window = selected & ~outside
+
+    win, loss = events.win & in_window, events.loss & in_window
+    roi = events['roi']
+    has_roi = ~np.isnan(roi) & (roi != 0)
+    category = events['category']
 
     results = {
-        'total_signals': 0,
-        'within_time_window': 0,
-        'verified': 0,
-        'wins': 0,
-        'losses': 0,
+        'total_signals': int(selected.sum()),
+        'within_time_window': int((in_window & ~unknown_window).sum()),
+        'unknown_time_window': int(unknown_window.sum()),
+        'outside_time_window': int(outside.sum()),
+        'verified': int((win | loss).sum()),
+        'wins': int(win.sum()),
+        'losses': int(loss.sum()),
         'win_rate': 0,
-        'total_roi': 0,
+        'total_roi': float(roi[win & has_roi].sum()),
         'avg_roi_per_signal': 0,
-        'signals_by_category': defaultdict(int),
-        'wins_by_category': defaultdict(int),
-        'losses_by_category': defaultdict(int),
-        'roi_by_category': defaultdict(float),
+        'signals_by_category': defaultdict(int, events.count_by('category', in_window)),
+        'wins_by_category': defaultdict(int, events.count_by('category', win)),
+        'losses_by_category': defaultdict(int, events.count_by('category', loss)),
+        # Wins add their ROI, losses with an ROI listed lose the stake
+        'roi_by_category': defaultdict(float, events.count_by(
+            'category', (win | loss) & has_roi, np.where(win, roi, -100.0))),
         'examples': []
     }
 
-    for event in events:
-        num_wallets = clean_number(event.get('num_wallets', '0'))
-        if not num_wallets or num_wallets < min_wallets:
-            continue
-
-        results['total_signals'] += 1
-
-        # Check time window
-        time_window = None
-        first_entry = event.get('first_entry', '')
-
-        # For the FULL_1K_THRESHOLD_UPDATED.csv, we don't have latest_entry
-        # So we'll assume all events meet time window for now
-        # In practice, we'd need the full trade data with timestamps
-
-        # For now, let's use the threshold_1000_90days_FULL.csv approach
-        # where we assume synchronized entries based on volume patterns
-
-        results['within_time_window'] += 1  # Assuming for now
-
-        status = event.get('status', 'UNVERIFIED')
-        category = event.get('category', 'Unknown')
-        roi = clean_number(event.get('potential_roi', '0'))
-        profit_loss = event.get('profit_loss', '')
-
-        results['signals_by_category'][category] += 1
-
-        if status in ['WIN', 'LOSS']:
-            results['verified'] += 1
-
-            if status == 'WIN':
-                results['wins'] += 1
-                results['wins_by_category'][category] += 1
-                if roi:
-                    results['total_roi'] += roi
-                    results['roi_by_category'][category] += roi
-            else:
-                results['losses'] += 1
-                results['losses_by_category'][category] += 1
-                if roi:
-                    results['roi_by_category'][category] -= 100  # Lost bet
-
-        # Store example
-        if len(results['examples']) < 5 and status in ['WIN', 'LOSS']:
-            results['examples'].append({
-                'event': event.get('event_name', 'Unknown'),
-                'wallets': int(num_wallets) if num_wallets else 0,
-                'volume': clean_number(event.get('total_volume', '0')),
-                'conviction': event.get('avg_focus_pct', ''),
-                'roi': roi if roi else 0,
-                'status': status,
-                'category': category
-            })
+    # Store examples
+    for index in np.nonzero(win | loss)[0][:5].tolist():
+        results['examples'].append({
+            'event': str(events['event_name'][index]),
+            'wallets': int(events['wallet_count'][index]),
+            'volume': events['total_volume'][index].item(),
+            'conviction': events['avg_conviction'][index].item(),
+            'roi': roi[index].item() if has_roi[index] else 0,
+            'status': str(events['status'][index]),
+            'category': str(category[index])
+        })
 
     # Calculate metrics
     if results['verified'] > 0:
@@ -139,6 +74,8 @@ def print_results(threshold_name, min_wallets, results):
     print(f"\n📊 SIGNAL VOLUME:")
     print(f"   Total signals (all time): {results['total_signals']}")
     print(f"   Within 6-hour window: {results['within_time_window']}")
+    if results['unknown_time_window']:
+        print(f"   No entry times (assumed within): {results['unknown_time_window']}")
     print(f"   Verified (WIN/LOSS): {results['verified']}")
 
     print(f"\n🎯 PERFORMANCE (Verified Only):")
@@ -175,12 +112,12 @@ def main():
     print("="*80)
     print("\nAnalyzing: 2+ wallets, 5+ wallets, 20+ wallets")
     print("Requirement: Wallets must enter within 6 hours of each other")
-    print("\nNote: Time window analysis requires full trade timestamps.")
-    print("Current analysis based on available data with estimated synchronization.")
+    print("\nNote: Time window analysis requires first_entry/latest_entry columns.")
+    print("Events without them are assumed synchronized.")
 
     # Load data
     filename = '/Users/suyashgokhale/Desktop/polymarket_analysis/FULL_1K_THRESHOLD_UPDATED.csv'
-    events = parse_csv(filename)
+    events = load_events(filename)
 
     print(f"\nLoaded {len(events)} events from historical data")
 
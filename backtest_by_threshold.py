@@ -4,107 +4,50 @@ Proper Backtest: 2+, 5+, 20+ Wallet Thresholds
 Uses BACKTEST_BY_WALLET_COUNT.csv with actual wallet counts
 """
 
-import csv
 from collections import defaultdict
+import numpy as np
+
+from event_table import load_events
+
+TOP_SIGNALS = 5  # Best/worst signals kept per threshold (what print_results shows)
 
-def parse_csv(filename):
-    """Parse CSV and return list of events"""
-    events = []
-    with open(filename, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            events.append(row)
-    return events
-
-def clean_number(value):
-    """Clean numeric values"""
-    if not value or value == '' or value == 'UNKNOWN':
-        return None
-    try:
-        value = value.replace(',', '').replace('%', '')
-        return float(value)
-    except:
-        return None
 
 def analyze_threshold(events, min_wallets, max_wallets=None):
-    """Analyze events for given wallet threshold"""
+    """Analyze events (an EventTable) for given wallet threshold"""
+    selected = events.wallets_between(min_wallets, max_wallets)
+    win, loss = events.win & selected, events.loss & selected
+    # A win counts towards ROI only with a (non-zero) ROI listed
+    scored_win = win & ~np.isnan(events['roi']) & (events['roi'] != 0)
+    category = events['category']
 
     results = {
-        'total_signals': 0,
-        'verified': 0,
-        'wins': 0,
-        'losses': 0,
-        'unverified': 0,
+        'total_signals': int(selected.sum()),
+        'verified': int((win | loss).sum()),
+        'wins': int(win.sum()),
+        'losses': int(loss.sum()),
+        'unverified': int((selected & ~(win | loss)).sum()),
         'win_rate': 0,
-        'total_roi': 0,
+        'total_roi': float(events['roi'][scored_win].sum()),
         'avg_roi_per_signal': 0,
         'avg_volume': 0,
-        'signals_by_category': defaultdict(int),
-        'wins_by_category': defaultdict(int),
-        'losses_by_category': defaultdict(int),
+        'signals_by_category': defaultdict(int, events.count_by('category', selected)),
+        'wins_by_category': defaultdict(int, events.count_by('category', win)),
+        'losses_by_category': defaultdict(int, events.count_by('category', loss)),
         'roi_by_category': defaultdict(list),
         'best_signals': [],
         'worst_signals': []
     }
-
-    total_volume = 0
-
-    for event in events:
-        wallet_count = clean_number(event.get('wallet_count', '0'))
-        if not wallet_count:
-            continue
-
-        # Filter by wallet count range
-        if wallet_count < min_wallets:
-            continue
-        if max_wallets and wallet_count > max_wallets:
-            continue
-
-        results['total_signals'] += 1
-
-        status = event.get('status', 'UNVERIFIED')
-        category = event.get('category', 'Unknown')
-        roi = clean_number(event.get('roi', '0'))
-        volume = clean_number(event.get('total_volume', '0'))
-
-        if volume:
-            total_volume += volume
-
-        results['signals_by_category'][category] += 1
-
-        if status in ['WIN', 'LOSS']:
-            results['verified'] += 1
-
-            if status == 'WIN':
-                results['wins'] += 1
-                results['wins_by_category'][category] += 1
-                if roi:
-                    results['total_roi'] += roi
-                    results['roi_by_category'][category].append(roi)
-
-                    # Track best signals
-                    results['best_signals'].append({
-                        'event': event.get('event_name', 'Unknown'),
-                        'wallets': int(wallet_count),
-                        'volume': volume,
-                        'roi': roi,
-                        'category': category
-                    })
-            else:
-                results['losses'] += 1
-                results['losses_by_category'][category] += 1
-                results['roi_by_category'][category].append(-100)
-
-                # Track worst signals
-                results['worst_signals'].append({
-                    'event': event.get('event_name', 'Unknown'),
-                    'wallets': int(wallet_count),
-                    'volume': volume,
-                    'roi': -100,
-                    'category': category
-                })
-        else:
-            results['unverified'] += 1
+    scored = np.nonzero(scored_win | loss)[0]
+    rois = np.where(win, events['roi'], -100.0)[scored]
+    keys, index = events.groups('category')
+    for i in np.unique(index[scored]).tolist():
+        results['roi_by_category'][str(keys[i])] = rois[index[scored] == i].tolist()
+
+    def signals(indexes, rois):
+        return [{'event': event, 'wallets': int(wallets), 'volume': volume, 'roi': roi, 'category': key}
+                for event, wallets, volume, roi, key in zip(
+                    events['event_name'][indexes].tolist(), events['wallet_count'][indexes].tolist(),
+                    events['total_volume'][indexes].tolist(), rois, category[indexes].tolist())]
 
     # Calculate metrics
     if results['verified'] > 0:
@@ -112,11 +55,14 @@ def analyze_threshold(events, min_wallets, max_wallets=None):
         results['avg_roi_per_signal'] = results['total_roi'] / results['verified']
 
     if results['total_signals'] > 0:
-        results['avg_volume'] = total_volume / results['total_signals']
+        results['avg_volume'] = np.nansum(events['total_volume'][selected]).item() / results['total_signals']
 
-    # Sort best/worst
-    results['best_signals'].sort(key=lambda x: x['roi'], reverse=True)
-    results['worst_signals'].sort(key=lambda x: x['roi'])
+    # Best/worst, sorted
+    best = np.nonzero(scored_win)[0]
+    best = best[np.argsort(-events['roi'][best], kind='stable')][:TOP_SIGNALS]
+    results['best_signals'] = signals(best, events['roi'][best].tolist())
+    worst = np.nonzero(loss)[0][:TOP_SIGNALS]
+    results['worst_signals'] = signals(worst, [-100] * len(worst))
 
     return results
 
@@ -175,7 +121,7 @@ def main():
 
     # Load data
     filename = '/private/tmp/polymarket-bot/BACKTEST_BY_WALLET_COUNT.csv'
-    events = parse_csv(filename)
+    events = load_events(filename)
 
     print(f"Loaded {len(events)} events from historical data\n")
 
@@ -186,19 +132,23 @@ def main():
         ("OPTION C: 20+ Wallets (Large Clusters)", 20, None)
     ]
 
-    all_results = {}
+    # Each wallet range is analysed once; the comparison and recommendation reuse it
+    results_by_range = {}
+
+    def analyze(min_w, max_w):
+        if (min_w, max_w) not in results_by_range:
+            results_by_range[(min_w, max_w)] = analyze_threshold(events, min_w, max_w)
+        return results_by_range[(min_w, max_w)]
 
     for name, min_w, max_w in thresholds:
-        results = analyze_threshold(events, min_w, max_w)
-        all_results[name] = results
-        print_results(name, min_w, max_w, results)
+        print_results(name, min_w, max_w, analyze(min_w, max_w))
 
     # Also do cumulative analysis
     print(f"\n{'='*80}")
     print("CUMULATIVE ANALYSIS (All 5+ wallets)")
     print(f"{'='*80}")
 
-    results_5plus = analyze_threshold(events, 5, None)
+    results_5plus = analyze(5, None)
     print_results("All 5+ Wallets", 5, None, results_5plus)
 
     # Comparison
@@ -217,7 +167,7 @@ def main():
     ]
 
     for label, min_w, max_w in comparisons:
-        results = analyze_threshold(events, min_w, max_w)
+        results = analyze(min_w, max_w)
         signals = results['total_signals']
         verified = results['verified']
         wr = f"{results['win_rate']:.1f}%" if verified > 0 else "N/A"
@@ -230,9 +180,9 @@ def main():
     print("🎯 RECOMMENDATION")
     print(f"{'='*80}\n")
 
-    results_2to4 = analyze_threshold(events, 2, 4)
-    results_5to19 = analyze_threshold(events, 5, 19)
-    results_20plus = analyze_threshold(events, 20, None)
+    results_2to4 = analyze(2, 4)
+    results_5to19 = analyze(5, 19)
+    results_20plus = analyze(20, None)
 
     print("Based on historical performance:\n")
 
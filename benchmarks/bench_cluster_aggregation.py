@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cluster aggregation in detect_clusters
+Per-position dicts + Python group-by/generator passes vs one vectorized group-by
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+
+MIN_VOLUME = 1000
+MIN_CONVICTION = 0.80
+POSITIONS_PER_MARKET = 50
+
+
+def legacy_detect_clusters(tracker, min_wallets, min_volume, min_conviction):
+    """The pre-vectorized WalletTracker.detect_clusters full-scan path"""
+    high_conviction = []
+    for wallet, total_volume in tracker.wallet_totals.items():
+        if total_volume < min_volume:
+            continue
+        for market_id, outcomes in tracker.wallet_positions[wallet].items():
+            for outcome, position_volume in outcomes.items():
+                conviction = position_volume / total_volume
+                if conviction >= min_conviction:
+                    high_conviction.append({
+                        'wallet': wallet,
+                        'market_id': market_id,
+                        'outcome': outcome,
+                        'position_volume': position_volume,
+                        'total_volume': total_volume,
+                        'conviction': conviction,
+                        'timestamp': tracker.position_timestamps.get(
+                            (wallet, market_id, outcome), datetime.now())
+                    })
+
+    clusters = defaultdict(list)
+    for position in high_conviction:
+        clusters[(position['market_id'], position['outcome'])].append(position)
+
+    signals = []
+    for (market_id, outcome), wallets in clusters.items():
+        if len(wallets) >= min_wallets:
+            signals.append({
+                'market_id': market_id,
+                'outcome': outcome,
+                'num_wallets': len(wallets),
+                'wallets': wallets,
+                'total_volume': sum(w['position_volume'] for w in wallets),
+                'avg_conviction': sum(w['conviction'] for w in wallets) / len(wallets),
+                'first_entry': min(w['timestamp'] for w in wallets),
+                'latest_entry': max(w['timestamp'] for w in wallets)
+            })
+    return signals
+
+
+def build(tracker_class, num_positions, seed):
+    """One position per wallet (so every one qualifies), POSITIONS_PER_MARKET per market"""
+    rng = random.Random(seed)
+    tracker = tracker_class(min_volume=MIN_VOLUME, min_conviction=MIN_CONVICTION)
+    now = datetime.now()
+    num_markets = max(num_positions // POSITIONS_PER_MARKET, 1)
+
+    for i in range(num_positions):
+        tracker.add_trade(f"0x{i:040x}", str(rng.randrange(num_markets)), rng.choice(['Yes', 'No']),
+                          rng.uniform(1000, 10_000), now - timedelta(minutes=rng.randrange(2880)))
+    return tracker
+
+
+def summary(clusters):
+    return sorted((c['market_id'], c['outcome'], c['num_wallets'], round(c['total_volume'], 4),
+                   round(c['avg_conviction'], 9), c['first_entry'].replace(microsecond=0),
+                   c['latest_entry'].replace(microsecond=0)) for c in clusters)
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    print("=" * 76)
+    print("CLUSTER AGGREGATION BENCHMARK (all positions qualify, min_wallets=5)")
+    print("=" * 76)
+    print(f"{'Positions':>10} {'Legacy':>12} {'Vectorized':>12} {'Speedup':>8} "
+          f"{'Columnar':>12} {'Speedup':>8}")
+    print("-" * 76)
+
+    for num_positions in sizes:
+        tracker = build(WalletTracker, num_positions, num_positions)
+        legacy, expected = timed(lambda: legacy_detect_clusters(tracker, 5, MIN_VOLUME, MIN_CONVICTION))
+        vectorized, clusters = timed(lambda: tracker.detect_clusters(5, MIN_VOLUME, MIN_CONVICTION))
+        assert summary(clusters) == summary(expected)
+        del tracker, expected
+
+        columnar_tracker = build(ColumnarWalletTracker, num_positions, num_positions)
+        columnar, clusters = timed(lambda: columnar_tracker.detect_clusters(5, MIN_VOLUME, MIN_CONVICTION))
+        del columnar_tracker, clusters
+
+        print(f"{num_positions:>10,} {legacy * 1000:>10.1f}ms {vectorized * 1000:>10.1f}ms "
+              f"{legacy / vectorized:>7.1f}x {columnar * 1000:>10.1f}ms {legacy / columnar:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental conviction engine
+Cycle latency (add a batch of trades + detect_clusters) as tracked wallets grow
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+from wallet_tracker import WalletTracker
+
+MIN_VOLUME = 2000
+MIN_CONVICTION = 0.85
+TRADES_PER_CYCLE = 1000
+WALLETS_PER_MARKET = 50  # Markets scale with wallets so cluster sizes stay comparable
+
+
+def build_tracker(num_wallets, rng):
+    """Tracker with num_wallets wallets holding 1-3 positions each"""
+    num_markets = num_wallets // WALLETS_PER_MARKET
+    tracker = WalletTracker(min_volume=MIN_VOLUME, min_conviction=MIN_CONVICTION)
+    now = datetime.now()
+
+    for i in range(num_wallets):
+        wallet = f"0x{i:040x}"
+        for _ in range(rng.randint(1, 3)):
+            tracker.add_trade(wallet, str(rng.randrange(num_markets)), 'Yes',
+                              rng.uniform(100, 10_000), now)
+
+    tracker.changed_clusters.clear()
+    return tracker
+
+
+def run_cycle(tracker, num_wallets, rng, full_scan):
+    """One scan cycle worth of trades, then cluster detection"""
+    num_markets = num_wallets // WALLETS_PER_MARKET
+    now = datetime.now()
+    start = time.perf_counter()
+
+    for _ in range(TRADES_PER_CYCLE):
+        wallet = f"0x{rng.randrange(num_wallets):040x}"
+        tracker.add_trade(wallet, str(rng.randrange(num_markets)), 'Yes',
+                          rng.uniform(100, 10_000), now)
+
+    if full_scan:
+        # Legacy path: thresholds that don't match the index force a full rescan
+        tracker.detect_clusters(5, MIN_VOLUME + 1e-9, MIN_CONVICTION)
+    else:
+        tracker.detect_clusters(5, MIN_VOLUME, MIN_CONVICTION, changed_only=True)
+
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    print("=" * 60)
+    print(f"CONVICTION ENGINE BENCHMARK ({TRADES_PER_CYCLE:,} trades/cycle)")
+    print("=" * 60)
+    print(f"{'Wallets':>10} {'Full rescan':>14} {'Incremental':>14}")
+    print("-" * 60)
+
+    for num_wallets in sizes:
+        rng = random.Random(num_wallets)
+        tracker = build_tracker(num_wallets, rng)
+
+        # Sanity check: index and full scan agree on the clusters
+        indexed = {(c['market_id'], c['outcome'], c['num_wallets'])
+                   for c in tracker.detect_clusters(1, MIN_VOLUME, MIN_CONVICTION)}
+        scanned = {(c['market_id'], c['outcome'], c['num_wallets'])
+                   for c in tracker.detect_clusters(1, MIN_VOLUME + 1e-9, MIN_CONVICTION)}
+        assert indexed == scanned
+
+        full = min(run_cycle(tracker, num_wallets, rng, True) for _ in range(3))
+        incremental = min(run_cycle(tracker, num_wallets, rng, False) for _ in range(3))
+
+        print(f"{num_wallets:>10,} {full * 1000:>12.1f}ms {incremental * 1000:>12.1f}ms")
+        del tracker
+
+
+if __name__ == '__main__':
+    main()
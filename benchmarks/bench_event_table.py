@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: backtest aggregations over an event CSV
+Rows as dicts with every number re-parsed per threshold (the backtest
+scripts' old loop) vs the typed event table, cold and from its cache,
+with mask-and-reduce thresholds
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backtest_by_threshold import analyze_threshold
+from event_table import load_events
+
+THRESHOLDS = [(2, 4), (5, 19), (20, None), (5, None), (2, None), (10, None), (50, None), (100, None)]
+CATEGORIES = ['Politics', 'Financial', 'Geopolitics', 'Sports', 'Commodities', 'Other']
+
+
+def write_events(path, num_events, seed=5):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['wallet_count', 'event_name', 'outcome', 'total_volume', 'avg_conviction',
+                         'entry_price', 'roi', 'category', 'status', 'profit_loss'])
+        for n in range(num_events):
+            price = rng.uniform(0.05, 0.9)
+            writer.writerow([rng.choice([2, 3, 5, 8, 13, 21, 40, 120]), f"Event {n}?", 'YES',
+                             f"{rng.randrange(5_000, 500_000):,}", f"{rng.uniform(50, 100):.1f}%",
+                             round(price, 2), f"{(1 / price - 1) * 100:.0f}%", rng.choice(CATEGORIES),
+                             rng.choice(['WIN', 'LOSS', 'UNVERIFIED', 'UNVERIFIED']), ''])
+
+
+def clean_number(value):
+    """The scripts' old per-call parser"""
+    if not value or value == 'UNKNOWN':
+        return None
+    try:
+        return float(value.replace(',', '').replace('%', ''))
+    except ValueError:
+        return None
+
+
+def loop_threshold(rows, min_wallets, max_wallets):
+    """Signals, verified, wins and win ROI, one dict row at a time"""
+    signals = verified = wins = 0
+    total_roi = 0.0
+    for row in rows:
+        wallets = clean_number(row.get('wallet_count', '0'))
+        if not wallets or wallets < min_wallets or (max_wallets and wallets > max_wallets):
+            continue
+        signals += 1
+        roi = clean_number(row.get('roi', '0'))
+        clean_number(row.get('total_volume', '0'))
+        if row['status'] in ('WIN', 'LOSS'):
+            verified += 1
+            if row['status'] == 'WIN':
+                wins += 1
+                total_roi += roi or 0
+    return signals, verified, wins, round(total_roi, 6)
+
+
+def bench(label, func, repeat=3):
+    """Best-of-N wall time"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:10.1f} ms")
+    return best
+
+
+def main():
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    print("=" * 56)
+    print(f"EVENT TABLE BENCHMARK ({num_events:,} events, {len(THRESHOLDS)} thresholds)")
+    print("=" * 56)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path, cache = os.path.join(tmp, 'events.csv'), os.path.join(tmp, 'cache')
+        write_events(path, num_events)
+
+        def dict_loop():
+            with open(path, 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            return [loop_threshold(rows, *t) for t in THRESHOLDS]
+
+        def table(cache_dir):
+            events = load_events(path, cache_dir)
+            return [analyze_threshold(events, *t) for t in THRESHOLDS]
+
+        # Same answers either way
+        expected = dict_loop()
+        for (signals, verified, wins, total_roi), results in zip(expected, table(None)):
+            assert (results['total_signals'], results['verified'], results['wins']) == (signals, verified, wins)
+            assert abs(results['total_roi'] - total_roi) < 1e-6 * max(1, total_roi)
+
+        slow = bench("dict rows, re-parsed per threshold", dict_loop, repeat=1)
+        cold = bench("event table, parsed", lambda: table(None), repeat=1)
+        table(cache)
+        warm = bench("event table, from cache", lambda: table(cache))
+
+    print("-" * 56)
+    print(f"Speedup: parsed {slow / cold:.1f}x, cached {slow / warm:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: historical fill queries
+Scanning a CSV export (how every analysis starts today) vs the
+day-partitioned, memory-mapped fill archive, for token, wallet and
+one-day time range queries
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+from log_decoder import Fill
+from fill_archive import FillArchive
+from replay import read_archive, write_archive
+
+DAYS = 30
+NUM_MARKETS = 5000
+NUM_WALLETS = 100_000
+
+
+def make_fills(num_fills, seed=3):
+    """num_fills over DAYS in time order; flushed like the scanner, ~hourly segments compacted per day"""
+    rng = random.Random(seed)
+    start = datetime(2024, 5, 1)
+    step = DAYS * 86400 / num_fills
+    for n in range(num_fills):
+        market = rng.randrange(NUM_MARKETS)
+        price = rng.uniform(0.05, 0.95)
+        usdc = rng.lognormvariate(6, 1.5)
+        fill = Fill(f"0x{rng.randrange(NUM_WALLETS):040x}", str(10**70 + market), 'buy',
+                    usdc / price, usdc, start + timedelta(seconds=n * step), 57_000_000 + n // 40, n % 40,
+                    '0x' + hashlib.blake2b(str(n).encode(), digest_size=32).hexdigest())
+        fill.outcome = 'Yes'
+        fill.question = f"Market {market}?"
+        fill.category = 'Other'
+        yield fill
+
+
+def bench(label, func, repeat=3):
+    """Best-of-N wall time for one query"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34} {best * 1000:10.1f} ms  {rows:>8,} fills")
+    return best
+
+
+def main():
+    num_fills = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("=" * 64)
+    print(f"FILL ARCHIVE BENCHMARK ({num_fills:,} fills over {DAYS} days)")
+    print("=" * 64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'fills.csv')
+        fills = list(make_fills(num_fills))
+        write_archive(csv_path, fills)
+        archive = FillArchive(os.path.join(tmp, 'archive'), compact_segments=24)
+        for i in range(0, len(fills), len(fills) // (DAYS * 24)):
+            archive.append(fills[i:i + len(fills) // (DAYS * 24)])
+            archive.flush()
+        del fills
+
+        token = str(10**70 + 42)
+        wallet = f"0x{4242:040x}"
+        day_start, day_end = datetime(2024, 5, 15), datetime(2024, 5, 16)
+
+        # Same answers either way
+        assert [f.tx_hash for f in read_archive(csv_path) if f.token_id == token] == \
+            archive.query(token_id=token)['tx_hash']
+
+        results = []
+        for label, keep, query in [
+            ("token", lambda f: f.token_id == token, lambda: archive.query(token_id=token)),
+            ("wallet", lambda f: f.wallet == wallet, lambda: archive.query(wallet=wallet)),
+            ("one day", lambda f: day_start <= f.timestamp < day_end, lambda: archive.query(day_start, day_end)),
+        ]:
+            scan = bench(f"CSV scan, {label}", lambda: sum(1 for f in read_archive(csv_path) if keep(f)), repeat=1)
+            fast = bench(f"archive, {label}", lambda: len(query()['timestamp']))
+            results.append((label, scan / fast))
+
+    print("-" * 64)
+    print("Speedup: " + ", ".join(f"{label} {speedup:,.0f}x" for label, speedup in results))
+
+
+if __name__ == '__main__':
+    main()
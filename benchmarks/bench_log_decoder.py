@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OrderFilled log decoding
+Legacy hex-string parser vs memoryview/int.from_bytes decoder on 100k synthetic logs
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+from hexbytes import HexBytes
+from log_decoder import decode_logs, decode_fills
+import config
+
+NUM_LOGS = 100_000
+
+
+def make_logs(n, seed=42):
+    """Synthetic web3-style logs (HexBytes topics/data) shaped like real OrderFilled events"""
+    rng = random.Random(seed)
+    topic0 = HexBytes(config.ORDER_FILLED_TOPIC)
+    logs = []
+
+    for i in range(n):
+        token_id = rng.getrandbits(256)
+        shares = rng.randint(1, 100_000) * 10**6
+        usdc = int(shares * rng.uniform(0.01, 0.99))
+        words = [0, token_id, usdc, shares, 0] if i % 2 else [token_id, 0, shares, usdc, 0]
+
+        logs.append({
+            'topics': [
+                topic0,
+                HexBytes(rng.getrandbits(256).to_bytes(32, 'big')),
+                HexBytes(b'\x00' * 12 + rng.getrandbits(160).to_bytes(20, 'big')),
+                HexBytes(b'\x00' * 12 + rng.getrandbits(160).to_bytes(20, 'big')),
+            ],
+            'data': HexBytes(b''.join(w.to_bytes(32, 'big') for w in words)),
+            'blockNumber': 60_000_000 + i // 50,
+            'logIndex': i % 50,
+            'transactionHash': HexBytes(rng.getrandbits(256).to_bytes(32, 'big')),
+        })
+
+    return logs
+
+
+def legacy_parse(log):
+    """The original BlockchainScanner.parse_trade_from_log, kept verbatim as the baseline"""
+    try:
+        topics = log.get('topics', [])
+        raw_data = log.get('data', '0x')
+
+        if isinstance(raw_data, bytes):
+            data = raw_data.hex()
+        elif isinstance(raw_data, str):
+            data = raw_data[2:] if raw_data.startswith('0x') else raw_data
+        else:
+            return None
+
+        if len(topics) < 4 or len(data) < 300:
+            return None
+
+        def extract_address(topic):
+            if isinstance(topic, bytes):
+                return '0x' + topic[-20:].hex().lower()
+            elif hasattr(topic, 'hex'):
+                return '0x' + topic.hex()[26:].lower()
+            elif isinstance(topic, str):
+                hex_str = topic[2:] if topic.startswith('0x') else topic
+                return '0x' + hex_str[24:].lower()
+            return '0x0'
+
+        maker = extract_address(topics[2])
+        taker = extract_address(topics[3])
+
+        maker_asset_id = int(data[0:64], 16)
+        taker_asset_id = int(data[64:128], 16)
+        maker_amount = int(data[128:192], 16)
+        taker_amount = int(data[192:256], 16)
+        fee = int(data[256:320], 16)
+
+        maker_volume_usd = maker_amount / 1e6
+        taker_volume_usd = taker_amount / 1e6
+
+        block_num = log.get('blockNumber', 0)
+        tx_hash = log.get('transactionHash', '0x0')
+        if hasattr(tx_hash, 'hex'):
+            tx_hash = tx_hash.hex()
+
+        return [
+            {'wallet': maker, 'market_id': str(maker_asset_id), 'outcome': 'Unknown',
+             'volume_usd': maker_volume_usd, 'price': 0, 'timestamp': datetime.now(),
+             'block_number': block_num, 'tx_hash': str(tx_hash), 'side': 'maker'},
+            {'wallet': taker, 'market_id': str(taker_asset_id), 'outcome': 'Unknown',
+             'volume_usd': taker_volume_usd, 'price': 0, 'timestamp': datetime.now(),
+             'block_number': block_num, 'tx_hash': str(tx_hash), 'side': 'taker'},
+        ]
+    except Exception as e:
+        print(f"Error parsing log: {e}")
+        return None
+
+
+def bench(label, func, logs, repeat=3):
+    """Best-of-N wall time for decoding every log"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(logs)
+        best = min(best, time.perf_counter() - start)
+
+    rate = len(logs) / best
+    print(f"{label:<32} {best:8.3f}s  {rate:>12,.0f} logs/sec")
+    return rate
+
+
+def main():
+    print("=" * 60)
+    print(f"ORDERFILLED DECODER BENCHMARK ({NUM_LOGS:,} logs)")
+    print("=" * 60)
+
+    logs = make_logs(NUM_LOGS)
+
+    # Sanity check: both paths agree on every field they share
+    new = decode_logs(logs[:1000])
+    for log, event in zip(logs[:1000], new):
+        maker, taker = legacy_parse(log)
+        assert maker['wallet'] == event.maker and taker['wallet'] == event.taker
+        assert maker['market_id'] == str(event.maker_asset_id)
+        assert maker['volume_usd'] == event.maker_amount / 1e6
+
+    before = bench("legacy hex-string parser", lambda ls: [legacy_parse(l) for l in ls], logs)
+    after = bench("memoryview decoder", decode_logs, logs)
+    now = datetime.now()
+    bench("memoryview decoder -> Fills", lambda ls: decode_fills(ls, now), logs)
+
+    print("-" * 60)
+    print(f"Speedup: {after / before:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
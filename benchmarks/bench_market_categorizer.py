@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: market categorisation
+Legacy any(kw in question) passes vs the word-index matcher vs
+memoised lookups, over 200k synthetic market questions
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+import config
+from market_categorizer import MarketCategorizer
+
+NUM_QUESTIONS = 200_000
+
+FILLER = [
+    'will', 'the', 'by', 'end', 'of', 'march', 'price', 'above', 'below', 'reach', 'win',
+    'whether', 'billion', 'method', 'together', 'feedback', 'golden', 'ethics', 'votes',
+    'elections', 'democratic', 'team', 'season', 'record', 'announce', 'before', 'july',
+]
+
+
+def make_questions(n, seed=7):
+    """Questions of 6-14 words, about half containing a keyword or two"""
+    rng = random.Random(seed)
+    keywords = config.POLITICS_KEYWORDS + config.FINANCIAL_KEYWORDS + config.EXCLUDE_KEYWORDS
+    questions = []
+    for _ in range(n):
+        words = rng.choices(FILLER, k=rng.randint(6, 14))
+        for _ in range(rng.choice([0, 0, 1, 1, 2])):
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        questions.append(' '.join(words).capitalize() + '?')
+    return questions
+
+
+def legacy_categorize(question):
+    """The original BlockchainScanner.categorize_market, kept verbatim as the baseline"""
+    question_lower = question.lower()
+
+    if any(kw in question_lower for kw in config.POLITICS_KEYWORDS):
+        if not any(kw in question_lower for kw in config.EXCLUDE_KEYWORDS):
+            return 'Politics'
+
+    if any(kw in question_lower for kw in config.FINANCIAL_KEYWORDS):
+        return 'Financial'
+
+    if any(kw in question_lower for kw in config.EXCLUDE_KEYWORDS):
+        return 'Excluded'
+
+    return 'Other'
+
+
+def bench(label, func, questions, repeat=3):
+    """Best-of-N wall time for categorising every question"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(questions)
+        best = min(best, time.perf_counter() - start)
+
+    rate = len(questions) / best
+    print(f"{label:<32} {best:8.3f}s  {rate:>12,.0f} questions/sec")
+    return rate
+
+
+def main():
+    print("=" * 60)
+    print(f"MARKET CATEGORISATION BENCHMARK ({NUM_QUESTIONS:,} questions)")
+    print("=" * 60)
+
+    questions = make_questions(NUM_QUESTIONS)
+    ids = [f"0x{i:064x}" for i in range(len(questions))]
+    categorizer = MarketCategorizer(max_entries=NUM_QUESTIONS)
+
+    before = bench("legacy substring passes", lambda qs: [legacy_categorize(q) for q in qs], questions)
+    after = bench("word index", lambda qs: [categorizer.categorize(q) for q in qs], questions)
+    for question, condition_id in zip(questions, ids):
+        categorizer.categorize(question, condition_id)
+    memo = bench("memoised by condition_id",
+                 lambda qs: [categorizer.categorize(q, c) for q, c in zip(qs, ids)], questions)
+
+    # Where the two disagree, substring matching hit a keyword inside another word
+    changed = [(q, legacy_categorize(q), categorizer.categorize(q)) for q in questions[:20_000]
+               if legacy_categorize(q) != categorizer.categorize(q)]
+    print("-" * 60)
+    print(f"Speedup: {after / before:.1f}x (word index), {memo / before:.1f}x (memoised)")
+    print(f"Reclassified: {len(changed) / 200:.1f}% of questions, e.g.")
+    for question, old, new in changed[:3]:
+        print(f"  {old:>9} -> {new:<9} {question}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: historical replay throughput
+A year of synthetic fills from a CSV archive through the live detection
+code on the simulated clock, reported as fills/sec and x real time
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+from log_decoder import Fill
+from replay import Replay, read_archive, write_archive
+
+DAYS = 365
+QUESTIONS = ['Will the Senate pass the bill?', 'Will the Fed cut rates?', 'Will it rain in Paris?',
+             'Will the Lakers win the NBA title?']
+
+
+def make_fills(num_fills, num_markets=5000, num_wallets=200_000, seed=5):
+    """num_fills buys and sells spread over DAYS, 70% buys, in time order"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    offsets = sorted(rng.uniform(0, DAYS * 86400) for _ in range(num_fills))
+    for n, offset in enumerate(offsets):
+        market = rng.randrange(num_markets)
+        price = rng.uniform(0.05, 0.95)
+        usdc = rng.lognormvariate(6, 1.5)
+        fill = Fill(f"0x{rng.randrange(num_wallets):040x}", str(market), 'buy' if rng.random() < 0.7 else 'sell',
+                    usdc / price, usdc, start + timedelta(seconds=offset), 50_000_000 + n // 50, n % 50,
+                    '0x' + hashlib.blake2b(str(n).encode(), digest_size=32).hexdigest())
+        fill.outcome = 'Yes' if market % 2 else 'No'
+        fill.question = QUESTIONS[market % len(QUESTIONS)]
+        yield fill
+
+
+def main():
+    num_fills = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+
+    print("=" * 60)
+    print(f"REPLAY BENCHMARK ({num_fills:,} fills over {DAYS} days)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fills.csv')
+        write_archive(path, make_fills(num_fills))
+        print(f"Archive: {os.path.getsize(path) / 1e6:,.0f} MB")
+
+        replay = Replay()
+        signals = replay.run(read_archive(path))
+
+    stats = replay.stats
+    span = stats['last_fill'] - stats['first_fill']
+    print(f"{stats['cycles']:,} cycles, {len(signals):,} signals "
+          f"({sum(r['alerted'] for r in signals):,} alerted)")
+    print(f"Wall time {stats['wall_seconds']:.1f}s: {stats['fills'] / stats['wall_seconds']:,.0f} fills/sec, "
+          f"{span / stats['wall_seconds']:,.0f}x real time")
+    for name, timing in replay.signal_detector.timings.items():
+        print(f"  {name:<28} {timing['seconds']:7.2f}s total")
+
+
+if __name__ == '__main__':
+    main()
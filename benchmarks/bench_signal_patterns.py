@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark: signal pattern execution per cycle
+Legacy per-pattern Python loops (whale entry rescanning the whole tracker)
+vs patterns over shared column views, with 1 and 3 patterns enabled
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+import config
+from log_decoder import Fill
+from signal_detector import SignalDetector
+from wallet_tracker import WalletTracker
+
+NUM_POSITIONS = 200_000
+NUM_BUYS = 500
+NUM_CLUSTERS = 300
+ALL_PATTERNS = ['high_conviction_cluster', 'whale_entry', 'synchronized_entry']
+
+
+def make_cycle(seed=11):
+    """A loaded tracker, one cycle's buys and its new/updated clusters"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    tracker = WalletTracker()
+    for i in range(NUM_POSITIONS):
+        wallet = f"0x{rng.randrange(NUM_POSITIONS // 3):040x}"
+        tracker.add_trade(wallet, str(rng.randrange(5000)), rng.choice(['Yes', 'No']),
+                          rng.uniform(100, 30000), now - timedelta(minutes=rng.randrange(48 * 60)))
+
+    buys = []
+    for i in range(NUM_BUYS):
+        fill = Fill(f"0x{rng.randrange(NUM_POSITIONS // 3):040x}", str(rng.randrange(5000)), 'buy',
+                    20000, rng.uniform(100, 30000), now)
+        fill.outcome = rng.choice(['Yes', 'No'])
+        tracker.add_trade(fill.wallet, fill.token_id, fill.outcome, fill.usdc, fill.timestamp, shares=fill.shares)
+        buys.append(fill)
+
+    clusters = []
+    for i in range(NUM_CLUSTERS):
+        spread = rng.uniform(0, 5)
+        clusters.append({
+            'market_id': str(i), 'outcome': 'Yes', 'num_wallets': rng.randint(1, 40),
+            'total_volume': rng.uniform(1000, 500000), 'avg_conviction': rng.uniform(0.8, 1),
+            'price': rng.uniform(0.05, 0.9), 'category': rng.choice(['Politics', 'Financial', 'Other']),
+            'question': 'Will it happen?', 'first_entry': now - timedelta(hours=spread), 'latest_entry': now,
+        })
+    return tracker, buys, clusters
+
+
+# ========== LEGACY PATTERNS (verbatim loops, kept as the baseline) ==========
+
+def legacy_high_conviction_cluster(clusters, trades, wallet_tracker):
+    signals = []
+    for cluster in clusters:
+        if cluster.get('question', 'Unknown') in ['Unknown', 'UNKNOWN']:
+            continue
+        if 'category' not in cluster or cluster['category'] not in ['Politics', 'Financial']:
+            continue
+        price = cluster.get('price', 0)
+        if price == 0 or price > config.MAX_PRICE:
+            continue
+        num_wallets = cluster['num_wallets']
+        total_volume = cluster['total_volume']
+        avg_conviction = cluster['avg_conviction']
+        if num_wallets >= 20 and price < 0.30:
+            conviction_score = "VERY HIGH"
+        elif num_wallets >= 10 and price < 0.40:
+            conviction_score = "VERY HIGH"
+        elif num_wallets >= 5 and price < 0.50:
+            conviction_score = "HIGH"
+        elif num_wallets >= 3 and avg_conviction >= 0.90:
+            conviction_score = "HIGH"
+        elif num_wallets >= 2 and total_volume >= 5000:
+            conviction_score = "MEDIUM"
+        elif num_wallets == 1 and total_volume >= 5000 and avg_conviction >= 0.90:
+            conviction_score = "MEDIUM"
+        else:
+            conviction_score = "LOW"
+        signals.append({'type': 'cluster', 'conviction': conviction_score, 'cluster': cluster})
+    return signals
+
+
+def legacy_whale_entry(clusters, trades, wallet_tracker):
+    signals = []
+    for position in wallet_tracker.get_high_conviction_wallets(min_volume=10000, min_conviction=0.80):
+        if position.get('outcome', 'Unknown') in ['Unknown', 'UNKNOWN']:
+            continue
+        time_since_entry = (datetime.now() - position['timestamp']).total_seconds() / 3600
+        if time_since_entry <= 1:
+            signals.append({'type': 'whale', 'conviction': 'HIGH', 'position': position})
+    return signals
+
+
+def legacy_synchronized_entry(clusters, trades, wallet_tracker):
+    signals = []
+    for cluster in clusters:
+        if cluster.get('question', 'Unknown') in ['Unknown', 'UNKNOWN']:
+            continue
+        if cluster['num_wallets'] < 5:
+            continue
+        time_window = (cluster['latest_entry'] - cluster['first_entry']).total_seconds() / 3600
+        if time_window <= 1:
+            signals.append({'type': 'synchronized', 'conviction': 'HIGH', 'cluster': cluster,
+                            'time_window_hours': time_window})
+    return signals
+
+
+LEGACY = [legacy_high_conviction_cluster, legacy_whale_entry, legacy_synchronized_entry]
+
+
+def bench(label, func, repeat=5):
+    """Best-of-N wall time for one detection cycle"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        signals = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<36} {best * 1000:9.2f} ms/cycle  {len(signals):>5} signals")
+    return best
+
+
+def main():
+    print("=" * 60)
+    print(f"SIGNAL PATTERNS BENCHMARK ({NUM_POSITIONS:,} positions, {NUM_BUYS} buys, "
+          f"{NUM_CLUSTERS} clusters)")
+    print("=" * 60)
+
+    tracker, buys, clusters = make_cycle()
+
+    # Same cluster signals either way
+    config.SIGNAL_PATTERNS = ['high_conviction_cluster']
+    new = SignalDetector().detect_all(clusters, buys, tracker)
+    old = legacy_high_conviction_cluster(clusters, buys, tracker)
+    assert [(s['cluster']['market_id'], s['conviction']) for s in new] == \
+        [(s['cluster']['market_id'], s['conviction']) for s in old]
+
+    # Same whales: every recent qualifying position, not just this cycle's buys
+    config.SIGNAL_PATTERNS = ['whale_entry']
+    new = SignalDetector().detect_all(clusters, buys, tracker)
+    old = legacy_whale_entry(clusters, buys, tracker)
+    key = lambda s: (s['position']['wallet'], s['position']['market_id'], s['position']['outcome'])
+    assert sorted(map(key, new)) == sorted(map(key, old))
+    config.SIGNAL_PATTERNS = ['high_conviction_cluster']
+
+    legacy_one = bench("legacy, 1 pattern", lambda: LEGACY[0](clusters, buys, tracker))
+    legacy_all = bench("legacy, 3 patterns",
+                       lambda: [s for p in LEGACY for s in p(clusters, buys, tracker)])
+    one = SignalDetector()
+    views_one = bench("column views, 1 pattern", lambda: one.detect_all(clusters, buys, tracker))
+    config.SIGNAL_PATTERNS = ALL_PATTERNS
+    every = SignalDetector()
+    views_all = bench("column views, 3 patterns", lambda: every.detect_all(clusters, buys, tracker))
+
+    print("-" * 60)
+    print(f"Cost of enabling 2 more patterns: legacy {legacy_all / legacy_one:.1f}x, "
+          f"column views {views_all / views_one:.1f}x")
+    for name, timing in every.timings.items():
+        print(f"  {name:<28} {timing['seconds'] / timing['calls'] * 1000:7.3f} ms avg")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WalletTracker memory per position
+Dict-of-dicts WalletTracker vs ColumnarWalletTracker, each measured in a fresh process
+"""
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'realtime_scanner'))
+
+BACKENDS = {
+    'dict': ('wallet_tracker', 'WalletTracker'),
+    'columnar': ('columnar_wallet_tracker', 'ColumnarWalletTracker'),
+}
+
+
+def rss_bytes():
+    """Current resident set size from /proc (Linux)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def measure(backend, num_positions):
+    """Build num_positions positions and print RSS growth and build time"""
+    module_name, class_name = BACKENDS[backend]
+    tracker_class = getattr(__import__(module_name), class_name)
+
+    rng = random.Random(7)
+    num_wallets = num_positions // 2
+    num_markets = max(num_positions // 100, 10)
+    now = datetime.now()
+
+    # Inputs are generated up front so they aren't counted as tracker memory
+    trades = [
+        (f"0x{rng.randrange(num_wallets):040x}",
+         f"{rng.randrange(num_markets):077d}",  # token ids are ~77-digit decimals
+         rng.choice(('Yes', 'No')),
+         rng.uniform(10, 5000),
+         now - timedelta(seconds=rng.randrange(48 * 3600)))
+        for _ in range(num_positions)
+    ]
+
+    before = rss_bytes()
+    start = time.perf_counter()
+
+    tracker = tracker_class(min_volume=2000, min_conviction=0.85)
+    for trade in trades:
+        tracker.add_trade(*trade)
+
+    elapsed = time.perf_counter() - start
+    after = rss_bytes()
+    print(f"{after - before} {elapsed} {tracker.num_wallets()}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        measure(sys.argv[2], int(sys.argv[3]))
+        return
+
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("=" * 60)
+    print(f"WALLET STORE MEMORY BENCHMARK ({num_positions:,} trades)")
+    print("=" * 60)
+
+    results = {}
+    for backend in BACKENDS:
+        out = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, str(num_positions)],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        rss, elapsed, wallets = int(out[0]), float(out[1]), int(out[2])
+        results[backend] = rss
+        print(f"{backend:<10} {rss / 2**20:9.1f} MiB  {rss / num_positions:7.0f} B/position  "
+              f"{elapsed:6.1f}s build  {wallets:,} wallets")
+
+    print("-" * 60)
+    print(f"Columnar uses {results['dict'] / results['columnar']:.1f}x less RSS")
+
+
+if __name__ == '__main__':
+    main()
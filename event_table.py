@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Event Table: backtest CSVs parsed once into typed NumPy columns
+
+Every backtest script reads the same kind of file (one row per signal /
+cluster: BACKTEST_BY_WALLET_COUNT.csv, the replay's signals CSV, the older
+threshold exports). load_events parses it into columns once, so threshold
+and category breakdowns are masks and reductions instead of re-parsing
+"96.5%" and "35,922" for every threshold.
+
+Missing values are explicit: '', UNKNOWN and N/A read as NaN in number
+columns, and text columns fall back to 'Unknown' (status to UNVERIFIED).
+A value that is present but unparseable also reads as missing, with a
+warning naming the column, rather than disappearing silently.
+
+Parsed tables are cached in EVENT_CACHE_DIR as .npz, keyed by the file's
+SHA-256, so re-running a script on an unchanged CSV skips parsing.
+"""
+import csv
+import hashlib
+import os
+from datetime import datetime
+import numpy as np
+
+EVENT_CACHE_DIR = os.getenv('EVENT_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                             '.event_cache'))
+CACHE_VERSION = 1  # Bump when the columns or their parsing change
+
+MISSING = {'', 'UNKNOWN', 'N/A'}
+MISSING_SPELLINGS = sorted({spelling for value in MISSING for spelling in (value, value.lower(), value.title())})
+
+# Column -> CSV headers it may appear under, first match wins
+NUMBER_COLUMNS = {
+    'wallet_count': ('wallet_count', 'num_wallets'),
+    'total_volume': ('total_volume',),
+    'avg_conviction': ('avg_conviction', 'avg_focus_pct'),  # Percent, as written
+    'entry_price': ('entry_price',),
+    'roi': ('roi', 'potential_roi'),  # Percent, as written
+    'profit_loss': ('profit_loss',),
+}
+TIME_COLUMNS = {
+    'first_entry': ('first_entry',),
+    'latest_entry': ('latest_entry',),
+    'signal_time': ('signal_time',),
+}
+TEXT_COLUMNS = {
+    'event_name': ('event_name',),
+    'outcome': ('outcome',),
+    'category': ('category',),
+    'status': ('status',),
+}
+TEXT_DEFAULTS = {'status': 'UNVERIFIED'}
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class EventTable:
+    """Typed event columns; table['roi'] etc. are NumPy arrays of one row per event"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._groups = {}
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return len(self.columns['status'])
+
+    def take(self, mask):
+        """The events where mask is set, as a table of their own"""
+        return EventTable({name: column[mask] for name, column in self.columns.items()})
+
+    def groups(self, name):
+        """(distinct values, each event's index into them) for a text column, worked out once"""
+        if name not in self._groups:
+            self._groups[name] = np.unique(self.columns[name], return_inverse=True)
+        return self._groups[name]
+
+    def count_by(self, name, mask, weights=None):
+        """{value of column name: events (or summed weights)} over the events in mask"""
+        keys, index = self.groups(name)
+        index = index[mask]
+        counts = np.bincount(index, minlength=len(keys))
+        totals = counts if weights is None else np.bincount(index, weights=weights[mask], minlength=len(keys))
+        return {str(keys[i]): totals[i].item() for i in np.nonzero(counts)[0].tolist()}
+
+    @property
+    def win(self):
+        return self.columns['status'] == 'WIN'
+
+    @property
+    def loss(self):
+        return self.columns['status'] == 'LOSS'
+
+    @property
+    def verified(self):
+        return self.win | self.loss
+
+    @property
+    def time_window_hours(self):
+        """Hours from first to latest entry (NaN where either is missing)"""
+        return (self.columns['latest_entry'] - self.columns['first_entry']) / 3600
+
+    def wallets_between(self, min_wallets, max_wallets=None):
+        """Mask of events with min_wallets..max_wallets wallets (missing counts never match)"""
+        wallets = self.columns['wallet_count']
+        with np.errstate(invalid='ignore'):
+            mask = wallets >= min_wallets
+            if max_wallets:
+                mask &= wallets <= max_wallets
+        return mask
+
+
+def parse_numbers(values):
+    """'35,922' / '96.5%' / '$1,200' -> float; ValueError if one isn't a number"""
+    for symbol in (',', '%', '$'):
+        values = np.char.replace(values, symbol, '')
+    return values.astype(np.float64)
+
+
+def parse_times(values):
+    """'YYYY-mm-dd HH:MM:SS' -> seconds, as written (no timezone; differences are what count)"""
+    return np.char.replace(values, ' ', 'T').astype('datetime64[s]').astype(np.int64).astype(np.float64)
+
+
+def parse_column(name, values, parse, length):
+    """
+    Parse one column: missing values -> NaN, and values that don't parse
+    -> NaN with a warning (not hidden)
+    """
+    if values is None:
+        return np.full(length, np.nan)
+    values = np.char.strip(np.array(values, dtype=str))
+    present = ~np.isin(values, MISSING_SPELLINGS)
+    parsed = np.full(len(values), np.nan)
+    if not present.any():
+        return parsed
+    try:
+        parsed[present] = parse(values[present])
+    except ValueError:
+        # Find the culprits one by one; only for files that have some
+        bad = []
+        for i in np.nonzero(present)[0].tolist():
+            try:
+                parsed[i] = parse(values[i:i + 1])[0]
+            except ValueError:
+                bad.append(str(values[i]))
+        print(f"⚠️  {len(bad)} unparseable {name} values read as missing (e.g. {bad[0]!r})")
+    return parsed
+
+
+def parse_events(filename):
+    """Read the CSV into an EventTable (no cache)"""
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])
+        width = len(headers)
+        # Short or long rows are padded / cut to the header, as DictReader would
+        rows = [row if len(row) == width else (row + [''] * width)[:width] for row in reader if row]
+    fields = list(zip(*rows)) if rows else [()] * len(headers)
+
+    def raw(aliases):
+        """The column's strings; None if the file doesn't have it"""
+        header = next((h for h in aliases if h in headers), None)
+        return fields[headers.index(header)] if header else None
+
+    columns = {}
+    for name, aliases in NUMBER_COLUMNS.items():
+        columns[name] = parse_column(name, raw(aliases), parse_numbers, len(rows))
+    for name, aliases in TIME_COLUMNS.items():
+        columns[name] = parse_column(name, raw(aliases), parse_times, len(rows))
+    for name, aliases in TEXT_COLUMNS.items():
+        values = np.char.strip(np.array(raw(aliases) or [''] * len(rows), dtype=str))
+        columns[name] = np.where(np.isin(values, MISSING_SPELLINGS), TEXT_DEFAULTS.get(name, 'Unknown'), values)
+    statuses, index = np.unique(columns['status'], return_inverse=True)
+    columns['status'] = np.char.upper(statuses)[index]
+    return EventTable(columns)
+
+
+def file_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_events(filename, cache_dir=EVENT_CACHE_DIR):
+    """EventTable for a CSV, from the cache when the file is unchanged (cache_dir=None to skip it)"""
+    if not cache_dir:
+        return parse_events(filename)
+
+    path = os.path.join(cache_dir, f"{file_hash(filename)}-v{CACHE_VERSION}.npz")
+    if os.path.exists(path):
+        with np.load(path, allow_pickle=False) as cached:
+            return EventTable({name: cached[name] for name in cached.files})
+
+    table = parse_events(filename)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, **table.columns)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️  Could not cache {filename}: {e}")
+    return table
@@ -0,0 +1,104 @@
+"""
+Alert Store
+Which alerts have gone out, so the same signal isn't sent twice
+
+Each entry remembers when a key was last alerted and at what tier (how far
+its metrics had got up a list of thresholds). A key alerts again once its
+entry expires, or earlier if a metric climbs into a higher tier: a cluster
+that grows from 5 to 10 wallets is news, 5 to 6 isn't.
+
+On disk it's an append-only JSON-lines file, one small record per alert
+(the newest record for a key wins), rewritten with just the live entries
+once the dead ones outnumber them.
+"""
+from bisect import bisect_right
+import json
+import os
+import time
+import config
+
+
+class AlertStore:
+    def __init__(self, path=config.ALERT_STORE_FILE, ttl_seconds=config.ALERT_TTL_HOURS * 3600,
+                 tiers=config.ALERT_TIERS):
+        """
+        tiers maps a metric name to its ascending thresholds, e.g.
+        {'num_wallets': [5, 10, 20]}; metrics not listed never re-alert
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.tiers = tiers
+        self.entries = {}  # key -> (alerted at, {metric: tier})
+        self.records = 0  # Lines in the file, live or not
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn final write
+            self.entries[record['key']] = (record['time'], record['tiers'])
+        self.records = len(lines)
+        self.expire()
+        if self.records > len(self.entries):
+            self.compact()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def tier(self, metrics):
+        """How many thresholds each metric has reached"""
+        return {name: bisect_right(self.tiers[name], value)
+                for name, value in metrics.items() if name in self.tiers}
+
+    def should_alert(self, key, metrics=None, now=None):
+        """True if key was never alerted, its entry expired, or a metric reached a new tier"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+
+        alerted_at, tiers = entry
+        if (time.time() if now is None else now) - alerted_at >= self.ttl_seconds:
+            return True
+        return any(tier > tiers.get(name, 0) for name, tier in self.tier(metrics or {}).items())
+
+    def record(self, key, metrics=None, now=None):
+        """Remember that key was just alerted"""
+        now = time.time() if now is None else now
+        tiers = self.tier(metrics or {})
+        self.entries[key] = (now, tiers)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'key': key, 'time': now, 'tiers': tiers}, separators=(',', ':')) + '\n')
+        self.records += 1
+
+        if self.records > 2 * max(len(self.entries), config.ALERT_STORE_COMPACT_MIN):
+            self.compact(now)
+
+    def check_and_record(self, key, metrics=None, now=None):
+        """should_alert, recording the alert if so"""
+        if not self.should_alert(key, metrics, now):
+            return False
+        self.record(key, metrics, now)
+        return True
+
+    def expire(self, now=None):
+        """Drop entries older than the TTL"""
+        cutoff = (time.time() if now is None else now) - self.ttl_seconds
+        self.entries = {key: entry for key, entry in self.entries.items() if entry[0] >= cutoff}
+
+    def compact(self, now=None):
+        """Rewrite the file as just the live entries (atomic)"""
+        self.expire(now)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            for key, (alerted_at, tiers) in self.entries.items():
+                f.write(json.dumps({'key': key, 'time': alerted_at, 'tiers': tiers}, separators=(',', ':')) + '\n')
+        os.replace(tmp, self.path)
+        self.records = len(self.entries)
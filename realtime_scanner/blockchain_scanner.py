@@ -3,10 +3,14 @@ Blockchain Scanner
 Connects to Polygon via Alchemy and monitors Polymarket trades
 """
 from web3 import Web3
-import requests
-from datetime import datetime
+import threading
 import time
 import config
+from log_fetcher import AdaptiveLogFetcher
+from checkpoint import hex_hash
+from market_cache import MarketCache
+from market_catalogue import MarketCatalogue, parse_market_tokens
+from market_categorizer import MarketCategorizer
 
 class BlockchainScanner:
     def __init__(self):
@@ -19,17 +23,34 @@ class BlockchainScanner:
         except:
             pass  # Middleware not needed or already injected
 
+        self.log_fetcher = AdaptiveLogFetcher(self.w3)
+
         self.current_block = None
-        self.market_cache = {}  # market_id -> {question, tokens, etc}
+        self.market_cache = MarketCache()  # token_id -> {question, outcome, category}
+        self.categorizer = MarketCategorizer()
+        self.catalogue = MarketCatalogue()
+        self.last_catalogue_sync = 0
+        # Enrich workers share the catalogue; one syncs while the others skip
+        self.catalogue_lock = threading.Lock()
 
     def get_latest_block(self):
         """Get latest block number"""
         return self.w3.eth.block_number
 
+    def get_block_header(self, block_number):
+        """(hash, parent hash, timestamp) of a block: 0x hex strings and epoch seconds"""
+        self.log_fetcher.rate_limiter.wait()
+        block = self.w3.eth.get_block(block_number)
+        return hex_hash(block['hash']), hex_hash(block['parentHash']), block['timestamp']
+
+    def get_block_hash(self, block_number):
+        return self.get_block_header(block_number)[0]
+
     def get_market_info(self, market_id):
         """Get market information from Polymarket API"""
-        if market_id in self.market_cache:
-            return self.market_cache[market_id]
+        metadata = self.market_cache.get(market_id)
+        if metadata:
+            return metadata
 
         try:
             # Try to find market info
@@ -43,214 +64,113 @@ class BlockchainScanner:
         except:
             return None
 
-    def parse_trade_from_log(self, log):
+    def enrich_with_polymarket_data(self, trades):
         """
-        Parse trade data from OrderFilled event log
+        Add market metadata (outcome, question, category) to fills using token IDs
 
-        Event structure:
-        - topics[0] = event signature
-        - topics[1] = orderHash (indexed)
-        - topics[2] = maker address (indexed, 32 bytes padded)
-        - topics[3] = taker address (indexed, 32 bytes padded)
-        - data = [makerAssetId, takerAssetId, makerAmountFilled, takerAmountFilled, fee]
+        Only tokens the cache doesn't already know get looked up, so the cost
+        is proportional to new tokens rather than the whole catalogue.
+        Prices are NOT overwritten: each fill already carries its own
+        execution price computed from the on-chain amounts.
         """
         try:
-            topics = log.get('topics', [])
-            raw_data = log.get('data', '0x')
-
-            # Convert data to hex string if it's bytes
-            if isinstance(raw_data, bytes):
-                data = raw_data.hex()
-            elif isinstance(raw_data, str):
-                data = raw_data[2:] if raw_data.startswith('0x') else raw_data
-            else:
-                return None
-
-            # Need at least 4 topics and data (5 uint256 = 160 bytes = 320 hex chars)
-            # But sometimes data is 158 bytes, so let's be flexible
-            if len(topics) < 4 or len(data) < 300:
-                return None
-
-            # Extract maker and taker addresses from topics
-            # Topics are 32 bytes, addresses are last 20 bytes
-            def extract_address(topic):
-                if isinstance(topic, bytes):
-                    # Already bytes, take last 20 bytes
-                    return '0x' + topic[-20:].hex().lower()
-                elif hasattr(topic, 'hex'):
-                    # HexBytes object
-                    return '0x' + topic.hex()[26:].lower()
-                elif isinstance(topic, str):
-                    # Hex string
-                    hex_str = topic[2:] if topic.startswith('0x') else topic
-                    return '0x' + hex_str[24:].lower()
-                return '0x0'
-
-            maker = extract_address(topics[2])
-            taker = extract_address(topics[3])
-
-            # Extract data fields (each is 64 hex chars = 32 bytes)
-            maker_asset_id = int(data[0:64], 16)
-            taker_asset_id = int(data[64:128], 16)
-            maker_amount = int(data[128:192], 16)
-            taker_amount = int(data[192:256], 16)
-            fee = int(data[256:320], 16)
-
-            # Convert amounts from USDC (6 decimals)
-            maker_volume_usd = maker_amount / 1e6
-            taker_volume_usd = taker_amount / 1e6
+            # Stream markets created/updated since the last sync into the cache
+            self.sync_catalogue_if_due()
 
-            # Price will be filled in during enrichment (from CLOB API)
-            # Don't calculate from amounts - that's not the market price
-            price = 0
+            misses = self.market_cache.missing({trade.token_id for trade in trades})
+            if misses:
+                print(f"Looking up {len(misses)} uncached tokens...")
+                self.fetch_markets_for_tokens(misses)
 
-            block_num = log.get('blockNumber', 0)
-            tx_hash = log.get('transactionHash', '0x0')
-            if hasattr(tx_hash, 'hex'):
-                tx_hash = tx_hash.hex()
-
-            # Return TWO trades: one for maker, one for taker
-            # Price and outcome will be enriched later from CLOB API
-            return [
-                {
-                    'wallet': maker,
-                    'market_id': str(maker_asset_id),
-                    'outcome': 'Unknown',  # Will be filled during enrichment
-                    'volume_usd': maker_volume_usd,
-                    'price': 0,  # Will be filled during enrichment
-                    'timestamp': datetime.now(),
-                    'block_number': block_num,
-                    'tx_hash': str(tx_hash),
-                    'side': 'maker'
-                },
-                {
-                    'wallet': taker,
-                    'market_id': str(taker_asset_id),
-                    'outcome': 'Unknown',  # Will be filled during enrichment
-                    'volume_usd': taker_volume_usd,
-                    'price': 0,  # Will be filled during enrichment
-                    'timestamp': datetime.now(),
-                    'block_number': block_num,
-                    'tx_hash': str(tx_hash),
-                    'side': 'taker'
-                }
-            ]
-        except Exception as e:
-            print(f"Error parsing log: {e}")
-            return None
-
-    def get_recent_trades(self, from_block, to_block):
-        """Get trades from block range"""
-        trades = []
-
-        try:
-            # Get logs from CTF Exchange contract
-            logs = self.w3.eth.get_logs({
-                'address': config.CTF_EXCHANGE,
-                'fromBlock': from_block,
-                'toBlock': to_block
-            })
+            for trade in trades:
+                metadata = self.market_cache.get(trade.token_id)
+                if metadata:
+                    trade.outcome = metadata['outcome']
+                    trade.question = metadata['question']
+                    trade.category = metadata['category']
 
-            for log in logs:
-                parsed = self.parse_trade_from_log(log)
-                if parsed:
-                    # parse_trade_from_log returns a list of trades (maker + taker)
-                    if isinstance(parsed, list):
-                        trades.extend(parsed)
-                    else:
-                        trades.append(parsed)
+            self.market_cache.save()
 
         except Exception as e:
-            print(f"Error fetching logs: {e}")
+            print(f"Error enriching trades: {e}")
+            import traceback
+            traceback.print_exc()
 
         return trades
 
-    def enrich_with_polymarket_data(self, trades):
-        """Add market metadata to trades using token IDs"""
-        try:
-            # Fetch CLOB market data (includes token_id → price mapping)
-            response = requests.get('https://clob.polymarket.com/sampling-simplified-markets', timeout=10)
-            clob_data = response.json()
-
-            # Build token_id → market data lookup
-            token_lookup = {}
-            for market in clob_data.get('data', []):
-                condition_id = market.get('condition_id', '')
-                for token in market.get('tokens', []):
-                    token_id = str(token.get('token_id', ''))
-                    token_lookup[token_id] = {
-                        'condition_id': condition_id,
-                        'outcome': token.get('outcome', 'Unknown'),
-                        'price': float(token.get('price', 0.5))
-                    }
-
-            # Fetch gamma API for market questions
-            response2 = requests.get('https://gamma-api.polymarket.com/markets', timeout=10)
-            markets_data = response2.json()
+    def fetch_markets_for_tokens(self, token_ids):
+        """Targeted gamma lookups for specific tokens; unknown tokens are cached as misses"""
+        token_ids = list(token_ids)
+        found = set()
 
-            # Build condition_id → question lookup
-            condition_lookup = {}
-            for market in markets_data:
-                cid = market.get('conditionId', '')
-                if cid:
-                    condition_lookup[cid] = {
-                        'question': market.get('question', 'Unknown'),
-                        'category': self.categorize_market(market.get('question', ''))
-                    }
+        for i in range(0, len(token_ids), config.MARKET_LOOKUP_BATCH_SIZE):
+            chunk = token_ids[i:i + config.MARKET_LOOKUP_BATCH_SIZE]
+            for market in self.catalogue.get_markets_for_tokens(chunk):
+                found.update(self.cache_market(market))
 
-            # Enrich trades with both price and question
-            for trade in trades:
-                token_id = str(trade['market_id'])
-
-                # Get price and outcome from token
-                if token_id in token_lookup:
-                    token_data = token_lookup[token_id]
-                    trade['price'] = token_data['price']
-                    trade['outcome'] = token_data['outcome']
+        for token_id in token_ids:
+            if token_id not in found:
+                self.market_cache.put_miss(token_id)
 
-                    # Get question from condition
-                    condition_id = token_data['condition_id']
-                    if condition_id in condition_lookup:
-                        market_data = condition_lookup[condition_id]
-                        trade['question'] = market_data['question']
-                        trade['category'] = market_data['category']
+    def _catalogue_sync_due(self):
+        return time.time() - self.last_catalogue_sync >= config.CATALOGUE_SYNC_INTERVAL_SECONDS
 
-                        # Cache for later
-                        self.market_cache[token_id] = {
-                            'question': trade['question'],
-                            'category': trade['category'],
-                            'price': trade['price'],
-                            'outcome': trade['outcome']
-                        }
+    def sync_catalogue_if_due(self):
+        """
+        Sync the catalogue every CATALOGUE_SYNC_INTERVAL_SECONDS
 
+        A worker that finds another one mid-sync doesn't wait for it: its
+        tokens fall back to targeted lookups.
+        """
+        if not self._catalogue_sync_due() or not self.catalogue_lock.acquire(blocking=False):
+            return
+        try:
+            if self._catalogue_sync_due():  # Another worker may have just finished one
+                self.sync_market_catalogue()
+        finally:
+            self.catalogue_lock.release()
+
+    def sync_market_catalogue(self):
+        """Incrementally pull active markets updated since the last sync into the cache"""
+        synced = 0
+        try:
+            for market in self.catalogue.iter_updated_markets(active='true', closed='false'):
+                self.cache_market(market)
+                synced += 1
         except Exception as e:
-            print(f"Error enriching trades: {e}")
-            import traceback
-            traceback.print_exc()
+            # Targeted lookups still cover whatever this sync missed
+            print(f"Error syncing market catalogue: {e}")
 
-        return trades
+        self.last_catalogue_sync = time.time()
+        if synced:
+            print(f"Synced {synced} updated markets into cache")
 
-    def categorize_market(self, question):
-        """Categorize market based on question"""
-        question_lower = question.lower()
+    def cache_market(self, market):
+        """Store one gamma market and its tokens in the cache, return its token ids"""
+        condition_id = market.get('conditionId', '')
+        if not condition_id:
+            return []
 
-        # Check Politics
-        if any(kw in question_lower for kw in config.POLITICS_KEYWORDS):
-            if not any(kw in question_lower for kw in config.EXCLUDE_KEYWORDS):
-                return 'Politics'
+        question = market.get('question', 'Unknown')
+        self.market_cache.put_market(condition_id, question, self.categorize_market(question, condition_id))
 
-        # Check Financial
-        if any(kw in question_lower for kw in config.FINANCIAL_KEYWORDS):
-            return 'Financial'
+        token_ids = []
+        for token_id, outcome, _ in parse_market_tokens(market):
+            self.market_cache.put_token(token_id, condition_id, outcome)
+            token_ids.append(token_id)
+        return token_ids
 
-        # Check exclusions
-        if any(kw in question_lower for kw in config.EXCLUDE_KEYWORDS):
-            return 'Excluded'
-
-        return 'Other'
+    def categorize_market(self, question, condition_id=None):
+        """Categorize market based on question (see MarketCategorizer)"""
+        return self.categorizer.categorize(question, condition_id)
 
     def save_checkpoint(self, block_number):
-        """Save current block checkpoint"""
+        """
+        Save current block checkpoint (plain text)
+
+        The realtime scanner keeps its checkpoint in the wallet tracker's
+        state instead; this file is only read once, when there is none.
+        """
         with open('scanner_checkpoint.txt', 'w') as f:
             f.write(str(block_number))
 
@@ -0,0 +1,93 @@
+"""
+Chain Checkpoint
+The last block applied to the wallet tracker, the hashes of recent blocks
+and the trades each of them applied, so a reorg can be detected and undone
+"""
+from collections import deque
+import config
+
+
+def hex_hash(value):
+    """Block/tx hash as a lowercase 0x string (web3 gives HexBytes, raw JSON-RPC gives str)"""
+    if isinstance(value, str):
+        return value.lower()
+    return '0x' + bytes(value).hex()
+
+
+def logs_match_block(logs, block_number, block_hash):
+    """True if every log from block_number carries block_hash (none came from a replaced block)"""
+    for log in logs:
+        number = log['blockNumber']
+        if isinstance(number, str):
+            number = int(number, 16)
+        if number == block_number and hex_hash(log['blockHash']) != block_hash:
+            return False
+    return True
+
+
+class ChainCheckpoint:
+    """
+    Where the tracker is on the chain
+
+    recent holds one entry per applied range, oldest first:
+    [from_block, to_block, to_block_hash, trades, fill_keys] where trades
+    are the [wallet, market_id, outcome, volume_usd, shares] buys applied
+    for it and fill_keys the dedupe keys of all its fills.
+    Ranges entirely older than REORG_WINDOW_BLOCKS are dropped, except the
+    newest one, whose hash the next range's parent is checked against.
+    """
+
+    def __init__(self, block=None, window=config.REORG_WINDOW_BLOCKS):
+        self.block = block  # Last block applied to the tracker
+        self.window = window
+        self.recent = deque()
+
+    @property
+    def tip_hash(self):
+        return self.recent[-1][2] if self.recent else None
+
+    def extends(self, parent_hash):
+        """True if a range with this parent hash continues from our tip (or the tip is unknown)"""
+        return self.tip_hash is None or parent_hash is None or parent_hash == self.tip_hash
+
+    def record(self, from_block, to_block, block_hash, trades, fill_keys=()):
+        """A range has been applied to the tracker"""
+        self.recent.append([from_block, to_block, block_hash, trades, list(fill_keys)])
+        self.block = to_block
+        while len(self.recent) > 1 and self.recent[0][1] <= to_block - self.window:
+            self.recent.popleft()
+
+    def rollback(self, get_block_hash, revert_trade, forget_fills=None):
+        """
+        Undo recent ranges, newest first, until one is still on the chain
+
+        get_block_hash(n) -> the node's current hash for block n
+        revert_trade(wallet, market_id, outcome, volume_usd, shares) undoes a buy
+        forget_fills(keys) lets the replaced ranges' fills be ingested again
+        Returns the block to resume after (the common ancestor).
+        """
+        while self.recent:
+            from_block, to_block, block_hash, trades, *fill_keys = self.recent[-1]
+            if get_block_hash(to_block) == block_hash:
+                return self.block
+
+            for trade in reversed(trades):
+                revert_trade(*trade)
+            if forget_fills and fill_keys:
+                forget_fills(fill_keys[0])
+            self.recent.pop()
+            self.block = from_block - 1
+
+        # Everything we kept was replaced: resume before all of it and hope
+        # the block before the window survived
+        print(f"⚠️  Reorg deeper than the {self.window}-block window, resuming after block {self.block}")
+        return self.block
+
+    def to_dict(self):
+        return {'block': self.block, 'recent': list(self.recent)}
+
+    @classmethod
+    def from_dict(cls, data, window=config.REORG_WINDOW_BLOCKS):
+        checkpoint = cls(data['block'], window)
+        checkpoint.recent.extend(data['recent'])
+        return checkpoint
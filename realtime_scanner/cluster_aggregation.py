@@ -0,0 +1,143 @@
+"""
+Cluster Aggregation
+One vectorized group-by over qualifying positions: per (market_id, outcome)
+wallet count, total volume, mean conviction, first/latest entry and the
+volume-weighted entry price
+"""
+from datetime import datetime
+import numpy as np
+
+
+def aggregate_clusters(group_codes, volumes, convictions, entries, shares, min_wallets=1):
+    """
+    Per-group aggregates for parallel position arrays
+
+    group_codes: int per position identifying its (market_id, outcome)
+    entries: entry times as epoch seconds
+    shares: outcome tokens bought (0 = unknown, left out of the entry price)
+
+    Returns (codes, counts, total_volume, avg_conviction, first_entry,
+    latest_entry, entry_price, members) for groups with min_wallets+
+    positions, where entry_price is NaN if no member has shares and
+    members[i] is the array of position indexes in group i.
+    """
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+    if len(group_codes) == 0:
+        empty = np.zeros(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, empty, empty, empty, empty, []
+
+    volumes = np.asarray(volumes, dtype=np.float64)
+    shares = np.asarray(shares, dtype=np.float64)
+    codes, inverse, counts = np.unique(group_codes, return_inverse=True, return_counts=True)
+    total_volume = np.bincount(inverse, weights=volumes, minlength=len(codes))
+    conviction_sum = np.bincount(inverse, weights=convictions, minlength=len(codes))
+
+    # VWAP over the members whose share count is known
+    priced_volume = np.bincount(inverse, weights=np.where(shares > 0, volumes, 0.0), minlength=len(codes))
+    share_sum = np.bincount(inverse, weights=shares, minlength=len(codes))
+    entry_price = np.full(len(codes), np.nan)
+    np.divide(priced_volume, share_sum, out=entry_price, where=share_sum > 0)
+
+    # Positions sorted by group, so each group is one contiguous slice
+    order = np.argsort(inverse, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sorted_entries = np.asarray(entries, dtype=np.float64)[order]
+    first_entry = np.minimum.reduceat(sorted_entries, starts)
+    latest_entry = np.maximum.reduceat(sorted_entries, starts)
+
+    keep = np.nonzero(counts >= min_wallets)[0]
+    members = [order[starts[g]:starts[g] + counts[g]] for g in keep]
+
+    return (codes[keep], counts[keep], total_volume[keep], conviction_sum[keep] / counts[keep],
+            first_entry[keep], latest_entry[keep], entry_price[keep], members)
+
+
+class Cluster(dict):
+    """
+    Cluster record: a plain dict of aggregates, plus wallets()
+
+    The member addresses aren't a key: wallets() resolves them on first call
+    (and keeps them), so clusters nobody looks inside cost nothing per member
+    and the dict itself is the same to get/in/dict()/json.dumps.
+    """
+    __slots__ = ('_resolve_wallets', '_wallets')
+
+    def __init__(self, fields, resolve_wallets):
+        super().__init__(fields)
+        self._resolve_wallets = resolve_wallets
+        self._wallets = None
+
+    def wallets(self):
+        """Member wallet addresses"""
+        if self._wallets is None:
+            self._wallets = self._resolve_wallets()
+        return self._wallets
+
+
+def cluster_records(aggregates, label, wallet):
+    """
+    Lightweight cluster records from aggregate_clusters output
+
+    label(code) -> (market_id, outcome); wallet(i) -> position i's wallet.
+    Only scalars are built up front, no per-position dicts.
+    """
+    codes, counts, total_volume, avg_conviction, first_entry, latest_entry, entry_price, members = aggregates
+
+    clusters = []
+    for i, code in enumerate(codes.tolist()):
+        market_id, outcome = label(code)
+        clusters.append(Cluster({
+            'market_id': market_id,
+            'outcome': outcome,
+            'num_wallets': int(counts[i]),
+            'total_volume': float(total_volume[i]),
+            'avg_conviction': float(avg_conviction[i]),
+            'first_entry': datetime.fromtimestamp(first_entry[i]),
+            'latest_entry': datetime.fromtimestamp(latest_entry[i]),
+            'entry_price': None if np.isnan(entry_price[i]) else float(entry_price[i])
+        }, lambda rows=members[i]: [wallet(j) for j in rows.tolist()]))
+    return clusters
+
+
+class PositionBatch:
+    """Collects qualifying positions as flat lists, ready for aggregate_clusters"""
+
+    def __init__(self):
+        self.groups = {}  # (market_id, outcome) -> code
+        self.labels = []  # code -> (market_id, outcome)
+        self.codes = []
+        self.wallets = []
+        self.volumes = []
+        self.convictions = []
+        self.entries = []
+        self.shares = []
+
+    def _code(self, market_id, outcome):
+        key = (market_id, outcome)
+        code = self.groups.get(key)
+        if code is None:
+            code = self.groups[key] = len(self.labels)
+            self.labels.append(key)
+        return code
+
+    def add(self, wallet, market_id, outcome, volume, conviction, entry, shares):
+        self.codes.append(self._code(market_id, outcome))
+        self.wallets.append(wallet)
+        self.volumes.append(volume)
+        self.convictions.append(conviction)
+        self.entries.append(entry)
+        self.shares.append(shares)
+
+    def add_group(self, market_id, outcome, wallets, volumes, convictions, entries, shares):
+        """Add every position of one (market_id, outcome) at once"""
+        self.codes.extend([self._code(market_id, outcome)] * len(wallets))
+        self.wallets.extend(wallets)
+        self.volumes.extend(volumes)
+        self.convictions.extend(convictions)
+        self.entries.extend(entries)
+        self.shares.extend(shares)
+
+    def clusters(self, min_wallets=1):
+        aggregates = aggregate_clusters(self.codes, self.volumes, self.convictions,
+                                        self.entries, self.shares, min_wallets)
+        return cluster_records(aggregates, self.labels.__getitem__, self.wallets.__getitem__)
@@ -0,0 +1,697 @@
+"""
+Columnar Wallet Tracker
+Same API as WalletTracker, but wallets/tokens/outcomes are interned to
+integer ids and positions live in NumPy columns instead of nested dicts
+"""
+from datetime import datetime, timedelta
+import hashlib
+import numpy as np
+from cluster_aggregation import aggregate_clusters, cluster_records
+from state_store import StateStore
+from wallet_tracker import REVERT_DUST_USD
+
+# Packed position key: wallet_id | token_id | outcome_id in one int64.
+# OUTCOME_BITS matches the int16 outcome column; ids past a field's width
+# raise OverflowError instead of colliding with another position's key.
+WALLET_BITS = 24
+TOKEN_BITS = 24
+OUTCOME_BITS = 15
+
+
+class Interner:
+    """Bidirectional string <-> dense integer id mapping (for small vocabularies)"""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.ids = {}
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value):
+        """Id for value, assigning the next one if it's new"""
+        id_ = self.ids.get(value)
+        if id_ is None:
+            id_ = len(self.values)
+            self.ids[value] = id_
+            self.values.append(value)
+        return id_
+
+    def lookup(self, value):
+        """Id for value, or None if it was never interned"""
+        return self.ids.get(value)
+
+    def value(self, id_):
+        return self.values[id_]
+
+    def all_values(self):
+        return list(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class SortedKeyIndex:
+    """
+    int64 key -> int32 row map without a Python object per entry
+
+    Keys live in a sorted NumPy array searched with searchsorted; new keys
+    go to a small dict that is merged in once it reaches merge_size.
+    Deleted keys are tombstoned (row -1) and dropped at the next merge.
+    """
+
+    def __init__(self, merge_size=16384):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.pending = {}
+        self.merge_size = merge_size
+        self.size = 0
+
+    def _find(self, key):
+        """Slot of key in the sorted arrays, or -1"""
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return -1
+
+    def get(self, key):
+        row = self.pending.get(key)
+        if row is not None:
+            return row
+
+        i = self._find(key)
+        if i >= 0 and self.rows[i] >= 0:
+            return int(self.rows[i])
+        return None
+
+    def set(self, key, row):
+        if key in self.pending:
+            self.pending[key] = row
+            return
+
+        i = self._find(key)
+        if i >= 0:
+            if self.rows[i] < 0:
+                self.size += 1
+            self.rows[i] = row
+            return
+
+        self.pending[key] = row
+        self.size += 1
+        if len(self.pending) >= self.merge_size:
+            self.merge()
+
+    def delete(self, key):
+        if self.pending.pop(key, None) is not None:
+            self.size -= 1
+            return
+
+        i = self._find(key)
+        if i >= 0 and self.rows[i] >= 0:
+            self.rows[i] = -1
+            self.size -= 1
+
+    def merge(self):
+        """Fold pending keys into the sorted arrays and drop tombstones"""
+        live = self.rows >= 0
+        keys = np.concatenate((self.keys[live], np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))))
+        rows = np.concatenate((self.rows[live], np.fromiter(self.pending.values(), dtype=np.int32, count=len(self.pending))))
+
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.rows = rows[order]
+        self.pending = {}
+
+    def load(self, keys, rows):
+        """Replace contents with parallel key/row arrays"""
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order].astype(np.int64)
+        self.rows = rows[order].astype(np.int32)
+        self.pending = {}
+        self.size = len(keys)
+
+    def __len__(self):
+        return self.size
+
+
+class ColumnInterner:
+    """
+    Interner for huge vocabularies (wallet addresses)
+
+    Values are stored as fixed-width bytes in one NumPy column and found via
+    a SortedKeyIndex on a 63-bit hash, so there's no str/int/dict-entry
+    object per value. Hash collisions and values too long for the column
+    fall back to a small dict.
+    """
+
+    def __init__(self, width=42, values=()):
+        self.width = width
+        self.column = np.zeros(1024, dtype=f'S{width}')
+        self.count = 0
+        self.index = SortedKeyIndex()
+        self.overflow_ids = {}  # value -> id, for collisions / long values
+        self.overflow_values = {}  # id -> value, for long values
+        if values:
+            self._load(values)
+
+    def _load(self, values):
+        """Intern a list of distinct values in bulk (ids follow list order)"""
+        raws = [value.encode() for value in values]
+        self.count = len(raws)
+        self.column = np.zeros(max(self.count, 1024), dtype=self.column.dtype)
+        self.column[:self.count] = [raw if len(raw) <= self.width else b'' for raw in raws]
+        for id_, raw in enumerate(raws):
+            if len(raw) > self.width:
+                self.overflow_values[id_] = values[id_]
+
+        # First value with each hash gets the index slot, collisions overflow
+        hashes = np.fromiter((self._hash(raw) for raw in raws), dtype=np.int64, count=self.count)
+        _, first = np.unique(hashes, return_index=True)
+        self.index.load(hashes[first], first.astype(np.int32))
+        if len(first) < self.count:
+            collided = np.ones(self.count, dtype=np.bool_)
+            collided[first] = False
+            for id_ in np.nonzero(collided)[0].tolist():
+                self.overflow_ids[values[id_]] = id_
+
+    @staticmethod
+    def _hash(raw):
+        return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), 'big') >> 1
+
+    def _matches(self, id_, raw, value):
+        """True if id_ holds value (long values live in overflow_values)"""
+        if id_ in self.overflow_values:
+            return self.overflow_values[id_] == value
+        return len(raw) <= self.width and self.column[id_] == raw
+
+    def lookup(self, value):
+        """Id for value, or None if it was never interned"""
+        raw = value.encode()
+        id_ = self.index.get(self._hash(raw))
+        if id_ is not None and self._matches(id_, raw, value):
+            return id_
+        return self.overflow_ids.get(value)
+
+    def intern(self, value):
+        """Id for value, assigning the next one if it's new"""
+        raw = value.encode()
+        key = self._hash(raw)
+        id_ = self.index.get(key)
+        if id_ is not None:
+            if self._matches(id_, raw, value):
+                return id_
+            existing = self.overflow_ids.get(value)
+            if existing is not None:
+                return existing
+
+        id_ = self.count
+        self.count += 1
+        if self.count > len(self.column):
+            column = np.zeros(len(self.column) * 2, dtype=self.column.dtype)
+            column[:len(self.column)] = self.column
+            self.column = column
+
+        if len(raw) <= self.width:
+            self.column[id_] = raw
+        else:
+            self.overflow_values[id_] = value
+
+        if self.index.get(key) is None:
+            self.index.set(key, id_)
+        else:
+            self.overflow_ids[value] = id_
+        return id_
+
+    def value(self, id_):
+        if id_ in self.overflow_values:
+            return self.overflow_values[id_]
+        return self.column[id_].decode()
+
+    def all_values(self):
+        return [self.value(i) for i in range(self.count)]
+
+    def __len__(self):
+        return self.count
+
+
+class ColumnarWalletTracker:
+    def __init__(self, min_volume=1000, min_conviction=0.80, capacity=1024):
+        # Thresholds changed_only detection is tracked for
+        self.min_volume = min_volume
+        self.min_conviction = min_conviction
+
+        self.wallet_ids = ColumnInterner()
+        self.token_ids = Interner()
+        self.outcome_ids = Interner()
+
+        # ---- position columns (row = one wallet/market/outcome position) ----
+        self.pos_wallet = np.zeros(capacity, dtype=np.int32)
+        self.pos_token = np.zeros(capacity, dtype=np.int32)
+        self.pos_outcome = np.zeros(capacity, dtype=np.int16)
+        self.pos_volume = np.zeros(capacity, dtype=np.float64)
+        self.pos_entry = np.zeros(capacity, dtype=np.float64)  # epoch seconds
+        self.pos_shares = np.zeros(capacity, dtype=np.float64)  # for the entry price
+        self.pos_alive = np.zeros(capacity, dtype=np.bool_)
+        # Next row of the same wallet (-1 = end), so a wallet's positions
+        # can be walked without a per-wallet Python list
+        self.pos_next = np.full(capacity, -1, dtype=np.int32)
+        # Row was a cluster member at the last detect_clusters(changed_only=True)
+        self.pos_qualified = np.zeros(capacity, dtype=np.bool_)
+
+        self.num_rows = 0  # high-water mark of used rows
+        self.free_rows = []  # evicted rows available for reuse
+
+        # packed (wallet, token, outcome) key -> row
+        self.row_index = SortedKeyIndex()
+
+        # ---- wallet columns (indexed by wallet id) ----
+        self.wallet_total = np.zeros(capacity, dtype=np.float64)
+        self.wallet_head = np.full(capacity, -1, dtype=np.int32)
+        self.wallet_positions_count = np.zeros(capacity, dtype=np.int32)
+
+        # Wallets touched since the last detect_clusters(changed_only=True)
+        # (a bool column rather than a set of ids: 1 byte per wallet)
+        self.wallet_changed = np.zeros(capacity, dtype=np.bool_)
+        # Packed (token, outcome) keys of member positions dropped by cleanup
+        self.expired_member_keys = []
+
+        # Changes since the last save_state, written as one journal record
+        self.journal = []
+        self.state_store = None
+
+        # Chain checkpoint saved with this state (set by save_state/load_state)
+        self.checkpoint = None
+
+    # ========== STORAGE HELPERS ==========
+
+    @staticmethod
+    def _check_ids(num_wallets, num_tokens, num_outcomes):
+        """OverflowError if an id no longer fits its field of the packed key"""
+        for name, count, bits in (('wallets', num_wallets, WALLET_BITS), ('tokens', num_tokens, TOKEN_BITS),
+                                  ('outcome labels', num_outcomes, OUTCOME_BITS)):
+            if count > 1 << bits:
+                raise OverflowError(f"{count} {name} don't fit the {bits}-bit field of the position key")
+
+    @staticmethod
+    def _key(wallet_id, token_id, outcome_id):
+        return (wallet_id << (TOKEN_BITS + OUTCOME_BITS)) | (token_id << OUTCOME_BITS) | outcome_id
+
+    @staticmethod
+    def _grow(array, size, fill=0):
+        """Return array resized to at least size (doubling), new slots set to fill"""
+        if size <= len(array):
+            return array
+        new = np.full(max(size, len(array) * 2), fill, dtype=array.dtype)
+        new[:len(array)] = array
+        return new
+
+    def _ensure_wallet_capacity(self, wallet_id):
+        size = wallet_id + 1
+        self.wallet_total = self._grow(self.wallet_total, size)
+        self.wallet_head = self._grow(self.wallet_head, size, -1)
+        self.wallet_positions_count = self._grow(self.wallet_positions_count, size)
+        self.wallet_changed = self._grow(self.wallet_changed, size, False)
+
+    def _new_row(self):
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.pos_qualified[row] = False
+            return row
+
+        row = self.num_rows
+        self.num_rows += 1
+        size = self.num_rows
+        self.pos_wallet = self._grow(self.pos_wallet, size)
+        self.pos_token = self._grow(self.pos_token, size)
+        self.pos_outcome = self._grow(self.pos_outcome, size)
+        self.pos_volume = self._grow(self.pos_volume, size)
+        self.pos_entry = self._grow(self.pos_entry, size)
+        self.pos_shares = self._grow(self.pos_shares, size)
+        self.pos_alive = self._grow(self.pos_alive, size)
+        self.pos_next = self._grow(self.pos_next, size, -1)
+        self.pos_qualified = self._grow(self.pos_qualified, size, False)
+        return row
+
+    def _wallet_rows(self, wallet_id):
+        """Rows of one wallet's live positions"""
+        rows = []
+        row = self.wallet_head[wallet_id]
+        while row != -1:
+            rows.append(row)
+            row = self.pos_next[row]
+        return rows
+
+    def _recompute_total(self, wallet_id):
+        """Exact total from the wallet's own positions (no += / -= drift)"""
+        rows = self._wallet_rows(wallet_id)
+        self.wallet_total[wallet_id] = float(self.pos_volume[rows].sum()) if rows else 0.0
+
+    # ========== PUBLIC API (mirrors WalletTracker) ==========
+
+    def add_trade(self, wallet, market_id, outcome, volume_usd, timestamp=None, shares=0):
+        """Add a trade to tracker (shares = outcome tokens bought, for the entry price)"""
+        if timestamp is None:
+            timestamp = datetime.now()
+
+        entered = timestamp.timestamp()
+        self._add(wallet, market_id, outcome, volume_usd, entered, shares)
+        self.journal.append(('+', wallet, market_id, outcome, volume_usd, entered, shares))
+
+    def _add(self, wallet, market_id, outcome, volume_usd, entered, shares=0):
+        wallet_id = self.wallet_ids.intern(wallet)
+        token_id = self.token_ids.intern(market_id)
+        outcome_id = self.outcome_ids.intern(outcome)
+        self._check_ids(wallet_id + 1, token_id + 1, outcome_id + 1)
+        self._ensure_wallet_capacity(wallet_id)
+
+        key = self._key(wallet_id, token_id, outcome_id)
+        row = self.row_index.get(key)
+
+        if row is None:
+            row = self._new_row()
+            self.row_index.set(key, row)
+            self.pos_wallet[row] = wallet_id
+            self.pos_token[row] = token_id
+            self.pos_outcome[row] = outcome_id
+            self.pos_volume[row] = 0.0
+            self.pos_entry[row] = entered
+            self.pos_shares[row] = 0.0
+            self.pos_alive[row] = True
+
+            self.pos_next[row] = self.wallet_head[wallet_id]
+            self.wallet_head[wallet_id] = row
+            self.wallet_positions_count[wallet_id] += 1
+
+        self.pos_volume[row] += volume_usd
+        self.pos_shares[row] += shares
+        # Running sum here; evictions re-sum exactly so it never drifts far
+        self.wallet_total[wallet_id] += volume_usd
+        self.wallet_changed[wallet_id] = True
+
+    def revert_trade(self, wallet, market_id, outcome, volume_usd, shares=0):
+        """Undo an add_trade whose block was reorged out"""
+        if self._revert(wallet, market_id, outcome, volume_usd, shares):
+            self.journal.append(('~', wallet, market_id, outcome, volume_usd, shares))
+
+    def _row(self, wallet, market_id, outcome):
+        """Row of a live position, or None"""
+        ids = (self.wallet_ids.lookup(wallet), self.token_ids.lookup(market_id),
+               self.outcome_ids.lookup(outcome))
+        return None if None in ids else self.row_index.get(self._key(*ids))
+
+    def _revert(self, wallet, market_id, outcome, volume_usd, shares=0):
+        """Take a trade back out of its position; an emptied position is freed"""
+        row = self._row(wallet, market_id, outcome)
+        if row is None:
+            return False
+
+        if self.pos_volume[row] - volume_usd <= REVERT_DUST_USD:
+            self._expire_rows([row])
+            return True
+
+        wallet_id = int(self.pos_wallet[row])
+        self.pos_volume[row] -= volume_usd
+        self.pos_shares[row] = max(self.pos_shares[row] - shares, 0.0)
+        self._recompute_total(wallet_id)
+        self.wallet_changed[wallet_id] = True
+        return True
+
+    def get_wallet_conviction(self, wallet, market_id, outcome):
+        """Calculate wallet's conviction on specific position"""
+        wallet_id = self.wallet_ids.lookup(wallet)
+        token_id = self.token_ids.lookup(market_id)
+        outcome_id = self.outcome_ids.lookup(outcome)
+        if wallet_id is None or token_id is None or outcome_id is None:
+            return 0
+
+        row = self.row_index.get(self._key(wallet_id, token_id, outcome_id))
+        total_volume = self.wallet_total[wallet_id]
+        if row is None or total_volume == 0:
+            return 0
+
+        return float(self.pos_volume[row] / total_volume)
+
+    def get_position(self, wallet, market_id, outcome):
+        """Position record for one wallet/market/outcome, or None if it has none"""
+        row = self._row(wallet, market_id, outcome)
+        if row is None:
+            return None
+        total_volume = self.wallet_total[self.pos_wallet[row]]
+        return self._position(row, self.pos_volume[row] / total_volume if total_volume > 0 else 0.0)
+
+    def num_wallets(self):
+        """Wallets with at least one live position"""
+        return int(np.count_nonzero(self.wallet_positions_count[:len(self.wallet_ids)]))
+
+    def _qualifying_mask(self, min_volume, min_conviction):
+        """Per-row mask of live positions clearing the thresholds, plus all convictions"""
+        n = self.num_rows
+        totals = self.wallet_total[self.pos_wallet[:n]]
+        alive = self.pos_alive[:n] & (totals >= min_volume) & (totals > 0)
+
+        conviction = np.zeros(n, dtype=np.float64)
+        np.divide(self.pos_volume[:n], totals, out=conviction, where=alive)
+
+        return alive & (conviction >= min_conviction), conviction
+
+    def _qualifying_rows(self, min_volume, min_conviction):
+        """Rows of every live position clearing the thresholds, plus their convictions"""
+        mask, conviction = self._qualifying_mask(min_volume, min_conviction)
+        rows = np.nonzero(mask)[0]
+        return rows, conviction[rows]
+
+    def _position(self, row, conviction):
+        wallet_id = int(self.pos_wallet[row])
+        return {
+            'wallet': self.wallet_ids.value(wallet_id),
+            'market_id': self.token_ids.value(self.pos_token[row]),
+            'outcome': self.outcome_ids.value(self.pos_outcome[row]),
+            'position_volume': float(self.pos_volume[row]),
+            'total_volume': float(self.wallet_total[wallet_id]),
+            'conviction': float(conviction),
+            'timestamp': datetime.fromtimestamp(self.pos_entry[row]),
+            'entry_price': self._entry_price(row)
+        }
+
+    def _entry_price(self, row):
+        shares = self.pos_shares[row]
+        return float(self.pos_volume[row] / shares) if shares > 0 else None
+
+    def get_entry_price(self, wallet, market_id, outcome):
+        """Volume-weighted entry price of a position, or None if no shares are known"""
+        row = self._row(wallet, market_id, outcome)
+        return None if row is None else self._entry_price(row)
+
+    def get_high_conviction_wallets(self, min_volume=1000, min_conviction=0.80, entered_after=None):
+        """Find wallets with high conviction (80%+ on single position), entered at/after entered_after"""
+        rows, convictions = self._qualifying_rows(min_volume, min_conviction)
+        if entered_after is not None:
+            recent = self.pos_entry[rows] >= entered_after.timestamp()
+            rows, convictions = rows[recent], convictions[recent]
+        return [self._position(row, c) for row, c in zip(rows, convictions)]
+
+    def detect_clusters(self, min_wallets=5, min_volume=1000, min_conviction=0.80,
+                        changed_only=False):
+        """
+        Find clusters of high-conviction wallets on same market
+
+        One vectorized pass: qualifying rows are grouped by (token, outcome)
+        in cluster_aggregation and only groups of min_wallets+ are materialized.
+        changed_only=True keeps just clusters that gained, lost or resized a
+        member since the last such call (same rule as WalletTracker).
+        """
+        mask, conviction = self._qualifying_mask(min_volume, min_conviction)
+        rows = np.nonzero(mask)[0]
+        convictions = conviction[rows]
+
+        changed_keys = None
+        if changed_only:
+            n = self.num_rows
+            # Positions of touched wallets that are members now or were last time
+            touched = self.wallet_changed[self.pos_wallet[:n]] & (mask | self.pos_qualified[:n])
+            changed_rows = np.nonzero(touched)[0]
+            changed_keys = np.concatenate((
+                (self.pos_token[changed_rows].astype(np.int64) << OUTCOME_BITS) | self.pos_outcome[changed_rows],
+                np.array(self.expired_member_keys, dtype=np.int64),
+            ))
+
+            self.pos_qualified[:n] = mask
+            self.wallet_changed[:] = False
+            self.expired_member_keys = []
+            if len(changed_keys) == 0:
+                return []
+
+        group_keys = (self.pos_token[rows].astype(np.int64) << OUTCOME_BITS) | self.pos_outcome[rows]
+        if changed_keys is not None:
+            keep = np.isin(group_keys, changed_keys)
+            rows, convictions, group_keys = rows[keep], convictions[keep], group_keys[keep]
+
+        aggregates = aggregate_clusters(group_keys, self.pos_volume[rows], convictions,
+                                        self.pos_entry[rows], self.pos_shares[rows], min_wallets)
+        return cluster_records(
+            aggregates,
+            lambda key: (self.token_ids.value(key >> OUTCOME_BITS),
+                         self.outcome_ids.value(key & ((1 << OUTCOME_BITS) - 1))),
+            lambda i: self.wallet_ids.value(int(self.pos_wallet[rows[i]])),
+        )
+
+    def cleanup_old_data(self, hours=72, now=None):
+        """Remove positions older than X hours before now (one vectorized scan of the entry column)"""
+        cutoff = ((now or datetime.now()) - timedelta(hours=hours)).timestamp()
+        n = self.num_rows
+        expired = np.nonzero(self.pos_alive[:n] & (self.pos_entry[:n] < cutoff))[0]
+        if len(expired) == 0:
+            return
+
+        for row in expired:
+            self.journal.append((
+                '-',
+                self.wallet_ids.value(int(self.pos_wallet[row])),
+                self.token_ids.value(self.pos_token[row]),
+                self.outcome_ids.value(self.pos_outcome[row]),
+            ))
+        self._expire_rows(expired)
+
+    def _expire_rows(self, rows):
+        """Free position rows, unlink them from their wallets and re-sum totals"""
+        touched = set()  # bounded by this call's rows, not all wallets
+        for row in rows:
+            row = int(row)
+            wallet_id = int(self.pos_wallet[row])
+            key = self._key(wallet_id, int(self.pos_token[row]), int(self.pos_outcome[row]))
+            self.row_index.delete(key)
+            if self.pos_qualified[row]:
+                self.expired_member_keys.append(
+                    (int(self.pos_token[row]) << OUTCOME_BITS) | int(self.pos_outcome[row]))
+            self.pos_alive[row] = False
+            self.pos_qualified[row] = False
+            self.pos_volume[row] = 0.0
+            self.wallet_positions_count[wallet_id] -= 1
+            self.free_rows.append(row)
+            touched.add(wallet_id)
+
+        # Unlink expired rows from each touched wallet's chain
+        for wallet_id in touched:
+            prev = -1
+            row = self.wallet_head[wallet_id]
+            while row != -1:
+                nxt = self.pos_next[row]
+                if not self.pos_alive[row]:
+                    if prev == -1:
+                        self.wallet_head[wallet_id] = nxt
+                    else:
+                        self.pos_next[prev] = nxt
+                    self.pos_next[row] = -1
+                else:
+                    prev = row
+                row = nxt
+            self._recompute_total(wallet_id)
+            self.wallet_changed[wallet_id] = True
+
+    def _store(self, prefix):
+        if self.state_store is None or (prefix is not None and prefix != self.state_store.prefix):
+            self.state_store = StateStore(prefix) if prefix is not None else StateStore()
+        return self.state_store
+
+    def save_state(self, prefix=None, checkpoint=None):
+        """
+        Persist this cycle's changes (journal record, or a periodic full snapshot)
+        together with the chain checkpoint they correspond to
+        """
+        store = self._store(prefix)
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        if store.should_snapshot():
+            live = np.nonzero(self.pos_alive[:self.num_rows])[0]
+            store.write_snapshot(
+                self.wallet_ids.all_values(), self.token_ids.all_values(),
+                self.outcome_ids.all_values(),
+                self.pos_wallet[live], self.pos_token[live], self.pos_outcome[live],
+                self.pos_volume[live], self.pos_entry[live], self.pos_shares[live],
+                checkpoint=self.checkpoint,
+            )
+        elif self.journal or checkpoint is not None:
+            store.append(self.journal, checkpoint)
+        self.journal = []
+
+    def load_state(self, prefix=None):
+        """Load tracker state: snapshot columns in bulk, then replay the journal"""
+        store = self._store(prefix)
+        snapshot = store.load_snapshot()
+        records = store.read_journal(snapshot['seq'] if snapshot else 0)
+        if snapshot is None and not records:
+            return False
+
+        capacity = max(len(snapshot['pos_wallet']) if snapshot else 0, 1024)
+        self.__init__(self.min_volume, self.min_conviction, capacity=capacity)
+        self.state_store = store
+
+        if snapshot is not None:
+            self.checkpoint = snapshot['checkpoint']
+            self._bulk_load(snapshot['wallets'], snapshot['tokens'], snapshot['outcomes'],
+                            snapshot['pos_wallet'], snapshot['pos_token'], snapshot['pos_outcome'],
+                            snapshot['pos_volume'], snapshot['pos_entry'], snapshot['pos_shares'])
+
+        for record in records:
+            for op in record['ops']:
+                if op[0] == '+':
+                    self._add(*op[1:])
+                elif op[0] == '~':
+                    self._revert(*op[1:])
+                else:
+                    row = self._row(*op[1:])
+                    if row is not None:
+                        self._expire_rows([row])
+            self.checkpoint = record.get('checkpoint', self.checkpoint)
+
+        self.wallet_changed[:len(self.wallet_ids)] = True
+        return True
+
+    def _bulk_load(self, wallets, tokens, outcomes, pos_wallet, pos_token, pos_outcome,
+                   pos_volume, pos_entry, pos_shares):
+        """Fill an empty tracker straight from column arrays"""
+        self._check_ids(len(wallets), len(tokens), len(outcomes))
+        self.wallet_ids = ColumnInterner(values=wallets)
+        self.token_ids = Interner(tokens)
+        self.outcome_ids = Interner(outcomes)
+
+        n = len(pos_wallet)
+        self.num_rows = n
+        self.pos_wallet = self._grow(self.pos_wallet, n)
+        self.pos_token = self._grow(self.pos_token, n)
+        self.pos_outcome = self._grow(self.pos_outcome, n)
+        self.pos_volume = self._grow(self.pos_volume, n)
+        self.pos_entry = self._grow(self.pos_entry, n)
+        self.pos_shares = self._grow(self.pos_shares, n)
+        self.pos_alive = self._grow(self.pos_alive, n)
+        self.pos_next = self._grow(self.pos_next, n, -1)
+        self.pos_qualified = self._grow(self.pos_qualified, n, False)
+
+        self.pos_wallet[:n] = pos_wallet
+        self.pos_token[:n] = pos_token
+        self.pos_outcome[:n] = pos_outcome
+        self.pos_volume[:n] = pos_volume
+        self.pos_entry[:n] = pos_entry
+        self.pos_shares[:n] = pos_shares
+        self.pos_alive[:n] = True
+
+        keys = ((pos_wallet.astype(np.int64) << (TOKEN_BITS + OUTCOME_BITS))
+                | (pos_token.astype(np.int64) << OUTCOME_BITS)
+                | pos_outcome.astype(np.int64))
+        self.row_index.load(keys, np.arange(n, dtype=np.int32))
+
+        # Per-wallet chains: link each row to the next row of the same wallet
+        num_wallets = max(len(wallets), 1)
+        self._ensure_wallet_capacity(num_wallets - 1)
+        order = np.argsort(pos_wallet, kind='stable')
+        sorted_wallets = pos_wallet[order]
+        same_wallet_next = np.append(sorted_wallets[1:] == sorted_wallets[:-1], False)
+        self.pos_next[order] = np.where(same_wallet_next, np.append(order[1:], -1), -1)
+
+        first_of_wallet = np.ones(n, dtype=np.bool_)
+        first_of_wallet[1:] = sorted_wallets[1:] != sorted_wallets[:-1]
+        self.wallet_head[sorted_wallets[first_of_wallet]] = order[first_of_wallet]
+
+        self.wallet_total[:num_wallets] = np.bincount(pos_wallet, weights=pos_volume, minlength=num_wallets)
+        self.wallet_positions_count[:num_wallets] = np.bincount(pos_wallet, minlength=num_wallets)
+
+        self.wallet_changed[:num_wallets] = True
@@ -10,25 +10,133 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
 
 # ========== BLOCKCHAIN CONFIG ==========
 POLYGON_RPC = f"https://polygon-mainnet.g.alchemy.com/v2/{ALCHEMY_API_KEY}"
+POLYGON_WS = f"wss://polygon-mainnet.g.alchemy.com/v2/{ALCHEMY_API_KEY}"  # Log subscriptions ('' = poll only)
 CTF_EXCHANGE = "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E"  # Polymarket CTF Exchange
 BLOCK_BATCH_SIZE = 1000  # Process blocks in batches
+# keccak("OrderFilled(bytes32,address,address,uint256,uint256,uint256,uint256,uint256)")
+ORDER_FILLED_TOPIC = "0xd0a08e8c493f9c94f29311604c9de1b4e8c8d4c06bd0c789af57f2d65bfec0f6"
+
+# ========== LOG FETCHING ==========
+MIN_BLOCK_BATCH_SIZE = 10  # Never split a get_logs range below this
+MAX_BLOCK_BATCH_SIZE = 10000  # Never grow a get_logs range above this
+TARGET_LOGS_PER_REQUEST = 5000  # Grow the range while responses stay under half of this
+RANGE_CEILING_RESET_REQUESTS = 50  # Successful requests before retrying a range size that failed
+RPC_MAX_RETRIES = 3  # Retries for non-range get_logs errors before giving up
+RPC_RETRY_DELAY_SECONDS = 2  # Linear backoff between retries
+RPC_MAX_REQUESTS_PER_SECOND = 20  # Provider rate limit shared by all fetch workers (0 = no limit)
+
+# ========== BACKLOG CATCH-UP ==========
+CATCHUP_WINDOW_BLOCKS = 2000  # Blocks per concurrently fetched window
+CATCHUP_WORKERS = 8  # Max get_logs windows in flight at once
+
+# ========== REORG SAFETY ==========
+CONFIRMATION_BLOCKS = 5  # Only process blocks this far behind the head
+REORG_WINDOW_BLOCKS = 128  # Recent block hashes (and their trades) kept for rollback
+
+# ========== FILL DEDUPE ==========
+# Ingested (tx_hash, log_index) keys are remembered for LOOKBACK_HOURS
+DEDUPE_BUCKET_SECONDS = 3600  # Keys expire a bucket at a time
+DEDUPE_STATE_DIR = 'seen_fills'  # One <bucket>.npy of keys each, saved after every checkpoint
+
+# ========== FILL ARCHIVE ==========
+# Decoded fills kept on disk by day for backtests (see fill_archive.py)
+FILL_ARCHIVE_DIR = os.getenv('FILL_ARCHIVE_DIR', '')  # '' = don't archive
+FILL_ARCHIVE_COMPACT_SEGMENTS = 64  # Merge a day's segments (one per persist) once it has this many
+
+# ========== STREAMING ==========
+# 'stream' = follow new blocks as they land (websocket, polling fallback)
+# 'batch' = queue whatever is new every SCAN_INTERVAL_SECONDS
+SCAN_MODE = 'stream'
+STREAM_POLL_SECONDS = 2  # eth_getLogs polling interval without a websocket (~ Polygon block time)
+STREAM_IDLE_TIMEOUT_SECONDS = 30  # Reconnect if the subscription goes quiet this long
+STREAM_RECONNECT_DELAY_SECONDS = 2  # Linear backoff between reconnect attempts
+STREAM_MAX_WS_FAILURES = 5  # Consecutive websocket failures before falling back to polling
+STREAM_WS_RETRY_SECONDS = 300  # Poll this long before trying the websocket again
+
+# ========== PIPELINE ==========
+PIPELINE_QUEUE_SIZE = 4  # Items buffered between stages (backpressure beyond this)
+ENRICH_WORKERS = 2  # Concurrent enrichment batches (gamma lookups)
+PERSIST_INTERVAL_SECONDS = 60  # Checkpoint + tracker state saved together this often
+
+# ========== TELEGRAM DELIVERY ==========
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_MESSAGES_PER_MINUTE = 20  # Telegram's per-group limit (private chats allow ~1/s)
+TELEGRAM_BURST = 3  # Messages allowed back to back before the rate limit kicks in
+TELEGRAM_POOL_SIZE = 4  # Kept-alive connections to the Bot API
+TELEGRAM_TIMEOUT_SECONDS = 10  # Per sendMessage request
+TELEGRAM_RETRY_BASE_SECONDS = 1  # Backoff after a failed send, doubling per attempt...
+TELEGRAM_RETRY_MAX_SECONDS = 60  # ...up to this (429s wait exactly retry_after instead)
+TELEGRAM_OUTBOX_FILE = 'telegram_outbox.jsonl'  # Undelivered messages survive restarts here
+TELEGRAM_OUTBOX_COMPACT_BYTES = 1_000_000  # Rewrite the outbox once it grows past this
+TELEGRAM_COALESCE = True  # Merge waiting alerts into one message during bursts
+TELEGRAM_COALESCE_MAX = 5  # Alerts per merged message
+TELEGRAM_SHUTDOWN_FLUSH_SECONDS = 10  # Time given to deliver the outbox on shutdown
+
+# ========== ALERT DEDUPE ==========
+ALERT_STORE_FILE = 'signal_alerts.jsonl'  # When each signal was last alerted
+ALERT_TTL_HOURS = 48  # A signal may alert again after this
+# ...or sooner when one of these metrics reaches its next tier
+ALERT_TIERS = {
+    'num_wallets': [5, 10, 20, 50, 100],
+    'total_volume': [10_000, 50_000, 250_000, 1_000_000],
+    'position_volume': [10_000, 50_000, 250_000],
+}
+ALERT_STORE_COMPACT_MIN = 1000  # Rewrite the file once stale records outnumber live ones (and this)
+
+# ========== POLYMARKET API ==========
+GAMMA_API = "https://gamma-api.polymarket.com"
+CLOB_API = "https://clob.polymarket.com"
+CATALOGUE_PAGE_SIZE = 500  # Markets per page when walking gamma /markets
+CATALOGUE_POOL_SIZE = 10  # Keep-alive connections in the shared session
+CATALOGUE_TIMEOUT_SECONDS = 10
+CATALOGUE_SYNC_INTERVAL_SECONDS = 900  # Incremental catalogue refresh into the market cache
+MARKET_LOOKUP_BATCH_SIZE = 20  # Token ids per targeted gamma lookup
+
+# ========== MARKET METADATA CACHE ==========
+MARKET_CACHE_FILE = 'market_cache.db'  # SQLite snapshot so restarts are warm
+MARKET_CACHE_MAX_ENTRIES = 50000  # LRU cap per table (tokens, markets)
+MARKET_CACHE_TTL_SECONDS = 24 * 3600  # Market metadata rarely changes
+MARKET_CACHE_MISS_TTL_SECONDS = 600  # Retry unknown tokens after 10 minutes
+
+# ========== WALLET STORE ==========
+# 'dict' = WalletTracker (nested dicts), 'columnar' = ColumnarWalletTracker
+# (NumPy columns, ~5x less memory per position at 1M positions)
+WALLET_STORE = 'dict'
+STATE_FILE_PREFIX = 'wallet_tracker_state'  # .snapshot.npz + .journal
+STATE_SNAPSHOT_INTERVAL_SECONDS = 3600  # Full snapshot hourly, journal in between
+# State is saved once per persist, so the snapshot cadence counts persists
+STATE_SNAPSHOT_EVERY_CYCLES = max(1, STATE_SNAPSHOT_INTERVAL_SECONDS // PERSIST_INTERVAL_SECONDS)
+STATE_JOURNAL_MAX_BYTES = 32 * 1024 * 1024  # ...or sooner if the journal grows
 
 # ========== SIGNAL DETECTION THRESHOLDS ==========
 MIN_WALLET_VOLUME = 2000  # $2K minimum per wallet
 MIN_CONVICTION = 0.85  # 85% of wallet capital on single position
 MIN_WALLETS_CLUSTER = 5  # 5+ wallets = signal (historically proven)
 MAX_PRICE = 0.60  # Only bets ≤$0.60 (underdogs)
-LOOKBACK_HOURS = 48  # Track positions from last 48 hours
+LOOKBACK_HOURS = 48  # Track positions (and dedupe fills) from last 48 hours
+
+# ========== SIGNAL PATTERNS ==========
+# Run every cycle, in this order. Also available (not backtested):
+# 'whale_entry', 'synchronized_entry'
+SIGNAL_PATTERNS = ['high_conviction_cluster']
+PATTERN_WORKERS = 1  # >1 runs patterns in a thread pool (worth it for heavy custom patterns)
+# Whale entry: one $10K+ wallet, 80%+ on a position entered within the hour.
+# The dict wallet store keeps a second conviction index at these thresholds
+WHALE_MIN_VOLUME = 10000
+WHALE_MIN_CONVICTION = 0.80
+WHALE_ENTRY_WINDOW_SECONDS = 3600
 
 # ========== SCANNER SETTINGS ==========
-SCAN_INTERVAL_SECONDS = 300  # Scan every 5 minutes
+SCAN_INTERVAL_SECONDS = 15  # Poll for new blocks every 15 seconds (batch mode)
 
 # ========== CATEGORY FILTERS ==========
+# Whole-word matches, see market_categorizer.py
 # Politics keywords (90% WR, 207% ROI)
 POLITICS_KEYWORDS = [
     'trump', 'biden', 'president', 'congress', 'shutdown', 'government',
     'election', 'senate', 'speaker', 'vote', 'impeach', 'democrat',
-    'republican', 'political', 'cabinet', 'senate', 'bill', 'veto'
+    'republican', 'political', 'cabinet', 'senate', 'bill', 'veto',
+    'white house'
 ]
 
 # Financial keywords (100% WR, 3,471% ROI)
@@ -40,7 +148,7 @@ FINANCIAL_KEYWORDS = [
 
 # Exclude keywords (low performance categories)
 EXCLUDE_KEYWORDS = [
-    'bitcoin', 'btc', 'crypto', 'ethereum', 'eth', 'gold', 'silver',
-    'game', 'nfl', 'nba', 'sports', 'super bowl', 'championship',
+    'bitcoin', 'btc', 'crypto', 'cryptocurrency', 'ethereum', 'eth', 'gold', 'silver',
+    'game', 'gta', 'nfl', 'nba', 'sports', 'super bowl', 'championship',
     'movie', 'oscar', 'grammy', 'award', 'actor', 'actress'
 ]
@@ -0,0 +1,94 @@
+"""
+Detection Cycle
+One batch of fills through the tracker and the signal patterns: apply the
+buys, find the clusters they moved, price and label them, run detection.
+Shared by the live scanner and the historical replay.
+"""
+import config
+
+
+def cycle_price(cycle_buys, wallets, market_id):
+    """
+    Entry price from this cycle's buys, for positions the tracker has no
+    share count for (restored from state saved before shares were kept)
+    """
+    usdc = shares = 0.0
+    for wallet in wallets:
+        totals = cycle_buys.get((wallet, market_id))
+        if totals:
+            usdc += totals[0]
+            shares += totals[1]
+    return usdc / shares if shares else 0.5  # Default if no price data
+
+
+def run_cycle(wallet_tracker, signal_detector, trades, markets, now=None, applied=None):
+    """
+    Apply one batch of (already deduped, enriched) fills and detect signals
+
+    markets: anything with .get(market_id) -> {'question', 'category'} or None
+    now: detection time as a datetime (default the wall clock)
+
+    Returns (applied, clusters, signals); applied lists the buys as
+    [wallet, market_id, outcome, usdc, shares] so a reorg can revert them.
+    Pass applied=[] to have it filled as the buys go in, so a caller can
+    revert them if the cycle raises part way.
+    """
+    if applied is None:
+        applied = []
+
+    # Update wallet tracker (buys are what commit capital to an outcome)
+    # and index this batch's buys by (wallet, market_id) -> [usdc, shares]
+    cycle_buys = {}
+    for trade in trades:
+        if trade.side != 'buy':
+            continue
+        wallet_tracker.add_trade(
+            wallet=trade.wallet,
+            market_id=trade.token_id,
+            outcome=trade.outcome,
+            volume_usd=trade.usdc,
+            timestamp=trade.timestamp,
+            shares=trade.shares
+        )
+        applied.append([trade.wallet, trade.token_id, trade.outcome, trade.usdc, trade.shares])
+        totals = cycle_buys.setdefault((trade.wallet, trade.token_id), [0.0, 0.0])
+        totals[0] += trade.usdc
+        totals[1] += trade.shares
+
+    # Detect clusters (only ones whose membership changed)
+    clusters = wallet_tracker.detect_clusters(
+        min_wallets=config.MIN_WALLETS_CLUSTER,
+        min_volume=config.MIN_WALLET_VOLUME,
+        min_conviction=config.MIN_CONVICTION,
+        changed_only=True
+    )
+
+    # Enrich clusters with market metadata
+    for cluster in clusters:
+        market_id = cluster['market_id']
+        metadata = markets.get(market_id)
+        if metadata:
+            cluster['question'] = metadata.get('question', 'Unknown')
+            cluster['category'] = metadata.get('category', 'Unknown')
+
+        # Volume-weighted entry price of the members, kept by the tracker
+        cluster['price'] = cluster['entry_price'] or cycle_price(
+            cycle_buys, cluster.wallets(), market_id)
+
+    # Run signal detection patterns
+    signals = signal_detector.detect_all(clusters, trades, wallet_tracker,
+                                         now.timestamp() if now is not None else None)
+
+    # Enrich whale signals with market metadata
+    for signal in signals:
+        if signal['type'] == 'whale':
+            market_id = signal['position']['market_id']
+            metadata = markets.get(market_id)
+            if metadata:
+                signal['position']['question'] = metadata.get('question', 'Unknown')
+                signal['position']['category'] = metadata.get('category', 'Unknown')
+
+            signal['position']['price'] = signal['position']['entry_price'] or cycle_price(
+                cycle_buys, [signal['position']['wallet']], market_id)
+
+    return applied, clusters, signals
@@ -0,0 +1,340 @@
+"""
+Fill Archive
+Decoded fills kept on disk as day-partitioned NumPy column segments, so
+backtests and investigations read only the days, and within them only the
+segments, that can hold what they ask for - straight from memory-mapped
+files rather than refetching logs from RPC.
+
+Layout (root = config.FILL_ARCHIVE_DIR):
+  <root>/<YYYY-MM-DD, UTC>/<seq>/
+    meta.json          rows, time/block bounds, outcome vocabulary, per-token
+                       question/category, segments this one replaces
+    wallets.npy        wallet vocabulary (bytes), tokens.npy token vocabulary
+    timestamp.npy ...  one .npy per column, row i of each is fill i
+
+Segments are written to a dot-directory and renamed into place, so readers
+never see half a segment. Compaction and reorg rollbacks write a new segment
+listing the ones it replaces before deleting them; a replaced segment that
+survives a crash is skipped.
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import numpy as np
+import config
+from log_decoder import Fill
+from state_store import encode_vocab, decode_vocab
+
+COLUMNS = {
+    'timestamp': np.float64,
+    'block_number': np.int64,
+    'log_index': np.int32,
+    'buy': np.bool_,
+    'shares': np.float64,
+    'usdc': np.float64,
+    'wallet': np.int32,  # Code into wallets.npy
+    'token': np.int32,  # Code into tokens.npy
+    'outcome': np.int16,  # Code into meta['outcomes']
+    'tx_hash': np.uint8,  # 32 raw bytes per row
+}
+
+
+def day_of(epoch):
+    """UTC day partition name of an epoch time"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d')
+
+
+def as_epoch(value):
+    """datetime or epoch seconds -> epoch seconds (None passes through)"""
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class Segment:
+    """One written segment, columns memory-mapped on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.arrays = {}
+
+    def __getitem__(self, name):
+        array = self.arrays.get(name)
+        if array is None:
+            array = self.arrays[name] = np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        return array
+
+    def code(self, vocab, value):
+        """Code of value in a vocabulary column, or None if this segment never saw it"""
+        hits = np.nonzero(self[vocab] == value.encode())[0]
+        return int(hits[0]) if len(hits) else None
+
+
+class FillArchive:
+    def __init__(self, root=config.FILL_ARCHIVE_DIR,
+                 compact_segments=config.FILL_ARCHIVE_COMPACT_SEGMENTS):
+        self.root = root
+        self.compact_segments = compact_segments
+        self.pending = []  # Fills appended since the last flush
+
+    # ========== WRITING ==========
+
+    def append(self, fills):
+        """Queue enriched fills; nothing is written until flush()"""
+        self.pending.extend(fills)
+
+    def flush(self):
+        """Write pending fills as one new segment per day they fall on"""
+        if not self.pending:
+            return
+        by_day = {}
+        for fill in self.pending:
+            by_day.setdefault(day_of(fill.timestamp.timestamp()), []).append(fill)
+        self.pending = []
+
+        for day, fills in by_day.items():
+            self._write(day, self._encode(fills))
+            # A day's segments are merged once there are enough of them
+            if len(self._segment_names(day)) >= self.compact_segments:
+                self.compact(day)
+
+    def rollback(self, block_number):
+        """
+        Drop every fill above block_number (a reorg replaced those blocks)
+
+        Pending fills are filtered; written segments holding later blocks
+        are rewritten without them, newest days first.
+        """
+        self.pending = [fill for fill in self.pending if fill.block_number <= block_number]
+        for day in reversed(self.days()):
+            segments = self._segments(day)
+            stale = [s for s in segments if s.meta['last_block'] > block_number]
+            if not stale:
+                break
+            keep = [self._decode_rows(s, np.nonzero(s['block_number'][:] <= block_number)[0])
+                    for s in stale]
+            columns = self._concat([c for c in keep if len(c['timestamp'])])
+            self._write(day, columns, replaces=[os.path.basename(s.path) for s in stale])
+
+    def compact(self, day):
+        """Merge all of a day's segments into one"""
+        segments = self._segments(day)
+        if len(segments) < 2:
+            return
+        columns = self._concat([self._decode_rows(s, slice(None)) for s in segments])
+        self._write(day, columns, replaces=[os.path.basename(s.path) for s in segments])
+
+    def _encode(self, fills):
+        """Fills -> plain columns (values, not codes), the same shape _decode_rows gives"""
+        n = len(fills)
+        return {
+            'timestamp': np.fromiter((f.timestamp.timestamp() for f in fills), dtype=np.float64, count=n),
+            'block_number': np.fromiter((f.block_number for f in fills), dtype=np.int64, count=n),
+            'log_index': np.fromiter((f.log_index for f in fills), dtype=np.int32, count=n),
+            'buy': np.fromiter((f.side == 'buy' for f in fills), dtype=np.bool_, count=n),
+            'shares': np.fromiter((f.shares for f in fills), dtype=np.float64, count=n),
+            'usdc': np.fromiter((f.usdc for f in fills), dtype=np.float64, count=n),
+            'wallet': [f.wallet for f in fills],
+            'token_id': [f.token_id for f in fills],
+            'outcome': [f.outcome for f in fills],
+            'question': [f.question for f in fills],
+            'category': [f.category for f in fills],
+            'tx_hash': [f.tx_hash for f in fills],
+        }
+
+    def _write(self, day, columns, replaces=()):
+        """Write plain columns as a new segment of day (atomic), then delete what it replaces"""
+        day_dir = os.path.join(self.root, day)
+        os.makedirs(day_dir, exist_ok=True)
+        names = self._segment_names(day)
+        name = f"{int(names[-1]) + 1 if names else 0:06d}"
+
+        n = len(columns['timestamp'])
+        if n:
+            wallets, wallet_codes = self._dictionary(columns['wallet'])
+            tokens, token_codes = self._dictionary(columns['token_id'])
+            outcomes, outcome_codes = self._dictionary(columns['outcome'])
+            # Question/category are per market: keep the first seen per token
+            questions, categories = [None] * len(tokens), [None] * len(tokens)
+            for code, question, category in zip(token_codes.tolist(), columns['question'], columns['category']):
+                if questions[code] is None:
+                    questions[code], categories[code] = question, category
+            tx_hash = np.frombuffer(b''.join(_tx_bytes(h) for h in columns['tx_hash']),
+                                    dtype=np.uint8).reshape(n, 32)
+        else:
+            wallets = tokens = outcomes = questions = categories = []
+            wallet_codes = token_codes = outcome_codes = np.zeros(0, dtype=np.int32)
+            tx_hash = np.zeros((0, 32), dtype=np.uint8)
+
+        arrays = {
+            'timestamp': columns['timestamp'], 'block_number': columns['block_number'],
+            'log_index': columns['log_index'], 'buy': columns['buy'], 'shares': columns['shares'],
+            'usdc': columns['usdc'], 'wallet': wallet_codes, 'token': token_codes,
+            'outcome': outcome_codes, 'tx_hash': tx_hash,
+        }
+        meta = {
+            'rows': n,
+            'first_time': float(columns['timestamp'].min()) if n else None,
+            'last_time': float(columns['timestamp'].max()) if n else None,
+            'first_block': int(columns['block_number'].min()) if n else None,
+            'last_block': int(columns['block_number'].max()) if n else -1,
+            'outcomes': outcomes,
+            'questions': questions,
+            'categories': categories,
+            'replaces': list(replaces),
+        }
+
+        tmp = os.path.join(day_dir, f'.{name}.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for column, dtype in COLUMNS.items():
+            np.save(os.path.join(tmp, f'{column}.npy'), np.asarray(arrays[column], dtype=dtype))
+        np.save(os.path.join(tmp, 'wallets.npy'), encode_vocab(wallets))
+        np.save(os.path.join(tmp, 'tokens.npy'), encode_vocab(tokens))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, os.path.join(day_dir, name))
+
+        for old in replaces:
+            # Renamed out of sight first: readers never see a half-deleted segment
+            doomed = os.path.join(day_dir, f'.{old}.old')
+            os.rename(os.path.join(day_dir, old), doomed)
+            shutil.rmtree(doomed, ignore_errors=True)
+
+    @staticmethod
+    def _dictionary(values):
+        """(vocabulary, int32 codes) for a list of strings"""
+        index = {}
+        codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values))
+        return list(index), codes
+
+    def _concat(self, parts):
+        if not parts:
+            return self._encode([])
+        return {name: (np.concatenate([p[name] for p in parts]) if isinstance(parts[0][name], np.ndarray)
+                       else [v for p in parts for v in p[name]])
+                for name in parts[0]}
+
+    # ========== READING ==========
+
+    def days(self):
+        """Day partitions present, oldest first"""
+        try:
+            return sorted(d for d in os.listdir(self.root) if not d.startswith('.'))
+        except FileNotFoundError:
+            return []
+
+    def _segment_names(self, day):
+        try:
+            return sorted(s for s in os.listdir(os.path.join(self.root, day)) if s.isdigit())
+        except FileNotFoundError:
+            return []
+
+    def _segments(self, day):
+        """A day's live segments (ones not replaced by a later segment)"""
+        segments = [Segment(os.path.join(self.root, day, name)) for name in self._segment_names(day)]
+        replaced = {old for s in segments for old in s.meta['replaces']}
+        return [s for s in segments if os.path.basename(s.path) not in replaced and s.meta['rows']]
+
+    def _decode_rows(self, segment, rows):
+        """Selected rows of a segment as plain columns"""
+        meta = segment.meta
+        token_codes = segment['token'][rows].tolist()
+        return {
+            'timestamp': np.array(segment['timestamp'][rows]),
+            'block_number': np.array(segment['block_number'][rows]),
+            'log_index': np.array(segment['log_index'][rows]),
+            'buy': np.array(segment['buy'][rows]),
+            'shares': np.array(segment['shares'][rows]),
+            'usdc': np.array(segment['usdc'][rows]),
+            'wallet': _lookup(segment['wallets'], segment['wallet'][rows]),
+            'token_id': _lookup(segment['tokens'], segment['token'][rows]),
+            'outcome': [meta['outcomes'][c] for c in segment['outcome'][rows].tolist()],
+            'question': [meta['questions'][c] for c in token_codes],
+            'category': [meta['categories'][c] for c in token_codes],
+            'tx_hash': [_tx_hex(raw) for raw in np.ascontiguousarray(segment['tx_hash'][rows]).view('V32').ravel()],
+        }
+
+    def query(self, start=None, end=None, token_id=None, wallet=None):
+        """
+        Fills in [start, end) (datetimes or epoch seconds), optionally for
+        one token and/or wallet, as plain columns in (block, log_index) order
+
+        Days outside the range are never opened; segments whose time bounds
+        miss it, or whose vocabulary lacks the token/wallet, are skipped
+        without reading a column.
+        """
+        start, end = as_epoch(start), as_epoch(end)
+        first_day = day_of(start) if start is not None else None
+        last_day = day_of(end) if end is not None else None
+
+        parts = []
+        for day in self.days():
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            for segment in self._segments(day):
+                rows = self._rows(segment, start, end, token_id, wallet)
+                if rows is not None:
+                    parts.append(self._decode_rows(segment, rows))
+
+        columns = self._concat([p for p in parts if len(p['timestamp'])])
+        order = np.lexsort((columns['log_index'], columns['block_number']))
+        return {name: values[order] if isinstance(values, np.ndarray) else [values[i] for i in order.tolist()]
+                for name, values in columns.items()}
+
+    def _rows(self, segment, start, end, token_id, wallet):
+        """Rows of a segment matching a query, or None if it can't hold any"""
+        meta = segment.meta
+        if (start is not None and meta['last_time'] < start) or (end is not None and meta['first_time'] >= end):
+            return None
+
+        mask = None
+        for vocab, column, value in (('tokens', 'token', token_id), ('wallets', 'wallet', wallet)):
+            if value is not None:
+                code = segment.code(vocab, value)
+                if code is None:
+                    return None
+                mask = _and(mask, segment[column] == code)
+        if start is not None and meta['first_time'] < start:
+            mask = _and(mask, segment['timestamp'] >= start)
+        if end is not None and meta['last_time'] >= end:
+            mask = _and(mask, segment['timestamp'] < end)
+        return np.nonzero(mask)[0] if mask is not None else slice(None)
+
+    def fills(self, start=None, end=None, token_id=None, wallet=None):
+        """query() as Fills, in block order (e.g. for replay.Replay.run)"""
+        c = self.query(start, end, token_id, wallet)
+        fromtimestamp = datetime.fromtimestamp
+        for i, (timestamp, block_number, log_index, buy, shares, usdc) in enumerate(zip(
+                c['timestamp'].tolist(), c['block_number'].tolist(), c['log_index'].tolist(),
+                c['buy'].tolist(), c['shares'].tolist(), c['usdc'].tolist())):
+            fill = Fill(c['wallet'][i], c['token_id'][i], 'buy' if buy else 'sell', shares, usdc,
+                        fromtimestamp(timestamp), block_number, log_index, c['tx_hash'][i])
+            fill.outcome, fill.question, fill.category = c['outcome'][i], c['question'][i], c['category'][i]
+            yield fill
+
+
+def _lookup(vocab, codes):
+    """Decode only the vocabulary entries the selected codes use"""
+    used, inverse = np.unique(codes, return_inverse=True)
+    values = decode_vocab(vocab[used])
+    return [values[i] for i in inverse.tolist()]
+
+
+def _and(mask, condition):
+    return condition if mask is None else mask & condition
+
+
+def _tx_hex(raw):
+    """Back from 32 raw bytes ('0x0' for the unknown hash)"""
+    raw = bytes(raw)
+    return '0x' + raw.hex() if any(raw) else '0x0'
+
+
+def _tx_bytes(tx_hash):
+    """32 raw bytes of a '0x...' hash (unknown '0x0' hashes become zeros)"""
+    raw = bytes.fromhex(tx_hash[2:]) if len(tx_hash) == 66 else b''
+    return raw.rjust(32, b'\0')
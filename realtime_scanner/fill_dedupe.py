@@ -0,0 +1,175 @@
+"""
+Fill Deduplication
+Remembers recently ingested (tx_hash, log_index) keys so a retried batch,
+an overlapping range or a replay never counts the same fill twice
+
+Keys are 64-bit fingerprints held in hourly buckets: the current bucket is
+a set, older ones are sealed into sorted uint64 arrays (8 bytes per fill)
+and dropped whole once they fall out of the lookback window.
+
+With a directory, save() keeps one <bucket>.npy per bucket there (only
+buckets that changed are rewritten) and load() restores the whole window
+after a restart, not just the fills of the checkpoint's recent blocks.
+"""
+from collections import deque
+import os
+import time
+import numpy as np
+import config
+
+MASK64 = (1 << 64) - 1
+LOG_INDEX_MIX = 0x9E3779B97F4A7C15  # Spreads log indexes over all 64 bits
+
+
+def fill_key(tx_hash, log_index):
+    """
+    64-bit fingerprint of a fill
+
+    tx_hash is already a keccak hash, so its first 8 bytes are uniformly
+    distributed; two different fills collide with probability ~2^-64 per pair.
+    """
+    return (int(tx_hash[2:18], 16) ^ (log_index * LOG_INDEX_MIX)) & MASK64
+
+
+class SeenFills:
+    def __init__(self, window_seconds=config.LOOKBACK_HOURS * 3600,
+                 bucket_seconds=config.DEDUPE_BUCKET_SECONDS, directory=None):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.directory = directory  # None = in memory only
+
+        self.current = set()
+        self.current_bucket = None
+        self.sealed = deque()  # (bucket number, sorted uint64 keys), oldest first
+        self.dirty = set()  # Buckets changed since the last save()
+
+    def __len__(self):
+        return len(self.current) + sum(len(keys) for _, keys in self.sealed)
+
+    def _rotate(self, now):
+        bucket = int(now // self.bucket_seconds)
+        if bucket == self.current_bucket:
+            return
+
+        if self.current:
+            self.sealed.append((self.current_bucket, self._current_keys()))
+        self.current = set()
+        self.current_bucket = bucket
+
+        # Same horizon as the positions the fills went into
+        oldest = self._oldest_bucket(now)
+        while self.sealed and self.sealed[0][0] < oldest:
+            self.sealed.popleft()
+
+    def _current_keys(self):
+        return np.sort(np.fromiter(self.current, dtype=np.uint64, count=len(self.current)))
+
+    def _oldest_bucket(self, now):
+        return int((now - self.window_seconds) // self.bucket_seconds)
+
+    def filter_new(self, fills, now=None):
+        """
+        Fills not seen before (first copy only within the batch), marked as seen
+
+        Returns (new_fills, their keys). Fills without a tx hash (the
+        decoder's '0x0') can't be identified and always pass, keyed None.
+        """
+        self._rotate(time.time() if now is None else now)
+
+        unknown = [fill for fill in fills if fill.tx_hash == '0x0']
+        if unknown:
+            fills = [fill for fill in fills if fill.tx_hash != '0x0']
+        if not fills:
+            return unknown, [None] * len(unknown)
+
+        keys = [fill_key(fill.tx_hash, fill.log_index) for fill in fills]
+        column = np.array(keys, dtype=np.uint64)
+        seen = np.fromiter((key in self.current for key in keys), dtype=np.bool_, count=len(keys))
+        for _, sealed in self.sealed:
+            if len(sealed):
+                pos = np.minimum(np.searchsorted(sealed, column), len(sealed) - 1)
+                seen |= sealed[pos] == column
+
+        # Duplicates inside the batch itself: keep the first occurrence
+        _, first = np.unique(column, return_index=True)
+        fresh = np.zeros(len(keys), dtype=np.bool_)
+        fresh[first] = True
+        fresh &= ~seen
+
+        new_fills, new_keys = [], []
+        for i in np.nonzero(fresh)[0].tolist():
+            new_fills.append(fills[i])
+            new_keys.append(keys[i])
+        self.current.update(new_keys)
+        if new_keys:
+            self.dirty.add(self.current_bucket)
+        return new_fills + unknown, new_keys + [None] * len(unknown)
+
+    def add(self, keys, now=None):
+        """Mark keys as seen without filtering (restoring them from a checkpoint)"""
+        self._rotate(time.time() if now is None else now)
+        self.current.update(key for key in keys if key is not None)
+        self.dirty.add(self.current_bucket)
+
+    def forget(self, keys):
+        """Un-see fills (their block was reorged out, so they may legitimately come back)"""
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return
+        self.current.difference_update(keys)
+        self.dirty.add(self.current_bucket)
+        column = np.array(keys, dtype=np.uint64)
+        sealed = deque()
+        for bucket, keys_in_bucket in self.sealed:
+            kept = keys_in_bucket[~np.isin(keys_in_bucket, column)]
+            if len(kept) < len(keys_in_bucket):
+                self.dirty.add(bucket)
+            sealed.append((bucket, kept))
+        self.sealed = sealed
+
+    # ========== PERSISTENCE ==========
+
+    def _path(self, bucket):
+        return os.path.join(self.directory, f"{bucket}.npy")
+
+    def save(self):
+        """Write the buckets changed since the last save (atomic per bucket), delete expired ones"""
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        buckets = dict(self.sealed)
+        if self.current_bucket is not None:
+            buckets[self.current_bucket] = self._current_keys()
+
+        for bucket in sorted(self.dirty & set(buckets)):
+            tmp = self._path(bucket) + '.tmp.npy'
+            np.save(tmp, buckets[bucket])
+            os.replace(tmp, self._path(bucket))
+        self.dirty = set()
+
+        for name in os.listdir(self.directory):
+            stem = name[:-len('.npy')]
+            if name.endswith('.npy') and stem.isdigit() and int(stem) not in buckets:
+                os.remove(os.path.join(self.directory, name))
+
+    def load(self, now=None):
+        """Restore the buckets still inside the window; returns how many keys were loaded"""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return 0
+        now = time.time() if now is None else now
+        self._rotate(now)
+        oldest = self._oldest_bucket(now)
+
+        stems = [name[:-len('.npy')] for name in os.listdir(self.directory) if name.endswith('.npy')]
+        self.sealed = deque()
+        for bucket in sorted(int(stem) for stem in stems if stem.isdigit()):
+            if bucket < oldest:
+                continue
+            keys = np.load(self._path(bucket))
+            if bucket >= self.current_bucket:
+                # Saved in the hour we restarted in (or by a clock ahead of ours)
+                self.current.update(keys.tolist())
+                self.dirty.add(self.current_bucket)
+            else:
+                self.sealed.append((bucket, keys))
+        return len(self)
@@ -0,0 +1,233 @@
+"""
+OrderFilled Log Decoder
+Decodes CTF Exchange OrderFilled logs straight from the raw log bytes
+"""
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+
+# One decoded OrderFilled event (tuple-based, no per-log dicts)
+OrderFilled = namedtuple('OrderFilled', [
+    'block_number',
+    'log_index',
+    'tx_hash',
+    'maker',
+    'taker',
+    'maker_asset_id',
+    'taker_asset_id',
+    'maker_amount',
+    'taker_amount',
+    'fee',
+])
+
+# data = [makerAssetId, takerAssetId, makerAmountFilled, takerAmountFilled, fee]
+# Some logs come back 158 bytes long, so accept anything with the four
+# amount words plus most of the fee word (same tolerance as the old parser)
+MIN_DATA_BYTES = 150
+
+
+def _hex(value):
+    """Plain hex of any bytes-like value (skips HexBytes' Python-level hex())"""
+    return memoryview(value).hex()
+
+
+def _as_bytes(value):
+    """bytes/HexBytes pass through untouched, hex strings get converted once"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+    return None
+
+
+def _as_int(value):
+    """web3 gives ints, raw JSON-RPC (websocket notifications) gives hex strings"""
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+
+def decode_order_filled(log):
+    """
+    Decode one OrderFilled log into an OrderFilled record
+
+    Event structure:
+    - topics[0] = event signature
+    - topics[1] = orderHash (indexed)
+    - topics[2] = maker address (indexed, 32 bytes padded)
+    - topics[3] = taker address (indexed, 32 bytes padded)
+    - data = 5 x uint256 words
+
+    Returns None for logs that aren't OrderFilled-shaped.
+    """
+    topics = log.get('topics', [])
+    if len(topics) < 4:
+        return None
+
+    data = _as_bytes(log.get('data', b''))
+    if data is None or len(data) < MIN_DATA_BYTES:
+        return None
+
+    maker_topic = _as_bytes(topics[2])
+    taker_topic = _as_bytes(topics[3])
+    if maker_topic is None or taker_topic is None:
+        return None
+
+    # memoryview slices don't copy (HexBytes slices build new HexBytes objects)
+    view = memoryview(data)
+    from_bytes = int.from_bytes
+
+    tx_hash = _as_bytes(log.get('transactionHash', b''))
+
+    return OrderFilled(
+        _as_int(log.get('blockNumber', 0)),
+        _as_int(log.get('logIndex', 0)),
+        '0x' + _hex(tx_hash) if tx_hash else '0x0',
+        # Addresses are the last 20 bytes of the 32-byte topic
+        '0x' + memoryview(maker_topic)[12:32].hex(),
+        '0x' + memoryview(taker_topic)[12:32].hex(),
+        from_bytes(view[0:32], 'big'),
+        from_bytes(view[32:64], 'big'),
+        from_bytes(view[64:96], 'big'),
+        from_bytes(view[96:128], 'big'),
+        from_bytes(view[128:160], 'big'),
+    )
+
+
+def decode_logs(logs):
+    """Decode a batch of logs, skipping anything that isn't an OrderFilled"""
+    events = []
+    append = events.append
+
+    for log in logs:
+        try:
+            event = decode_order_filled(log)
+        except (ValueError, TypeError) as e:
+            print(f"Error parsing log: {e}")
+            continue
+        if event is not None:
+            append(event)
+
+    return events
+
+
+class Fill:
+    """
+    One normalized OrderFilled: a single wallet buying or selling outcome tokens
+
+    Asset id 0 is USDC collateral, so exactly one side of every order is
+    cash and the other is the outcome token. Amounts are both 6-decimal, so
+    the execution price is just usdc / shares.
+    """
+    __slots__ = (
+        'wallet', 'token_id', 'side', 'shares', 'usdc', 'price', 'timestamp',
+        'block_number', 'log_index', 'tx_hash', 'outcome', 'question', 'category',
+    )
+
+    def __init__(self, wallet, token_id, side, shares, usdc, timestamp,
+                 block_number=0, log_index=0, tx_hash='0x0'):
+        self.wallet = wallet
+        self.token_id = token_id
+        self.side = side
+        self.shares = shares
+        self.usdc = usdc
+        self.price = usdc / shares if shares else 0
+        self.timestamp = timestamp
+        self.block_number = block_number
+        self.log_index = log_index
+        self.tx_hash = tx_hash
+
+        # Filled in during enrichment
+        self.outcome = 'Unknown'
+        self.question = 'Unknown'
+        self.category = 'Unknown'
+
+    def __repr__(self):
+        return (f"Fill({self.wallet[:10]}.. {self.side} {self.shares:,.2f} "
+                f"of {self.token_id[:10]}.. @ {self.price:.3f})")
+
+
+def to_fill(event, timestamp):
+    """
+    Normalize a decoded OrderFilled into a Fill from the order owner's side
+
+    The maker of an OrderFilled is the wallet whose order was filled, and the
+    asset ids are from that order's point of view: giving USDC (id 0) means
+    buying the taker asset, receiving USDC means selling the maker asset.
+    """
+    if event.maker_asset_id == 0:
+        side = 'buy'
+        token_id = event.taker_asset_id
+        usdc, shares = event.maker_amount, event.taker_amount
+    elif event.taker_asset_id == 0:
+        side = 'sell'
+        token_id = event.maker_asset_id
+        usdc, shares = event.taker_amount, event.maker_amount
+    else:
+        # Token-for-token fills don't exist on the CTF Exchange
+        return None
+
+    if shares == 0:
+        return None
+
+    return Fill(
+        event.maker,
+        str(token_id),
+        side,
+        shares / 1e6,  # Outcome tokens and USDC both have 6 decimals
+        usdc / 1e6,
+        timestamp,
+        event.block_number,
+        event.log_index,
+        event.tx_hash,
+    )
+
+
+def block_times(logs, known):
+    """
+    {block number: datetime} for every block the logs come from
+
+    Uses a log's own blockTimestamp where the provider includes one, else
+    interpolates between the known {block number: epoch seconds} (the
+    range's first and last block headers); blocks outside them take the
+    nearest one's time.
+    """
+    times = {}
+    missing = set()
+    for log in logs:
+        block = _as_int(log.get('blockNumber', 0))
+        if block in times:
+            continue
+        stamp = log.get('blockTimestamp')
+        if stamp is not None:
+            times[block] = datetime.fromtimestamp(_as_int(stamp))
+            missing.discard(block)
+        else:
+            missing.add(block)
+
+    if missing and known:
+        points = sorted(known.items())
+        blocks = sorted(missing)
+        seconds = np.interp(blocks, [block for block, _ in points], [stamp for _, stamp in points])
+        for block, stamp in zip(blocks, seconds.tolist()):
+            times[block] = datetime.fromtimestamp(stamp)
+    return times
+
+
+def decode_fills(logs, timestamp):
+    """
+    Decode a batch of logs straight into Fills
+
+    timestamp: one datetime for every fill, or {block number: datetime}
+    (see block_times) so each fill carries its block's time
+    """
+    fills = []
+    append = fills.append
+    times = timestamp if isinstance(timestamp, dict) else None
+
+    for event in decode_logs(logs):
+        fill = to_fill(event, timestamp if times is None else times[event.block_number])
+        if fill is not None:
+            append(fill)
+
+    return fills
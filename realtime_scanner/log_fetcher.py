@@ -0,0 +1,158 @@
+"""
+Adaptive Log Fetcher
+Pulls OrderFilled logs from the CTF Exchange with RPC-level topic filtering
+and a block range that shrinks/grows with the provider's limits
+"""
+import threading
+import time
+import config
+
+# Provider error messages that mean "ask for a smaller range", not "give up"
+RANGE_ERROR_MARKERS = (
+    'more than 10000 results',
+    'query returned more than',
+    'log response size exceeded',
+    'response size exceeded',
+    'block range is too wide',
+    'block range too large',
+    'exceed maximum block range',
+    'too many results',
+    '-32005',
+)
+
+
+def is_range_error(error):
+    """True if the provider rejected the request because the range was too big"""
+    message = str(error).lower()
+    return any(marker in message for marker in RANGE_ERROR_MARKERS)
+
+
+class RateLimiter:
+    """Spaces out calls so all threads together stay under a requests/second cap"""
+
+    def __init__(self, max_per_second):
+        self.interval = 1.0 / max_per_second if max_per_second else 0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until this caller's slot comes up"""
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AdaptiveLogFetcher:
+    def __init__(self, w3, address=config.CTF_EXCHANGE, topic=config.ORDER_FILLED_TOPIC):
+        self.w3 = w3
+        self.address = address
+        self.topic = topic
+
+        # Current range size, carried over between calls so a drained
+        # backlog keeps the size that worked last time
+        self.batch_size = config.BLOCK_BATCH_SIZE
+
+        # Smallest range the provider rejected recently; growth stays below
+        # it until enough requests have succeeded to try again
+        self.ceiling = None
+        self.last_good_span = None
+        self.successes_since_split = 0
+
+        # The sizing state above is shared by every fetch worker thread
+        self.sizing_lock = threading.Lock()
+
+        # Shared by every worker thread during a concurrent catch-up
+        self.rate_limiter = RateLimiter(config.RPC_MAX_REQUESTS_PER_SECOND)
+
+    def _get_logs(self, from_block, to_block):
+        """Single eth_getLogs call filtered on the OrderFilled topic"""
+        self.rate_limiter.wait()
+        return self.w3.eth.get_logs({
+            'address': self.address,
+            'topics': [self.topic],
+            'fromBlock': from_block,
+            'toBlock': to_block
+        })
+
+    def _next_size(self):
+        with self.sizing_lock:
+            return self.batch_size
+
+    def _shrink(self, span):
+        """Step back after a too-many-results error; returns the new range size"""
+        with self.sizing_lock:
+            self.ceiling = span
+            self.successes_since_split = 0
+
+            # Fall back to the last size that worked, or halve if there is none
+            if self.last_good_span and self.last_good_span < span:
+                new_size = self.last_good_span
+            else:
+                new_size = span // 2
+            self.batch_size = max(config.MIN_BLOCK_BATCH_SIZE, new_size)
+            return self.batch_size
+
+    def _grow(self, span, num_logs):
+        """Widen the range while responses stay well under the target"""
+        with self.sizing_lock:
+            self.last_good_span = span
+            self.successes_since_split += 1
+            if self.ceiling and self.successes_since_split >= config.RANGE_CEILING_RESET_REQUESTS:
+                self.ceiling = None
+
+            if span < self.batch_size or num_logs >= config.TARGET_LOGS_PER_REQUEST // 2:
+                return
+
+            new_size = self.batch_size * 2
+            if self.ceiling:
+                # Probe halfway towards the size that failed; stop once close
+                new_size = (self.batch_size + self.ceiling) // 2
+                if new_size - self.batch_size < self.batch_size // 10:
+                    return
+            self.batch_size = min(config.MAX_BLOCK_BATCH_SIZE, new_size)
+
+    def fetch(self, from_block, to_block):
+        """
+        Get all OrderFilled logs in [from_block, to_block]
+
+        Splits the range when the provider says the response is too large
+        and grows it again while responses stay small. Any other RPC error is
+        retried a few times and then raised so the caller does not advance
+        its checkpoint past blocks it never saw.
+        """
+        logs = []
+        current = from_block
+
+        while current <= to_block:
+            end = min(current + self._next_size() - 1, to_block)
+            span = end - current + 1
+            retries = 0
+
+            while True:
+                try:
+                    batch = self._get_logs(current, end)
+                    break
+                except Exception as e:
+                    if is_range_error(e) and span > config.MIN_BLOCK_BATCH_SIZE:
+                        end = min(current + self._shrink(span) - 1, to_block)
+                        span = end - current + 1
+                        continue
+
+                    retries += 1
+                    if retries > config.RPC_MAX_RETRIES:
+                        raise
+                    print(f"get_logs {current}-{end} failed ({e}), retry {retries}/{config.RPC_MAX_RETRIES}")
+                    time.sleep(config.RPC_RETRY_DELAY_SECONDS * retries)
+
+            logs.extend(batch)
+            self._grow(span, len(batch))
+            current = end + 1
+
+        return logs
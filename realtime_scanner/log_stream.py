@@ -0,0 +1,224 @@
+"""
+Streaming Log Source
+Follows new OrderFilled logs as blocks land: a websocket `logs` subscription
+when the node offers one, tight eth_getLogs polling when it doesn't.
+Both resume from a block number, so a reconnect never skips or repeats blocks,
+and both stay CONFIRMATION_BLOCKS behind the head.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+import websockets
+import config
+from checkpoint import hex_hash
+
+
+def block_number(value):
+    """JSON-RPC quantities are hex strings; web3 results are already ints"""
+    return int(value, 16) if isinstance(value, str) else value
+
+
+async def sleep_unless_stopped(stopping, seconds):
+    """Sleep, but wake up as soon as shutdown starts"""
+    try:
+        await asyncio.wait_for(stopping.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+class LogStream:
+    """
+    Yields (from_block, to_block, logs) for consecutive block ranges, in order
+
+    Live blocks come one at a time, once the node's head is `confirmations`
+    blocks past them. Anything missed while (re)connecting is backfilled
+    through the regular fetcher in CATCHUP_WINDOW_BLOCKS ranges first.
+
+    With fetch_backfill=False the backfilled ranges are yielded with logs
+    None instead, for the consumer to fetch (concurrently, say); only live
+    blocks then arrive with their logs.
+    """
+
+    def __init__(self, log_fetcher, get_latest_block, ws_url=config.POLYGON_WS,
+                 address=config.CTF_EXCHANGE, topic=config.ORDER_FILLED_TOPIC,
+                 confirmations=config.CONFIRMATION_BLOCKS, fetch_backfill=True):
+        self.log_fetcher = log_fetcher
+        self.fetch_backfill = fetch_backfill
+        self.get_latest_block = get_latest_block
+        self.ws_url = ws_url
+        self.address = address
+        self.topic = topic
+        self.confirmations = confirmations
+
+        self.next_block = None  # First block not yet yielded
+        self.rewind_to = None  # Set by rewind(), applied before the next range
+        self.head_seen = 0  # Chain head at the last backfill
+        self.mode = None  # 'websocket' or 'poll'
+        self.reconnects = 0
+        self.request_ids = itertools.count(1)
+
+    def rewind(self, block):
+        """Go back and re-deliver from block on (after a reorg rolled the consumer back)"""
+        self.rewind_to = block
+
+    def _emit(self, to_block, logs):
+        item = (self.next_block, to_block, logs)
+        self.next_block = to_block + 1
+        return item
+
+    async def ranges(self, from_block, stopping):
+        """Follow the chain from from_block until stopping is set"""
+        self.next_block = from_block
+        ws_failures = 0
+
+        while not stopping.is_set():
+            if self.ws_url and ws_failures < config.STREAM_MAX_WS_FAILURES:
+                try:
+                    async for item in self._follow_websocket(stopping):
+                        ws_failures = 0
+                        yield item
+                except Exception as e:
+                    ws_failures += 1
+                    self.reconnects += 1
+                    print(f"⚠️  Log subscription failed ({e}), "
+                          f"reconnecting from block {self.next_block} ({ws_failures}/{config.STREAM_MAX_WS_FAILURES})")
+                    await sleep_unless_stopped(stopping, config.STREAM_RECONNECT_DELAY_SECONDS * ws_failures)
+                continue
+
+            # No websocket (or it keeps failing): poll, and try it again later
+            if self.ws_url:
+                print(f"⚠️  Falling back to eth_getLogs polling for {config.STREAM_WS_RETRY_SECONDS}s")
+                until = time.monotonic() + config.STREAM_WS_RETRY_SECONDS
+            else:
+                until = None
+            async for item in self._poll(stopping, until):
+                yield item
+            ws_failures = 0
+
+    # ========== BACKFILL / POLLING ==========
+
+    async def _backfill(self, stopping):
+        """Everything from next_block up to the confirmed head (logs fetched if fetch_backfill)"""
+        if self.rewind_to is not None:
+            self.next_block, self.rewind_to = self.rewind_to, None
+
+        self.head_seen = await asyncio.to_thread(self.get_latest_block)
+        head = self.head_seen - self.confirmations
+        while self.next_block <= head and not stopping.is_set() and self.rewind_to is None:
+            end = min(self.next_block + config.CATCHUP_WINDOW_BLOCKS - 1, head)
+            logs = None
+            if self.fetch_backfill:
+                logs = await asyncio.to_thread(self.log_fetcher.fetch, self.next_block, end)
+            yield self._emit(end, logs)
+
+    async def _poll(self, stopping, until=None):
+        """eth_getLogs from next_block to the head every STREAM_POLL_SECONDS"""
+        self.mode = 'poll'
+        while not stopping.is_set() and (until is None or time.monotonic() < until):
+            try:
+                async for item in self._backfill(stopping):
+                    yield item
+            except Exception as e:
+                print(f"❌ Error polling logs from block {self.next_block}: {e}")
+            await sleep_unless_stopped(stopping, config.STREAM_POLL_SECONDS)
+
+    # ========== WEBSOCKET ==========
+
+    async def _follow_websocket(self, stopping):
+        async with websockets.connect(self.ws_url, open_timeout=config.STREAM_IDLE_TIMEOUT_SECONDS,
+                                      close_timeout=1) as ws:
+            backlog = deque()  # Notifications that arrived before we were ready for them
+            logs_sub, heads_sub = await self._subscribe(ws, backlog, stopping, [
+                ['logs', {'address': self.address, 'topics': [self.topic]}],
+                ['newHeads'],
+            ])
+            self.mode = 'websocket'
+            print(f"📡 Subscribed to OrderFilled logs, resuming at block {self.next_block}")
+
+            # Subscribed before backfilling, so blocks produced meanwhile wait
+            # on the socket. The unconfirmed tail that was already mined won't
+            # be sent, so it's fetched into pending; anything the socket sends
+            # up to backfilled_to is then a duplicate.
+            pending = {}  # block_number -> {(tx hash, log index): log}
+            backfilled_to = None
+            while not stopping.is_set():
+                if backfilled_to is None or self.rewind_to is not None:
+                    async for item in self._backfill(stopping):
+                        yield item
+                    backfilled_to = max(self.head_seen, self.next_block - 1)
+                    for block in [b for b in pending if b <= backfilled_to]:
+                        del pending[block]
+                    if self.next_block <= backfilled_to:
+                        tail = await asyncio.to_thread(self.log_fetcher.fetch, self.next_block, backfilled_to)
+                        for log in tail:
+                            self._add_pending(pending, log)
+                    continue
+
+                message = backlog.popleft() if backlog else await self._recv(ws, stopping)
+                if message is None:
+                    return
+
+                params = message.get('params') or {}
+                result = params.get('result')
+                if params.get('subscription') == logs_sub:
+                    # Retractions always apply: they may hit a fetched tail log
+                    if result.get('removed') or block_number(result['blockNumber']) > backfilled_to:
+                        self._add_pending(pending, result)
+
+                elif params.get('subscription') == heads_sub:
+                    # A new head means every earlier block's logs have been sent
+                    confirmed = block_number(result['number']) - max(self.confirmations, 1)
+                    if confirmed >= self.next_block:
+                        logs = []
+                        for block in sorted(b for b in pending if b <= confirmed):
+                            logs.extend(pending.pop(block).values())
+                        yield self._emit(confirmed, logs)
+
+    def _add_pending(self, pending, log):
+        """Buffer a log until its block is confirmed (or drop it if a reorg retracted it)"""
+        # A log for a block already yielded is late: it goes out with the next one
+        logs = pending.setdefault(max(block_number(log['blockNumber']), self.next_block), {})
+        key = (hex_hash(log['transactionHash']), block_number(log['logIndex']))
+        if log.get('removed'):
+            logs.pop(key, None)
+        else:
+            logs[key] = log
+
+    async def _subscribe(self, ws, backlog, stopping, subscriptions):
+        """Send eth_subscribe requests, return their ids in the same order"""
+        ids = []
+        for params in subscriptions:
+            request_id = next(self.request_ids)
+            ids.append(request_id)
+            await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request_id,
+                                      'method': 'eth_subscribe', 'params': params}))
+
+        results = {}
+        while len(results) < len(ids):
+            message = await self._recv(ws, stopping)
+            if message is None:
+                raise ConnectionError("shutting down")
+            if message.get('id') in ids:
+                if 'error' in message:
+                    raise ConnectionError(f"eth_subscribe rejected: {message['error']}")
+                results[message['id']] = message['result']
+            else:
+                backlog.append(message)
+        return [results[request_id] for request_id in ids]
+
+    async def _recv(self, ws, stopping):
+        """Next JSON message, None on shutdown, TimeoutError if the socket goes quiet"""
+        recv = asyncio.ensure_future(ws.recv())
+        stop = asyncio.ensure_future(stopping.wait())
+        done, _ = await asyncio.wait({recv, stop}, timeout=config.STREAM_IDLE_TIMEOUT_SECONDS,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if recv in done:
+            return json.loads(recv.result())
+
+        recv.cancel()
+        if stopping.is_set():
+            return None
+        raise asyncio.TimeoutError(f"no messages for {config.STREAM_IDLE_TIMEOUT_SECONDS}s")
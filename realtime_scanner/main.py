@@ -2,22 +2,55 @@
 """
 Real-Time Polymarket Scanner
 Monitors blockchain, detects wallet patterns, sends Telegram alerts
+
+Runs as a staged pipeline with bounded queues between stages:
+blocks -> fetch logs -> decode -> enrich -> track/detect -> notify
 """
 import asyncio
+import signal as signals_module
 import time
 from datetime import datetime
 import config
+from log_decoder import block_times, decode_fills
+from log_stream import LogStream, sleep_unless_stopped
+from checkpoint import ChainCheckpoint, logs_match_block
+from fill_dedupe import SeenFills
+from fill_archive import FillArchive
+from pipeline import Stage, STOP, make_queue
 from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
 from blockchain_scanner import BlockchainScanner
 from signal_detector import SignalDetector
+from detection_cycle import run_cycle
 from telegram_notifier import TelegramNotifier
 
+class Batch:
+    """One block range moving through the pipeline"""
+    __slots__ = ('from_block', 'to_block', 'logs', 'trades', 'failed', 'block_hash', 'parent_hash',
+                 'block_times')
+
+    def __init__(self, from_block, to_block):
+        self.from_block = from_block
+        self.to_block = to_block
+        self.logs = None  # Filled by the fetch stage, or already by the stream
+        self.trades = []
+        self.failed = False
+        self.block_hash = None  # Hash of to_block
+        self.parent_hash = None  # Parent hash of from_block
+        self.block_times = {}  # Epoch seconds of from_block and to_block, for fill timestamps
+
+
 class RealtimeScanner:
     def __init__(self):
-        self.wallet_tracker = WalletTracker()
+        tracker_class = ColumnarWalletTracker if config.WALLET_STORE == 'columnar' else WalletTracker
+        self.wallet_tracker = tracker_class(
+            min_volume=config.MIN_WALLET_VOLUME,
+            min_conviction=config.MIN_CONVICTION
+        )
         self.blockchain_scanner = BlockchainScanner()
         self.signal_detector = SignalDetector()
         self.telegram_notifier = TelegramNotifier()
+        self.fill_archive = FillArchive() if config.FILL_ARCHIVE_DIR else None
 
         # Stats
         self.stats = {
@@ -25,195 +58,290 @@ class RealtimeScanner:
             'blocks_scanned': 0,
             'trades_processed': 0,
             'wallets_tracked': 0,
+            'reorgs': 0,
+            'duplicate_fills': 0,
             'last_scan': None
         }
 
-        # Load saved state
+        # Load saved state (the chain checkpoint is saved with it)
         self.wallet_tracker.load_state()
-
-    async def scan_cycle(self):
-        """Single scan cycle"""
-        print(f"\n{'='*60}")
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting scan cycle...")
-        print(f"{'='*60}")
-
+        if self.wallet_tracker.checkpoint:
+            self.checkpoint = ChainCheckpoint.from_dict(self.wallet_tracker.checkpoint)
+        else:
+            self.checkpoint = ChainCheckpoint()
+
+        # (tx_hash, log_index) of fills already applied, so a refetched or
+        # overlapping range can't count a fill twice. The saved buckets cover
+        # the lookback window; the checkpoint's recent ranges cover anything
+        # applied after the buckets were last saved.
+        self.seen_fills = SeenFills(directory=config.DEDUPE_STATE_DIR)
+        self.seen_fills.load()
+        for entry in self.checkpoint.recent:
+            self.seen_fills.add(entry[4] if len(entry) > 4 else [])
+
+        # Pipeline state
+        self.stopping = asyncio.Event()
+        self.rewind_to = None  # Set after a reorg rollback or a failed range: producer restarts here
+        self.halted = False  # A range failed for good; later ranges are not applied
+        self.last_persist = time.time()
+
+    # ========== PIPELINE STAGES ==========
+
+    async def produce_blocks(self, outbox):
+        """Source: queue block ranges from the checkpoint onwards, in order"""
+        if self.checkpoint.block is None:
+            # First run on this state: pick up from the old text checkpoint
+            self.checkpoint.block = await asyncio.to_thread(self.blockchain_scanner.load_checkpoint)
+        next_block = self.checkpoint.block + 1
+
+        if config.SCAN_MODE == 'stream':
+            await self.stream_blocks(next_block, outbox)
+        else:
+            await self.poll_blocks(next_block, outbox)
+
+        await outbox.put(STOP)
+
+    async def stream_blocks(self, next_block, outbox):
+        """
+        Streaming: one batch per new block, logs already fetched
+
+        Catch-up windows come without logs, so the fetch stage's workers
+        fetch the backlog concurrently, the same as in batch mode.
+        """
+        stream = LogStream(self.blockchain_scanner.log_fetcher, self.blockchain_scanner.get_latest_block,
+                           fetch_backfill=False)
+        async for from_block, to_block, logs in stream.ranges(next_block, self.stopping):
+            if self.rewind_to is not None:
+                stream.rewind(self.rewind_to)
+                self.rewind_to = None
+                continue
+            batch = Batch(from_block, to_block)
+            batch.logs = logs
+            await outbox.put(batch)
+
+    async def poll_blocks(self, next_block, outbox):
+        """Batch mode: every SCAN_INTERVAL_SECONDS, queue everything up to the confirmed head"""
+        while not self.stopping.is_set():
+            try:
+                latest_block = await asyncio.to_thread(self.blockchain_scanner.get_latest_block)
+                latest_block -= config.CONFIRMATION_BLOCKS
+            except Exception as e:
+                print(f"❌ Error getting latest block: {e}")
+                latest_block = next_block - 1
+
+            # Blocks (backpressure) whenever the fetch stage is behind
+            while not self.stopping.is_set():
+                if self.rewind_to is not None:
+                    next_block, self.rewind_to = self.rewind_to, None
+                if next_block > latest_block:
+                    break
+                end = min(next_block + config.CATCHUP_WINDOW_BLOCKS - 1, latest_block)
+                await outbox.put(Batch(next_block, end))
+                next_block = end + 1
+
+            await sleep_unless_stopped(self.stopping, config.SCAN_INTERVAL_SECONDS)
+
+    def fetch_logs(self, batch):
+        """
+        Fetch stage: OrderFilled logs and boundary block hashes/times for one range
+
+        Streamed batches already carry their logs. Logs from a block that has
+        since been replaced (a reorg between the two calls) are refetched.
+        Retries until it succeeds so no range is ever skipped; once shutdown
+        starts a failing range is marked failed instead, and the tracker
+        stage stops applying anything from there on.
+        """
+        scanner = self.blockchain_scanner
+        while True:
+            try:
+                if batch.logs is None:
+                    batch.logs = scanner.log_fetcher.fetch(batch.from_block, batch.to_block)
+
+                batch.block_hash, batch.parent_hash, to_time = scanner.get_block_header(batch.to_block)
+                batch.block_times = {batch.to_block: to_time}
+                if batch.from_block != batch.to_block:
+                    _, batch.parent_hash, from_time = scanner.get_block_header(batch.from_block)
+                    batch.block_times[batch.from_block] = from_time
+
+                if logs_match_block(batch.logs, batch.to_block, batch.block_hash):
+                    return batch
+                print(f"🔀 Block {batch.to_block} was replaced while fetching, refetching its range")
+                batch.logs = None
+            except Exception as e:
+                print(f"❌ Error fetching blocks {batch.from_block} to {batch.to_block}: {e}")
+                if self.stopping.is_set():
+                    batch.failed = True
+                    return batch
+                time.sleep(config.RPC_RETRY_DELAY_SECONDS)
+
+    def decode_batch(self, batch):
+        """Decode stage: raw logs -> Fills, each stamped with its block's time (not when it was decoded)"""
+        if batch.failed:
+            return batch
+        batch.trades = decode_fills(batch.logs, block_times(batch.logs, batch.block_times))
+        batch.logs = None
+        return batch
+
+    def enrich_batch(self, batch):
+        """Enrichment stage: market metadata for each fill"""
+        if batch.trades:
+            batch.trades = self.blockchain_scanner.enrich_with_polymarket_data(batch.trades)
+        return batch
+
+    def track_batch(self, batch):
+        """Tracker/detector stage: update wallets, detect clusters, return signals"""
+        if batch.failed or self.halted:
+            self.halted = True
+            return []
+
+        if batch.from_block != self.checkpoint.block + 1:
+            return []  # Fetched before a reorg rewind; the producer is re-sending from the ancestor
+
+        if not self.checkpoint.extends(batch.parent_hash):
+            self.roll_back_reorg(batch)
+            return []
+
+        trades, fill_keys = self.seen_fills.filter_new(batch.trades)
+        self.stats['duplicate_fills'] += len(batch.trades) - len(trades)
+        # applied is kept with the checkpoint so a reorg can take it back out
+        applied = []
         try:
-            # 1. Get current block
-            latest_block = self.blockchain_scanner.get_latest_block()
-            last_processed = self.blockchain_scanner.load_checkpoint()
-
-            print(f"Latest block: {latest_block}")
-            print(f"Last processed: {last_processed}")
-            print(f"Blocks to process: {latest_block - last_processed}")
-
-            # 2. Process new blocks in batches
-            current = last_processed + 1
-            trades_this_cycle = []
-
-            while current <= latest_block:
-                to_block = min(current + config.BLOCK_BATCH_SIZE, latest_block)
-
-                print(f"Processing blocks {current} to {to_block}...")
-
-                # Get trades from this batch
-                trades = self.blockchain_scanner.get_recent_trades(current, to_block)
-                trades_this_cycle.extend(trades)
-
-                # Update stats
-                self.stats['blocks_scanned'] += (to_block - current + 1)
-                self.stats['trades_processed'] += len(trades)
-
-                current = to_block + 1
-
-            print(f"✅ Found {len(trades_this_cycle)} trades in this cycle")
-
-            # 3. Enrich trades with market data
-            if trades_this_cycle:
-                trades_this_cycle = self.blockchain_scanner.enrich_with_polymarket_data(trades_this_cycle)
-
-            # 4. Update wallet tracker
-            for trade in trades_this_cycle:
-                self.wallet_tracker.add_trade(
-                    wallet=trade['wallet'],
-                    market_id=trade['market_id'],
-                    outcome=trade['outcome'],
-                    volume_usd=trade['volume_usd'],
-                    timestamp=trade['timestamp']
-                )
-
-            # 5. Detect clusters
-            clusters = self.wallet_tracker.detect_clusters(
-                min_wallets=config.MIN_WALLETS_CLUSTER,
-                min_volume=config.MIN_WALLET_VOLUME,
-                min_conviction=config.MIN_CONVICTION
-            )
-
-            print(f"✅ Detected {len(clusters)} wallet clusters")
-
-            # 6. Enrich clusters with market metadata
-            for cluster in clusters:
-                market_id = cluster['market_id']
-                if market_id in self.blockchain_scanner.market_cache:
-                    metadata = self.blockchain_scanner.market_cache[market_id]
-                    cluster['question'] = metadata.get('question', 'Unknown')
-                    cluster['category'] = metadata.get('category', 'Unknown')
-
-                # Calculate average entry price from the wallets in this cluster
-                prices = []
-                for wallet_position in cluster['wallets']:
-                    # Find matching trades for this wallet/market to get price
-                    for trade in trades_this_cycle:
-                        if (trade['wallet'] == wallet_position['wallet'] and
-                            trade['market_id'] == market_id and
-                            trade.get('price')):
-                            prices.append(trade['price'])
-
-                if prices:
-                    cluster['price'] = sum(prices) / len(prices)
-                else:
-                    cluster['price'] = 0.5  # Default if no price data
-
-            # 7. Run signal detection patterns
-            signals = self.signal_detector.detect_all(
-                clusters,
-                trades_this_cycle,
-                self.wallet_tracker
-            )
-
-            print(f"🚨 Found {len(signals)} signals!")
-
-            # 8. Enrich whale/synchronized signals with market metadata
-            for signal in signals:
-                # For whale signals, enrich the position
-                if signal['type'] == 'whale':
-                    market_id = signal['position']['market_id']
-                    if market_id in self.blockchain_scanner.market_cache:
-                        metadata = self.blockchain_scanner.market_cache[market_id]
-                        signal['position']['question'] = metadata.get('question', 'Unknown')
-                        signal['position']['category'] = metadata.get('category', 'Unknown')
-
-                    # Find entry price from trades
-                    wallet = signal['position']['wallet']
-                    for trade in trades_this_cycle:
-                        if (trade['wallet'] == wallet and
-                            trade['market_id'] == market_id and
-                            trade.get('price')):
-                            signal['position']['price'] = trade['price']
-                            break
-
-                    if 'price' not in signal['position']:
-                        signal['position']['price'] = 0.5  # Default
-
-            # 9. Send Telegram alerts
-            for signal in signals:
-                self.telegram_notifier.send_signal_alert(signal)
-                self.stats['signals_detected'] += 1
-
-            # 10. Save state
-            self.blockchain_scanner.save_checkpoint(latest_block)
-            self.wallet_tracker.save_state()
-
-            # 11. Cleanup old data
-            self.wallet_tracker.cleanup_old_data(hours=config.LOOKBACK_HOURS)
-
-            # Update stats
-            self.stats['wallets_tracked'] = len(self.wallet_tracker.wallet_totals)
-            self.stats['last_scan'] = datetime.now()
-
-            print(f"✅ Scan cycle complete")
-            print(f"   Wallets tracked: {self.stats['wallets_tracked']}")
-            print(f"   Signals detected (total): {self.stats['signals_detected']}")
-
-        except Exception as e:
-            print(f"❌ Error in scan cycle: {e}")
-            import traceback
-            traceback.print_exc()
+            _, clusters, signals = run_cycle(self.wallet_tracker, self.signal_detector, trades,
+                                             self.blockchain_scanner.market_cache, applied=applied)
+        except Exception:
+            # Take the partial range back out so the restart applies it exactly once
+            for trade in reversed(applied):
+                self.wallet_tracker.revert_trade(*trade)
+            self.seen_fills.forget(fill_keys)
+            raise
+        if self.fill_archive is not None:
+            self.fill_archive.append(trades)
+
+        self.checkpoint.record(batch.from_block, batch.to_block, batch.block_hash, applied,
+                               [key for key in fill_keys if key is not None])
+        self.stats['blocks_scanned'] += batch.to_block - batch.from_block + 1
+        self.stats['trades_processed'] += len(trades)
+        self.stats['last_scan'] = datetime.now()
+
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Blocks {batch.from_block}-{batch.to_block}: "
+              f"{len(trades)} trades, {len(clusters)} new/updated clusters, {len(signals)} signals")
+
+        if time.time() - self.last_persist >= config.PERSIST_INTERVAL_SECONDS:
+            self.persist()
+
+        return signals
+
+    def roll_back_reorg(self, batch):
+        """Our tip was replaced: undo trades back to the common ancestor and refetch from there"""
+        tip = self.checkpoint.block
+        ancestor = self.checkpoint.rollback(self.blockchain_scanner.get_block_hash,
+                                            self.wallet_tracker.revert_trade,
+                                            self.seen_fills.forget)
+        self.rewind_to = ancestor + 1
+        if self.fill_archive is not None:
+            self.fill_archive.rollback(ancestor)
+        self.stats['reorgs'] += 1
+        print(f"🔀 Reorg: block {batch.from_block} does not build on block {tip}; "
+              f"rolled back {tip - ancestor} blocks to {ancestor}")
+
+    def restart_from_checkpoint(self, batch, error):
+        """
+        A stage failed on a range: have the producer re-send from the
+        checkpoint, so the range is retried instead of skipped (ranges
+        already past it are dropped by the tracker stage and re-sent too)
+        """
+        resume = self.checkpoint.block + 1
+        if self.rewind_to is None or resume < self.rewind_to:
+            self.rewind_to = resume
+        print(f"🔁 Blocks {batch.from_block}-{batch.to_block} failed ({error}), "
+              f"restarting from block {resume}")
+
+    def send_alert(self, signal):
+        """Notifier stage: queue one Telegram alert (delivery runs in the background; the outbox fsync runs in a thread)"""
+        self.telegram_notifier.send_signal_alert(signal)
+        self.stats['signals_detected'] += 1
+
+    def persist(self):
+        """Save tracker state and checkpoint in one atomic write, then expire old positions"""
+        # Archive first: a crash in between re-archives a few fills (replay
+        # dedupes them) rather than losing them behind a saved checkpoint
+        if self.fill_archive is not None:
+            self.fill_archive.flush()
+        self.wallet_tracker.save_state(checkpoint=self.checkpoint.to_dict())
+        # After the state: a crash in between loses no keys the checkpoint can't restore
+        self.seen_fills.save()
+        self.wallet_tracker.cleanup_old_data(hours=config.LOOKBACK_HOURS)
+
+        self.stats['wallets_tracked'] = self.wallet_tracker.num_wallets()
+        self.last_persist = time.time()
+        print(f"💾 Checkpoint at block {self.checkpoint.block}, "
+              f"wallets tracked: {self.stats['wallets_tracked']:,}")
+
+    async def report_daily_summary(self):
+        """Send the daily summary every 24 hours until shutdown"""
+        while not self.stopping.is_set():
+            await sleep_unless_stopped(self.stopping, 24 * 3600)
+            if not self.stopping.is_set():
+                await asyncio.to_thread(self.telegram_notifier.send_daily_summary, self.stats)
+
+    def stop(self):
+        """Stop taking new blocks; everything already in flight is finished"""
+        if not self.stopping.is_set():
+            print("\n👋 Shutting down, flushing in-flight work...")
+            self.stopping.set()
 
     async def run(self):
-        """Main scanner loop"""
+        """Run the pipeline until SIGINT/SIGTERM, then drain it and persist"""
 
         # Send startup message
-        self.telegram_notifier.send_startup_message()
+        await asyncio.to_thread(self.telegram_notifier.send_startup_message)
 
         print("="*60)
         print("REAL-TIME POLYMARKET SCANNER")
         print("="*60)
         print(f"Alchemy API: {'✅ Connected' if config.ALCHEMY_API_KEY else '❌ Not configured'}")
         print(f"Telegram: {'✅ Connected' if config.TELEGRAM_BOT_TOKEN else '❌ Not configured'}")
-        print(f"Scan interval: Every {config.SCAN_INTERVAL_SECONDS} seconds")
+        if config.SCAN_MODE == 'stream':
+            print(f"Mode: Streaming ({'websocket' if config.POLYGON_WS else 'polling'} "
+                  f"+ eth_getLogs fallback every {config.STREAM_POLL_SECONDS}s)")
+        else:
+            print(f"Poll interval: Every {config.SCAN_INTERVAL_SECONDS} seconds")
         print(f"Min wallet volume: ${config.MIN_WALLET_VOLUME}")
         print(f"Min conviction: {config.MIN_CONVICTION*100}%")
         print(f"Min wallets for signal: {config.MIN_WALLETS_CLUSTER} (ANY wallet counts!)")
         print("="*60)
         print()
 
-        last_daily_summary = datetime.now()
-
-        # Main loop
-        while True:
+        loop = asyncio.get_running_loop()
+        for sig in (signals_module.SIGINT, signals_module.SIGTERM):
             try:
-                # Run scan cycle
-                await self.scan_cycle()
-
-                # Send daily summary
-                hours_since_summary = (datetime.now() - last_daily_summary).total_seconds() / 3600
-                if hours_since_summary >= 24:
-                    self.telegram_notifier.send_daily_summary(self.stats)
-                    last_daily_summary = datetime.now()
-
-                # Wait for next cycle
-                print(f"\n⏰ Next scan in {config.SCAN_INTERVAL_SECONDS} seconds...\n")
-                await asyncio.sleep(config.SCAN_INTERVAL_SECONDS)
-
-            except KeyboardInterrupt:
-                print("\n👋 Scanner stopped by user")
-                break
-            except Exception as e:
-                print(f"❌ Error in main loop: {e}")
-                import traceback
-                traceback.print_exc()
-                # Wait before retrying
-                await asyncio.sleep(60)
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass  # Windows: KeyboardInterrupt still stops the process
+
+        blocks, fetched, decoded, enriched, alerts = (make_queue() for _ in range(5))
+        restart = self.restart_from_checkpoint
+        stages = [
+            Stage('fetch', self.fetch_logs, blocks, fetched, workers=config.CATCHUP_WORKERS, on_error=restart),
+            Stage('decode', self.decode_batch, fetched, decoded, on_error=restart),
+            Stage('enrich', self.enrich_batch, decoded, enriched, workers=config.ENRICH_WORKERS, on_error=restart),
+            Stage('track', self.track_batch, enriched, alerts, fan_out=True, on_error=restart),
+            Stage('notify', self.send_alert, alerts),
+        ]
+
+        self.telegram_notifier.start()
+        summary = asyncio.create_task(self.report_daily_summary())
+        await asyncio.gather(self.produce_blocks(blocks), *(stage.run() for stage in stages))
+        summary.cancel()
+
+        # Everything in flight has been applied and queued; deliver what we can
+        self.persist()
+        await self.telegram_notifier.close()
+        for stage in stages:
+            print(f"   {stage.name:>7}: {stage.processed} items, {stage.busy_seconds:.1f}s busy")
+        for name, timing in self.signal_detector.timings.items():
+            print(f"   {name}: {timing['calls']} runs, "
+                  f"{timing['seconds'] / timing['calls'] * 1000:.2f} ms avg, {timing['signals']} signals")
 
 if __name__ == "__main__":
     scanner = RealtimeScanner()
@@ -0,0 +1,202 @@
+"""
+Market Metadata Cache
+token_id -> (condition_id, outcome) and condition_id -> (question, category)
+with per-entry TTLs, LRU eviction and a SQLite snapshot so restarts are warm
+"""
+from collections import OrderedDict
+import sqlite3
+import threading
+import time
+import config
+
+
+class MarketCache:
+    def __init__(self, path=config.MARKET_CACHE_FILE,
+                 max_entries=config.MARKET_CACHE_MAX_ENTRIES,
+                 ttl=config.MARKET_CACHE_TTL_SECONDS,
+                 miss_ttl=config.MARKET_CACHE_MISS_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+
+        # token_id -> (condition_id, outcome, expires_at); condition_id None = known miss
+        self.tokens = OrderedDict()
+        # condition_id -> (question, category, expires_at)
+        self.markets = OrderedDict()
+
+        # Changes since the last save, so saves only write what moved
+        self.dirty_tokens = set()
+        self.dirty_markets = set()
+        self.evicted_tokens = set()
+        self.evicted_markets = set()
+
+        self.lock = threading.Lock()
+        self.load()
+
+    # ========== LOOKUPS ==========
+
+    def get(self, token_id):
+        """Metadata for a token, or None if unknown/expired"""
+        with self.lock:
+            entry = self.tokens.get(token_id)
+            if entry is None:
+                return None
+
+            condition_id, outcome, expires_at = entry
+            if condition_id is None or expires_at < time.time():
+                return None
+            self.tokens.move_to_end(token_id)
+
+            metadata = {
+                'condition_id': condition_id,
+                'outcome': outcome,
+                'question': 'Unknown',
+                'category': 'Unknown'
+            }
+
+            market = self.markets.get(condition_id)
+            if market is not None:
+                self.markets.move_to_end(condition_id)
+                metadata['question'] = market[0]
+                metadata['category'] = market[1]
+
+            return metadata
+
+    def __contains__(self, token_id):
+        return self.get(token_id) is not None
+
+    def missing(self, token_ids):
+        """Tokens that need a fetch: never seen, or entry (hit or miss) expired"""
+        now = time.time()
+        with self.lock:
+            result = set()
+            for token_id in token_ids:
+                entry = self.tokens.get(token_id)
+                if entry is None or entry[2] < now:
+                    result.add(token_id)
+                    continue
+
+                # Token known but its market expired -> refetch via the token
+                condition_id = entry[0]
+                if condition_id is not None:
+                    market = self.markets.get(condition_id)
+                    if market is None or market[2] < now:
+                        result.add(token_id)
+            return result
+
+    # ========== UPDATES ==========
+
+    def put_token(self, token_id, condition_id, outcome):
+        """Cache a token -> market mapping"""
+        with self.lock:
+            self._set(self.tokens, token_id, (condition_id, outcome, time.time() + self.ttl),
+                      self.dirty_tokens, self.evicted_tokens)
+
+    def put_market(self, condition_id, question, category):
+        """Cache a market's question and category"""
+        with self.lock:
+            self._set(self.markets, condition_id, (question, category, time.time() + self.ttl),
+                      self.dirty_markets, self.evicted_markets)
+
+    def put_miss(self, token_id):
+        """Remember that a lookup found nothing, so we don't refetch it every cycle"""
+        with self.lock:
+            self._set(self.tokens, token_id, (None, None, time.time() + self.miss_ttl),
+                      self.dirty_tokens, self.evicted_tokens)
+
+    def _set(self, table, key, value, dirty, evicted):
+        """Insert/refresh an entry and evict least-recently-used ones past the cap"""
+        table[key] = value
+        table.move_to_end(key)
+        dirty.add(key)
+        evicted.discard(key)
+
+        while len(table) > self.max_entries:
+            old_key, _ = table.popitem(last=False)
+            dirty.discard(old_key)
+            evicted.add(old_key)
+
+    # ========== PERSISTENCE ==========
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tokens (
+                token_id TEXT PRIMARY KEY, condition_id TEXT, outcome TEXT, expires_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS markets (
+                condition_id TEXT PRIMARY KEY, question TEXT, category TEXT, expires_at REAL
+            )
+        """)
+        return conn
+
+    def load(self):
+        """Warm the cache from the on-disk snapshot (expired rows are skipped)"""
+        if not self.path:
+            return False
+
+        try:
+            conn = self._connect()
+            now = time.time()
+            try:
+                for token_id, condition_id, outcome, expires_at in conn.execute(
+                        "SELECT token_id, condition_id, outcome, expires_at FROM tokens "
+                        "WHERE expires_at > ? ORDER BY expires_at", (now,)):
+                    self.tokens[token_id] = (condition_id, outcome, expires_at)
+
+                for condition_id, question, category, expires_at in conn.execute(
+                        "SELECT condition_id, question, category, expires_at FROM markets "
+                        "WHERE expires_at > ? ORDER BY expires_at", (now,)):
+                    self.markets[condition_id] = (question, category, expires_at)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error loading market cache: {e}")
+            return False
+
+        # Keep the newest entries if the snapshot is bigger than the cap
+        while len(self.tokens) > self.max_entries:
+            self.tokens.popitem(last=False)
+        while len(self.markets) > self.max_entries:
+            self.markets.popitem(last=False)
+
+        return True
+
+    def save(self):
+        """Write entries changed since the last save (cost is O(changes))"""
+        if not self.path:
+            return
+
+        with self.lock:
+            token_rows = [(k, *self.tokens[k]) for k in self.dirty_tokens]
+            market_rows = [(k, *self.markets[k]) for k in self.dirty_markets]
+            evicted_tokens = [(k,) for k in self.evicted_tokens]
+            evicted_markets = [(k,) for k in self.evicted_markets]
+            self.dirty_tokens.clear()
+            self.dirty_markets.clear()
+            self.evicted_tokens.clear()
+            self.evicted_markets.clear()
+
+        if not (token_rows or market_rows or evicted_tokens or evicted_markets):
+            return
+
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)", token_rows)
+                    conn.executemany("INSERT OR REPLACE INTO markets VALUES (?, ?, ?, ?)", market_rows)
+                    conn.executemany("DELETE FROM tokens WHERE token_id = ?", evicted_tokens)
+                    conn.executemany("DELETE FROM markets WHERE condition_id = ?", evicted_markets)
+                    conn.execute("DELETE FROM tokens WHERE expires_at < ?", (time.time(),))
+                    conn.execute("DELETE FROM markets WHERE expires_at < ?", (time.time(),))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error saving market cache: {e}")
+
+    def __len__(self):
+        return len(self.tokens)
@@ -0,0 +1,170 @@
+"""
+Market Catalogue Client
+Paginated, streaming access to gamma /markets and CLOB market listings
+over one pooled HTTP session
+"""
+import json
+import requests
+from requests.adapters import HTTPAdapter
+import config
+
+# CLOB cursor pagination ends with this cursor (base64 of "-1")
+CLOB_END_CURSOR = 'LTE='
+
+
+def parse_market_tokens(market):
+    """
+    (token_id, outcome, price) triples for a gamma or CLOB market
+
+    Gamma returns clobTokenIds/outcomes/outcomePrices as JSON-encoded
+    strings, the CLOB API returns a tokens list.
+    """
+    if market.get('tokens'):
+        return [
+            (str(token.get('token_id', '')),
+             token.get('outcome', 'Unknown'),
+             float(token.get('price', 0) or 0))
+            for token in market['tokens']
+        ]
+
+    def as_list(value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value or []
+
+    try:
+        token_ids = as_list(market.get('clobTokenIds'))
+        outcomes = as_list(market.get('outcomes'))
+        prices = as_list(market.get('outcomePrices'))
+    except ValueError:
+        return []
+
+    tokens = []
+    for i, token_id in enumerate(token_ids):
+        outcome = outcomes[i] if i < len(outcomes) else 'Unknown'
+        price = float(prices[i]) if i < len(prices) and prices[i] not in (None, '') else 0.0
+        tokens.append((str(token_id), outcome, price))
+    return tokens
+
+
+class MarketCatalogue:
+    def __init__(self, gamma_api=config.GAMMA_API, clob_api=config.CLOB_API,
+                 page_size=config.CATALOGUE_PAGE_SIZE, session=None):
+        self.gamma_api = gamma_api.rstrip('/')
+        self.clob_api = clob_api.rstrip('/')
+        self.page_size = page_size
+
+        # One keep-alive connection pool for every request
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.CATALOGUE_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+        # Newest updatedAt seen by iter_updated_markets (ISO 8601 string)
+        self.last_sync = None
+
+        # (url, params) -> (ETag, Last-Modified, body) for conditional requests
+        self.validators = {}
+        self.not_modified = 0  # 304s answered from self.validators
+
+    def _get(self, url, params=None, conditional=False):
+        """
+        GET url as JSON; conditional=True revalidates the last response with
+        If-None-Match / If-Modified-Since and reuses it on a 304
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        headers = {}
+        if conditional and key in self.validators:
+            etag, last_modified, _ = self.validators[key]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = self.session.get(url, params=params, headers=headers or None,
+                                    timeout=config.CATALOGUE_TIMEOUT_SECONDS)
+        if response.status_code == 304 and headers:
+            self.not_modified += 1
+            return self.validators[key][2]
+        response.raise_for_status()
+        body = response.json()
+
+        if conditional:
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.validators[key] = (etag, last_modified, body)
+            else:
+                self.validators.pop(key, None)
+        return body
+
+    def iter_markets(self, conditional=False, **params):
+        """
+        Yield every gamma market matching params, one page at a time
+
+        Only one page is held in memory; consumers can filter (or stop)
+        while the walk is still in progress. conditional=True makes the
+        first page a conditional request (only that page is kept for it).
+        """
+        offset = 0
+        while True:
+            page = self._get(f"{self.gamma_api}/markets",
+                             dict(params, limit=self.page_size, offset=offset),
+                             conditional=conditional and offset == 0)
+            if not page:
+                return
+
+            yield from page
+
+            if len(page) < self.page_size:
+                return
+            offset += len(page)
+
+    def iter_clob_markets(self, path='/sampling-simplified-markets'):
+        """Yield every CLOB market from a cursor-paginated listing"""
+        cursor = ''
+        while True:
+            params = {'next_cursor': cursor} if cursor else None
+            body = self._get(f"{self.clob_api}{path}", params)
+
+            yield from body.get('data', [])
+
+            cursor = body.get('next_cursor')
+            if not cursor or cursor == CLOB_END_CURSOR:
+                return
+
+    def iter_updated_markets(self, full=False, **params):
+        """
+        Yield only markets updated since the previous call
+
+        Walks gamma newest-updated first and stops paging at the first market
+        older than the last sync. The first call has nothing to compare
+        against, so it walks everything matching params, as does full=True.
+        The first page is requested conditionally: when nothing changed and
+        the API supports it, a poll costs one 304. The sync point only moves
+        once a walk completes, so a failed one is covered by the next.
+        """
+        since = None if full else self.last_sync
+        newest = self.last_sync
+
+        for market in self.iter_markets(conditional=True, order='updatedAt', ascending='false', **params):
+            updated_at = market.get('updatedAt') or ''
+            if since and updated_at and updated_at <= since:
+                break
+
+            if updated_at and (newest is None or updated_at > newest):
+                newest = updated_at
+            yield market
+
+        self.last_sync = newest
+
+    def reset(self):
+        """Forget the sync point: the next iter_updated_markets walks everything"""
+        self.last_sync = None
+
+    def get_markets_for_tokens(self, token_ids):
+        """Targeted gamma lookup for specific CLOB token ids"""
+        token_ids = list(token_ids)
+        return self._get(f"{self.gamma_api}/markets",
+                         {'clob_token_ids': token_ids, 'limit': len(token_ids)})
@@ -0,0 +1,105 @@
+"""
+Market Categorizer
+Sorts market questions into Politics / Financial / Excluded / Other using an
+index built once from config's keyword lists
+
+Keywords only match whole words: 'eth' no longer hits "whether" nor 'bill'
+"billion". Longer keywords may carry a common ending ('election' matches
+"elections", 'democrat' "democratic"), and a final silent e gives way to an
+ending that starts with a vowel ('vote' matches "voter", "voted", "voting").
+Abbreviations of three letters or fewer ('eth', 'fed', 'btc') only take a
+plural s.
+
+A question is split into words by one compiled regex and intersected with
+the set of every allowed form of every keyword; phrases ('federal reserve')
+are indexed by their first word and only checked when that word appears.
+"""
+import re
+import config
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Endings allowed after keywords longer than three letters
+SUFFIXES = ('', 's', 'es', 'd', 'ed', 'ing', 'ic', 'al', 'ial', 'er', 'ers', 'ment', 'ments')
+SHORT_SUFFIXES = ('', 's')
+
+CATEGORY_KEYWORDS = {
+    'Politics': config.POLITICS_KEYWORDS,
+    'Financial': config.FINANCIAL_KEYWORDS,
+    'Excluded': config.EXCLUDE_KEYWORDS,
+}
+
+
+def keyword_forms(keyword):
+    """Every word sequence that counts as this keyword (the last word takes the endings)"""
+    words = WORD.findall(keyword.lower())
+    last = words[-1]
+    suffixes = SUFFIXES if len(keyword) > 3 else SHORT_SUFFIXES
+    forms = []
+    for suffix in suffixes:
+        stem = last
+        if len(keyword) > 3 and last.endswith('e') and suffix[:1] in ('a', 'e', 'i'):
+            stem = last[:-1]  # vote -> voter, voted, voting (not voteer)
+        forms.append(tuple(words[:-1]) + (stem + suffix,))
+    return list(dict.fromkeys(forms))
+
+
+class MarketCategorizer:
+    def __init__(self, categories=None, max_entries=config.MARKET_CACHE_MAX_ENTRIES):
+        """categories: name -> keyword list (default: config's Politics/Financial/Excluded)"""
+        categories = CATEGORY_KEYWORDS if categories is None else categories
+
+        self.words = {}  # single-word form -> {category names}
+        self.phrases = {}  # first word -> [(following words, category name)]
+        for name, keywords in categories.items():
+            for keyword in keywords:
+                for form in keyword_forms(keyword):
+                    if len(form) == 1:
+                        self.words.setdefault(form[0], set()).add(name)
+                    else:
+                        self.phrases.setdefault(form[0], []).append((form[1:], name))
+
+        self.max_entries = max_entries
+        self.memo = {}  # condition_id -> (question, category), oldest first
+
+    def matches(self, question):
+        """Set of category names with at least one keyword in the question"""
+        found = set()
+        words = WORD.findall(question.lower())
+        # Most questions hit no keyword: intersect in C, loop only over hits
+        for word in self.words.keys() & words:
+            found |= self.words[word]
+        if not self.phrases.keys().isdisjoint(words):
+            for i, word in enumerate(words):
+                for rest, name in self.phrases.get(word, ()):
+                    if tuple(words[i + 1:i + 1 + len(rest)]) == rest:
+                        found.add(name)
+        return found
+
+    def categorize(self, question, condition_id=None):
+        """
+        'Politics', 'Financial', 'Excluded' or 'Other'
+
+        Politics needs no excluded keyword alongside it; a financial keyword
+        wins over an excluded one. Results are remembered per condition_id.
+        """
+        if condition_id:
+            cached = self.memo.get(condition_id)
+            if cached is not None and cached[0] == question:
+                return cached[1]
+
+        found = self.matches(question)
+        if 'Politics' in found and 'Excluded' not in found:
+            category = 'Politics'
+        elif 'Financial' in found:
+            category = 'Financial'
+        elif 'Excluded' in found:
+            category = 'Excluded'
+        else:
+            category = 'Other'
+
+        if condition_id:
+            if condition_id not in self.memo and len(self.memo) >= self.max_entries:
+                del self.memo[next(iter(self.memo))]
+            self.memo[condition_id] = (question, category)
+        return category
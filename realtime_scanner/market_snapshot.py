@@ -0,0 +1,48 @@
+"""
+Market Snapshot
+The last seen signal state of every market, so a poll only acts on the
+markets whose signals changed instead of re-checking the whole list
+"""
+
+
+class MarketSnapshot:
+    def __init__(self, signals_for, fields=('price', 'volume_24h'), market_key=lambda m: m.get('conditionId')):
+        """
+        signals_for(market) -> list of signal dicts (each with an 'outcome');
+        a signal counts as changed when any of its fields differ
+        """
+        self.signals_for = signals_for
+        self.fields = fields
+        self.market_key = market_key
+
+        # market key -> {outcome: field values}, only for markets with signals
+        self.state = {}
+
+    def diff(self, markets, full=False):
+        """
+        Signals from markets that are new or changed since they were last seen
+
+        markets is what changed since the previous poll. With full=True it is
+        the whole listing: every current signal is returned (the caller's
+        dedupe decides), and markets missing from it are forgotten.
+        """
+        changed = []
+        seen = {}
+        for market in markets:
+            key = self.market_key(market)
+            signals = self.signals_for(market)
+            current = {signal['outcome']: tuple(signal[field] for field in self.fields) for signal in signals}
+            previous = self.state.get(key, {})
+            changed.extend(signal for signal in signals
+                           if full or previous.get(signal['outcome']) != current[signal['outcome']])
+            seen[key] = current
+
+        if full:
+            self.state = {}
+        for key, current in seen.items():
+            if current:
+                self.state[key] = current
+            else:
+                # Left the criteria: crossing back in is a change again
+                self.state.pop(key, None)
+        return changed
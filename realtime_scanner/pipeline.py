@@ -0,0 +1,97 @@
+"""
+Pipeline Primitives
+Bounded asyncio queues between stages, per-stage worker limits, in-order
+output and a STOP marker that drains in-flight work on shutdown
+"""
+import asyncio
+import traceback
+import config
+
+# Sent down the queues on shutdown; every stage finishes what it holds first
+STOP = object()
+
+# Returned by a stage function to drop an item instead of passing it on
+SKIP = object()
+
+
+class Stage:
+    """
+    One pipeline stage: inbox -> func -> outbox
+
+    Up to `workers` items are processed concurrently, but results leave in
+    the order items arrived, so downstream stages see blocks in order.
+    Blocking functions run in a thread (to_thread=True) so a slow HTTP call
+    never stalls the event loop. A full outbox blocks the stage, which in
+    turn stops it reading its inbox: that's the backpressure.
+    With fan_out=True a returned list is passed on one element at a time.
+    If func raises, on_error(item, exception) is called and the item is
+    dropped; the owner decides how the lost item is recovered.
+    """
+
+    def __init__(self, name, func, inbox, outbox=None, workers=1, to_thread=True, fan_out=False,
+                 on_error=None):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.to_thread = to_thread
+        self.fan_out = fan_out
+        self.on_error = on_error
+
+        # Started tasks in arrival order; the semaphore caps how many
+        self.in_flight = asyncio.Queue()
+        self.slots = asyncio.Semaphore(workers)
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+    async def _process(self, item):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            if self.to_thread:
+                return await asyncio.to_thread(self.func, item)
+            return await self.func(item)
+        except Exception as e:
+            print(f"❌ Error in {self.name} stage: {e}")
+            traceback.print_exc()
+            if self.on_error is not None:
+                self.on_error(item, e)
+            return SKIP
+        finally:
+            self.busy_seconds += loop.time() - start
+
+    async def _dispatch(self):
+        while True:
+            item = await self.inbox.get()
+            if item is STOP:
+                await self.in_flight.put(STOP)
+                return
+
+            await self.slots.acquire()
+            await self.in_flight.put(asyncio.create_task(self._process(item)))
+
+    async def _emit(self):
+        while True:
+            task = await self.in_flight.get()
+            if task is STOP:
+                if self.outbox is not None:
+                    await self.outbox.put(STOP)
+                return
+
+            result = await task
+            self.slots.release()
+            self.processed += 1
+            if result is SKIP or self.outbox is None:
+                continue
+
+            for output in (result if self.fan_out else [result]):
+                await self.outbox.put(output)
+
+    async def run(self):
+        await asyncio.gather(self._dispatch(), self._emit())
+
+
+def make_queue(maxsize=config.PIPELINE_QUEUE_SIZE):
+    """Bounded queue between two stages"""
+    return asyncio.Queue(maxsize=maxsize)
@@ -0,0 +1,255 @@
+"""
+Historical Replay
+Feeds archived fills through the live detection code (WalletTracker ->
+detect_clusters -> SignalDetector, via detection_cycle.run_cycle) on a
+simulated clock, records every signal with its time and entry price, and
+scores the signals against market resolutions.
+
+The clock jumps from fill to fill: fills are grouped into steps of
+step_seconds (the scan interval by default), each step is one detection
+cycle at the step's end, and idle time costs nothing. Positions expire,
+fills dedupe and alerts re-arm on simulated time exactly as they would live.
+
+Fills come from the scanner's fill archive (fill_archive.FillArchive.fills)
+or an exported CSV (or JSON lines) in block order, one per row:
+  timestamp (epoch s), block_number, log_index, tx_hash, wallet, token_id,
+  side (buy/sell), shares, usdc, outcome, question, category
+Resolutions: JSON {token_id: payout per share}, 1 for the winning outcome
+token and 0 for the losers (0.5 for a 50-50 resolution).
+"""
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+import config
+from alert_store import AlertStore
+from detection_cycle import run_cycle
+from fill_dedupe import SeenFills
+from log_decoder import Fill
+from market_categorizer import MarketCategorizer
+from signal_detector import SignalDetector
+from telegram_notifier import TelegramNotifier
+from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+
+DEDUPE_CHUNK_FILLS = 50_000
+
+ARCHIVE_FIELDS = ['timestamp', 'block_number', 'log_index', 'tx_hash', 'wallet', 'token_id',
+                  'side', 'shares', 'usdc', 'outcome', 'question', 'category']
+
+
+def read_archive(path):
+    """Yield the archived fills as Fills, in file order"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = (json.loads(line) for line in f if line.strip()) if path.endswith('.jsonl') \
+            else csv.DictReader(f)
+        fromtimestamp = datetime.fromtimestamp
+        for row in rows:
+            fill = Fill(row['wallet'], str(row['token_id']), row['side'], float(row['shares']),
+                        float(row['usdc']), fromtimestamp(float(row['timestamp'])),
+                        int(row.get('block_number') or 0), int(row.get('log_index') or 0),
+                        row.get('tx_hash') or '0x0')
+            fill.outcome = row.get('outcome') or 'Unknown'
+            fill.question = row.get('question') or 'Unknown'
+            fill.category = row.get('category') or 'Unknown'
+            yield fill
+
+
+def write_archive(path, fills):
+    """Write fills in the archive's CSV layout (timestamps as epoch seconds)"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(ARCHIVE_FIELDS)
+        for fill in fills:
+            writer.writerow([fill.timestamp.timestamp(), fill.block_number, fill.log_index, fill.tx_hash,
+                             fill.wallet, fill.token_id, fill.side, fill.shares, fill.usdc,
+                             fill.outcome, fill.question, fill.category])
+
+
+def load_resolutions(path):
+    """token_id -> payout per share"""
+    with open(path, 'r') as f:
+        return {str(token_id): float(payout) for token_id, payout in json.load(f).items()}
+
+
+class Replay:
+    def __init__(self, step_seconds=config.SCAN_INTERVAL_SECONDS, wallet_store=config.WALLET_STORE):
+        tracker_class = ColumnarWalletTracker if wallet_store == 'columnar' else WalletTracker
+        self.wallet_tracker = tracker_class(
+            min_volume=config.MIN_WALLET_VOLUME,
+            min_conviction=config.MIN_CONVICTION
+        )
+        self.signal_detector = SignalDetector()
+        self.seen_fills = SeenFills()
+        self.categorizer = MarketCategorizer()
+        self.step_seconds = step_seconds
+
+        # Same dedupe as the notifier, in a scratch file of its own
+        self.scratch = tempfile.TemporaryDirectory()
+        self.alert_store = AlertStore(os.path.join(self.scratch.name, 'alerts.jsonl'))
+
+        self.markets = {}  # token_id -> {'question', 'category'}, as archived
+        self.signals = []  # One record per signal, see record_signal
+        self.clock = None  # Simulated time, epoch seconds
+        self.step = None  # Step number of the fills in pending
+        self.pending = []  # Deduped fills waiting for their step to end
+        self.last_cleanup = None
+        self.stats = {'fills': 0, 'duplicate_fills': 0, 'cycles': 0, 'wall_seconds': 0.0,
+                      'first_fill': None, 'last_fill': None}
+
+    def run(self, fills):
+        """Replay fills (in block order) to the end; returns the signal records"""
+        start = time.perf_counter()
+        chunk = []
+        for fill in fills:
+            chunk.append(fill)
+            if len(chunk) >= DEDUPE_CHUNK_FILLS:
+                self.replay_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.replay_chunk(chunk)
+        if self.pending:
+            self.cycle(self.pending, (self.step + 1) * self.step_seconds)
+            self.pending = []
+        self.stats['wall_seconds'] += time.perf_counter() - start
+        return self.signals
+
+    def replay_chunk(self, fills):
+        """
+        Dedupe a chunk of fills in one go, then run them through the cycles
+
+        SeenFills has a fixed cost per call, so calling it once per chunk
+        rather than once per (mostly tiny) cycle keeps it off the profile.
+        """
+        trades, _ = self.seen_fills.filter_new(fills, fills[-1].timestamp.timestamp())
+        self.stats['fills'] += len(fills)
+        self.stats['duplicate_fills'] += len(fills) - len(trades)
+        if self.stats['first_fill'] is None:
+            self.stats['first_fill'] = fills[0].timestamp.timestamp()
+        self.stats['last_fill'] = fills[-1].timestamp.timestamp()
+
+        for trade in trades:
+            # An out-of-order fill joins the current step rather than rewind the clock
+            trade_step = int(trade.timestamp.timestamp() // self.step_seconds)
+            if self.step is None or trade_step > self.step:
+                if self.pending:
+                    self.cycle(self.pending, (self.step + 1) * self.step_seconds)
+                    self.pending = []
+                self.step = trade_step
+            self.pending.append(trade)
+
+    def cycle(self, trades, now):
+        """One detection cycle at simulated time now (epoch s): the live track stage, minus the chain"""
+        self.clock = now
+        for trade in trades:
+            if trade.question not in ('Unknown', 'UNKNOWN') and trade.token_id not in self.markets:
+                category = trade.category
+                if category in ('Unknown', 'UNKNOWN'):
+                    category = self.categorizer.categorize(trade.question)
+                self.markets[trade.token_id] = {'question': trade.question, 'category': category}
+
+        when = datetime.fromtimestamp(now)
+        _, _, signals = run_cycle(self.wallet_tracker, self.signal_detector, trades, self.markets, when)
+        for signal in signals:
+            self.record_signal(signal, now)
+        self.stats['cycles'] += 1
+
+        # Live expiry runs with every persist
+        if self.last_cleanup is None or now - self.last_cleanup >= config.PERSIST_INTERVAL_SECONDS:
+            self.wallet_tracker.cleanup_old_data(hours=config.LOOKBACK_HOURS, now=when)
+            self.last_cleanup = now
+
+    def record_signal(self, signal, now):
+        """Keep a flat record of one signal, noting whether the notifier would have sent it"""
+        key, metrics = TelegramNotifier.signal_key(signal)
+        alerted = key is None or self.alert_store.check_and_record(key, metrics, now)
+
+        if 'cluster' in signal:
+            cluster = signal['cluster']
+            num_wallets, total_volume = cluster['num_wallets'], cluster['total_volume']
+            avg_conviction = cluster['avg_conviction']
+            first_entry, latest_entry = cluster['first_entry'], cluster['latest_entry']
+        else:
+            cluster = signal['position']
+            num_wallets, total_volume = 1, cluster['position_volume']
+            avg_conviction = cluster['conviction']
+            first_entry = latest_entry = cluster['timestamp']
+
+        self.signals.append({
+            'time': now,
+            'pattern': signal['pattern_name'],
+            'type': signal['type'],
+            'conviction': signal['conviction'],
+            'market_id': cluster['market_id'],
+            'outcome': cluster['outcome'],
+            'question': cluster.get('question', 'Unknown'),
+            'category': cluster.get('category', 'Unknown'),
+            'price': cluster.get('price') or 0,
+            'num_wallets': num_wallets,
+            'total_volume': total_volume,
+            'avg_conviction': avg_conviction,
+            'first_entry': first_entry.timestamp(),
+            'latest_entry': latest_entry.timestamp(),
+            'alerted': alerted,
+        })
+
+
+def score(signals, resolutions):
+    """
+    Mark each signal WIN / LOSS / UNVERIFIED and its ROI from the entry price
+
+    ROI is per dollar staked at the signal's price: payout / price - 1.
+    """
+    for record in signals:
+        payout = resolutions.get(record['market_id'])
+        if payout is None or not record['price']:
+            record['status'], record['roi'] = 'UNVERIFIED', None
+            continue
+        record['roi'] = payout / record['price'] - 1
+        record['status'] = 'WIN' if record['roi'] > 0 else 'LOSS'
+    return signals
+
+
+def summarize(signals, key=lambda record: record['pattern']):
+    """Per group: signals, verified, wins, win rate and average ROI"""
+    groups = {}
+    for record in signals:
+        group = groups.setdefault(key(record), {'signals': 0, 'verified': 0, 'wins': 0, 'roi_sum': 0.0})
+        group['signals'] += 1
+        if record.get('status') in ('WIN', 'LOSS'):
+            group['verified'] += 1
+            group['wins'] += record['status'] == 'WIN'
+            group['roi_sum'] += record['roi']
+
+    for group in groups.values():
+        verified = group['verified']
+        group['win_rate'] = group['wins'] / verified if verified else 0
+        group['avg_roi'] = group.pop('roi_sum') / verified if verified else 0
+    return groups
+
+
+def write_signals(path, signals):
+    """
+    Signal records as CSV, in the layout of BACKTEST_BY_WALLET_COUNT.csv
+    (plus time, entry window and pattern columns) so the threshold scripts
+    and threshold_sweep.py can read it
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['wallet_count', 'event_name', 'outcome', 'total_volume', 'avg_conviction',
+                         'entry_price', 'roi', 'category', 'status', 'profit_loss',
+                         'signal_time', 'first_entry', 'latest_entry', 'pattern', 'conviction',
+                         'market_id', 'alerted'])
+        for r in signals:
+            roi = r.get('roi')
+            writer.writerow([
+                r['num_wallets'], r['question'], r['outcome'], round(r['total_volume']),
+                f"{r['avg_conviction'] * 100:.1f}%", round(r['price'], 4),
+                f"{roi * 100:.0f}%" if roi is not None else '', r['category'], r.get('status', 'UNVERIFIED'),
+                round(r['total_volume'] * roi) if roi is not None else '',
+                *(datetime.fromtimestamp(r[name]).strftime('%Y-%m-%d %H:%M:%S')
+                  for name in ('time', 'first_entry', 'latest_entry')),
+                r['pattern'], r['conviction'], r['market_id'], r['alerted'],
+            ])
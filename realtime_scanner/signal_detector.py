@@ -1,185 +1,284 @@
 """
 Signal Detector - Modular Pattern Detection
 Easy to add new signal patterns
+
+Patterns declare the inputs they read and get them as shared NumPy column
+views (see DetectionViews), built once per cycle however many patterns use
+them, so each extra pattern costs a few vector ops rather than another pass
+over the tracker.
 """
-import config
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
+import config
+
+UNKNOWN = ('Unknown', 'UNKNOWN')
+SIGNAL_CATEGORIES = ('Politics', 'Financial')
+
+
+class DetectionViews:
+    """
+    One cycle's inputs as columns, each view built on first use
+
+    clusters  - the new/updated clusters: num_wallets, total_volume,
+                avg_conviction, price, first_entry, latest_entry (epoch s),
+                known (question resolved), signal_category (Politics or
+                Financial) and the cluster dicts as 'records'
+    positions - every position clearing the whale thresholds entered within
+                the last WHALE_ENTRY_WINDOW_SECONDS: position_volume,
+                total_volume, conviction, entered (epoch s), known (outcome
+                resolved) and the position dicts as 'records'
+    trades    - this cycle's buys: usdc, shares, timestamp (epoch s), and
+                wallet / token_id as object arrays
+    """
+
+    def __init__(self, clusters, trades, wallet_tracker, now=None):
+        self.cluster_records = clusters
+        self.trade_records = trades
+        self.wallet_tracker = wallet_tracker
+        self.now = time.time() if now is None else now
+        self.views = {}
+        self.build_seconds = {}
+
+    def empty(self, name):
+        """True if a view is known to have no rows without building it"""
+        if name == 'clusters':
+            return not self.cluster_records
+        if name == 'positions':
+            # Positions can qualify without a buy this cycle (a sell or an
+            # expiry elsewhere shrinks the wallet's total), so always look
+            return False
+        return not any(t.side == 'buy' for t in self.trade_records)
+
+    def get(self, name):
+        view = self.views.get(name)
+        if view is None:
+            start = time.perf_counter()
+            view = self.views[name] = getattr(self, f'_build_{name}')()
+            self.build_seconds[name] = time.perf_counter() - start
+        return view
+
+    def _build_clusters(self):
+        records = self.cluster_records
+        n = len(records)
+        return {
+            'records': records,
+            'num_wallets': np.fromiter((c['num_wallets'] for c in records), dtype=np.int64, count=n),
+            'total_volume': np.fromiter((c['total_volume'] for c in records), dtype=np.float64, count=n),
+            'avg_conviction': np.fromiter((c['avg_conviction'] for c in records), dtype=np.float64, count=n),
+            'price': np.fromiter((c.get('price') or 0 for c in records), dtype=np.float64, count=n),
+            'first_entry': np.fromiter((c['first_entry'].timestamp() for c in records), dtype=np.float64, count=n),
+            'latest_entry': np.fromiter((c['latest_entry'].timestamp() for c in records), dtype=np.float64, count=n),
+            'known': np.fromiter((c.get('question', 'Unknown') not in UNKNOWN for c in records),
+                                 dtype=np.bool_, count=n),
+            'signal_category': np.fromiter((c.get('category') in SIGNAL_CATEGORIES for c in records),
+                                           dtype=np.bool_, count=n),
+        }
+
+    def _build_positions(self):
+        # Both stores answer this without a per-position Python pass: the dict
+        # tracker keeps an index at the whale thresholds, the columnar one masks
+        entered_after = datetime.fromtimestamp(self.now - config.WHALE_ENTRY_WINDOW_SECONDS)
+        records = self.wallet_tracker.get_high_conviction_wallets(
+            config.WHALE_MIN_VOLUME, config.WHALE_MIN_CONVICTION, entered_after=entered_after)
+        n = len(records)
+        return {
+            'records': records,
+            'position_volume': np.fromiter((p['position_volume'] for p in records), dtype=np.float64, count=n),
+            'total_volume': np.fromiter((p['total_volume'] for p in records), dtype=np.float64, count=n),
+            'conviction': np.fromiter((p['conviction'] for p in records), dtype=np.float64, count=n),
+            'entered': np.fromiter((p['timestamp'].timestamp() for p in records), dtype=np.float64, count=n),
+            'known': np.fromiter((p['outcome'] not in UNKNOWN for p in records), dtype=np.bool_, count=n),
+        }
+
+    def _build_trades(self):
+        buys = [t for t in self.trade_records if t.side == 'buy']
+        n = len(buys)
+        return {
+            'usdc': np.fromiter((t.usdc for t in buys), dtype=np.float64, count=n),
+            'shares': np.fromiter((t.shares for t in buys), dtype=np.float64, count=n),
+            'timestamp': np.fromiter((t.timestamp.timestamp() for t in buys), dtype=np.float64, count=n),
+            'wallet': np.array([t.wallet for t in buys], dtype=object),
+            'token_id': np.array([t.token_id for t in buys], dtype=object),
+        }
+
 
 class SignalDetector:
-    def __init__(self):
+    def __init__(self, workers=config.PATTERN_WORKERS):
         self.patterns = []
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.timings = {}  # pattern or view name -> {'calls', 'seconds', 'signals'}
         self.register_default_patterns()
 
-    def register_pattern(self, pattern_func, name, description):
-        """Register a new signal detection pattern"""
+    def register_pattern(self, pattern_func, name, description, inputs=None):
+        """
+        Register a new signal detection pattern
+
+        inputs: the DetectionViews it reads, e.g. ('clusters',); it's then
+        called as pattern_func(views). Without inputs it's called with the
+        raw (clusters, trades, wallet_tracker) like before.
+        """
         self.patterns.append({
             'func': pattern_func,
             'name': name,
-            'description': description
+            'description': description,
+            'inputs': tuple(inputs) if inputs is not None else None
         })
 
     def register_default_patterns(self):
-        """Register default patterns"""
-
-        # Pattern 1: High Conviction Signal (BACKTESTED: 64% WR, +341% ROI)
-        self.register_pattern(
-            self.pattern_high_conviction_cluster,
-            "High Conviction Signal",
-            "Wallet(s) with $1K+ volume, 80%+ conviction on same outcome"
-        )
-
-        # Pattern 2: Whale Entry (NOT BACKTESTED - DISABLED)
-        # self.register_pattern(
-        #     self.pattern_whale_entry,
-        #     "Whale Entry",
-        #     "Single wallet $10K+ with 80%+ conviction"
-        # )
-
-        # Pattern 3: Synchronized Entry (NOT BACKTESTED - DISABLED)
-        # self.register_pattern(
-        #     self.pattern_synchronized_entry,
-        #     "Synchronized Entry",
-        #     "5+ wallets enter within 1 hour window"
-        # )
-
-    def detect_all(self, clusters, trades, wallet_tracker):
-        """Run all pattern detections"""
-        signals = []
+        """Register the patterns listed in config.SIGNAL_PATTERNS"""
+        defaults = {
+            # Pattern 1: High Conviction Signal (BACKTESTED: 64% WR, +341% ROI)
+            'high_conviction_cluster': (
+                self.pattern_high_conviction_cluster,
+                "High Conviction Signal",
+                "Wallet(s) with $1K+ volume, 80%+ conviction on same outcome",
+                ('clusters',)
+            ),
+            # Pattern 2: Whale Entry (NOT BACKTESTED - off by default)
+            'whale_entry': (
+                self.pattern_whale_entry,
+                "Whale Entry",
+                "Single wallet $10K+ with 80%+ conviction",
+                ('positions',)
+            ),
+            # Pattern 3: Synchronized Entry (NOT BACKTESTED - off by default)
+            'synchronized_entry': (
+                self.pattern_synchronized_entry,
+                "Synchronized Entry",
+                "5+ wallets enter within 1 hour window",
+                ('clusters',)
+            ),
+        }
+        for key in config.SIGNAL_PATTERNS:
+            self.register_pattern(*defaults[key])
+
+    def detect_all(self, clusters, trades, wallet_tracker, now=None):
+        """Run all pattern detections (now: epoch seconds, default the wall clock)"""
+        views = DetectionViews(clusters, trades, wallet_tracker, now)
+
+        # A pattern over nothing but empty views can't find anything: skip it
+        # (most cycles have no new/updated cluster)
+        patterns = [p for p in self.patterns
+                    if p['inputs'] is None or not all(views.empty(name) for name in p['inputs'])]
+
+        # Build every declared view up front, once, so patterns running in
+        # parallel share them instead of racing to build their own
+        for name in dict.fromkeys(view for p in patterns for view in p['inputs'] or ()):
+            views.get(name)
+        for name, seconds in views.build_seconds.items():
+            self._time(f"view:{name}", seconds, 0)
+
+        def run(pattern):
+            start = time.perf_counter()
+            if pattern['inputs'] is None:
+                detected = pattern['func'](clusters, trades, wallet_tracker)
+            else:
+                detected = pattern['func'](views)
+            return detected or [], time.perf_counter() - start
+
+        if self.executor is not None and len(patterns) > 1:
+            results = list(self.executor.map(run, patterns))
+        else:
+            results = [run(pattern) for pattern in patterns]
 
-        for pattern in self.patterns:
-            detected = pattern['func'](clusters, trades, wallet_tracker)
-            if detected:
-                for signal in detected:
-                    signal['pattern_name'] = pattern['name']
-                    signal['pattern_description'] = pattern['description']
-                signals.extend(detected)
+        signals = []
+        for pattern, (detected, seconds) in zip(patterns, results):
+            self._time(pattern['name'], seconds, len(detected))
+            for signal in detected:
+                signal['pattern_name'] = pattern['name']
+                signal['pattern_description'] = pattern['description']
+            signals.extend(detected)
 
         return signals
 
+    def _time(self, name, seconds, signals):
+        timing = self.timings.setdefault(name, {'calls': 0, 'seconds': 0.0, 'signals': 0})
+        timing['calls'] += 1
+        timing['seconds'] += seconds
+        timing['signals'] += signals
+
     # ========== PATTERN FUNCTIONS ==========
 
-    def pattern_high_conviction_cluster(self, clusters, trades, wallet_tracker):
+    def pattern_high_conviction_cluster(self, views):
         """
         Pattern 1: High Conviction Signal
         YOUR MAIN PATTERN - ANY wallet(s) with $1K+, 80%+ conviction
         """
-        signals = []
-
-        for cluster in clusters:
-            # Skip unknown markets (inactive, no data available)
-            if cluster.get('question', 'Unknown') in ['Unknown', 'UNKNOWN']:
-                continue
-
-            # Filter by category
-            if 'category' not in cluster or cluster['category'] not in ['Politics', 'Financial']:
-                continue
-
-            # Filter by price (skip if no valid price)
-            price = cluster.get('price', 0)
-            if price == 0 or price > config.MAX_PRICE:
-                continue
-
-            # Calculate conviction score based on wallets, volume, and price
-            num_wallets = cluster['num_wallets']
-            price = cluster.get('price', 1)
-            total_volume = cluster['total_volume']
-            avg_conviction = cluster['avg_conviction']
-
-            # Score based on multiple factors
-            if num_wallets >= 20 and price < 0.30:
-                conviction_score = "VERY HIGH"
-            elif num_wallets >= 10 and price < 0.40:
-                conviction_score = "VERY HIGH"
-            elif num_wallets >= 5 and price < 0.50:
-                conviction_score = "HIGH"
-            elif num_wallets >= 3 and avg_conviction >= 0.90:
-                conviction_score = "HIGH"
-            elif num_wallets >= 2 and total_volume >= 5000:
-                conviction_score = "MEDIUM"
-            elif num_wallets == 1 and total_volume >= 5000 and avg_conviction >= 0.90:
-                conviction_score = "MEDIUM"
-            else:
-                conviction_score = "LOW"
-
-            signals.append({
-                'type': 'cluster',
-                'conviction': conviction_score,
-                'cluster': cluster
-            })
-
-        return signals
-
-    def pattern_whale_entry(self, clusters, trades, wallet_tracker):
+        c = views.get('clusters')
+        num_wallets, price = c['num_wallets'], c['price']
+        total_volume, avg_conviction = c['total_volume'], c['avg_conviction']
+
+        # Known market, tracked category, valid underdog price
+        selected = c['known'] & c['signal_category'] & (price > 0) & (price <= config.MAX_PRICE)
+
+        # Score based on multiple factors (first matching rule wins)
+        conviction_score = np.select([
+            (num_wallets >= 20) & (price < 0.30),
+            (num_wallets >= 10) & (price < 0.40),
+            (num_wallets >= 5) & (price < 0.50),
+            (num_wallets >= 3) & (avg_conviction >= 0.90),
+            (num_wallets >= 2) & (total_volume >= 5000),
+            (num_wallets == 1) & (total_volume >= 5000) & (avg_conviction >= 0.90),
+        ], ["VERY HIGH", "VERY HIGH", "HIGH", "HIGH", "MEDIUM", "MEDIUM"], default="LOW")
+
+        return [{
+            'type': 'cluster',
+            'conviction': str(conviction_score[i]),
+            'cluster': c['records'][i]
+        } for i in np.nonzero(selected)[0]]
+
+    def pattern_whale_entry(self, views):
         """
         Pattern 2: Whale Entry
         Single large wallet ($10K+) with high conviction
         """
-        signals = []
-
-        high_conviction = wallet_tracker.get_high_conviction_wallets(
-            min_volume=10000,
-            min_conviction=0.80
-        )
+        p = views.get('positions')
 
-        for position in high_conviction:
-            # Skip unknown markets/outcomes
-            if position.get('outcome', 'Unknown') in ['Unknown', 'UNKNOWN']:
-                continue
+        # New entry (within last hour) by a $10K+ wallet, 80%+ on this position
+        selected = (p['known'] & (p['total_volume'] >= config.WHALE_MIN_VOLUME)
+                    & (p['conviction'] >= config.WHALE_MIN_CONVICTION)
+                    & (views.now - p['entered'] <= config.WHALE_ENTRY_WINDOW_SECONDS))
 
-            # Check if this is a new entry (within last hour)
-            time_since_entry = (datetime.now() - position['timestamp']).total_seconds() / 3600
+        return [{
+            'type': 'whale',
+            'conviction': 'HIGH',
+            'position': p['records'][i]
+        } for i in np.nonzero(selected)[0]]
 
-            if time_since_entry <= 1:  # Last hour
-                signals.append({
-                    'type': 'whale',
-                    'conviction': 'HIGH',
-                    'position': position
-                })
-
-        return signals
-
-    def pattern_synchronized_entry(self, clusters, trades, wallet_tracker):
+    def pattern_synchronized_entry(self, views):
         """
         Pattern 3: Synchronized Entry
         Multiple wallets entering within short time window
         """
-        signals = []
+        c = views.get('clusters')
 
-        for cluster in clusters:
-            # Skip unknown markets
-            if cluster.get('question', 'Unknown') in ['Unknown', 'UNKNOWN']:
-                continue
+        # 5+ wallets, all entered within 1 hour
+        time_window = (c['latest_entry'] - c['first_entry']) / 3600
+        selected = c['known'] & (c['num_wallets'] >= 5) & (time_window <= 1)
 
-            if cluster['num_wallets'] < 5:
-                continue
+        return [{
+            'type': 'synchronized',
+            'conviction': 'HIGH',
+            'cluster': c['records'][i],
+            'time_window_hours': float(time_window[i])
+        } for i in np.nonzero(selected)[0]]
 
-            # Check if entries are synchronized (within 1 hour)
-            time_window = (cluster['latest_entry'] - cluster['first_entry']).total_seconds() / 3600
-
-            if time_window <= 1:  # All entered within 1 hour
-                signals.append({
-                    'type': 'synchronized',
-                    'conviction': 'HIGH',
-                    'cluster': cluster,
-                    'time_window_hours': time_window
-                })
-
-        return signals
-
-    # ========== ADD YOUR OWN PATTERNS HERE ==========
-
-    def pattern_velocity_scaling(self, clusters, trades, wallet_tracker):
+    def pattern_velocity_scaling(self, views):
         """
         Pattern 4: Velocity Scaling (PLACEHOLDER - Add your logic)
-        Wallets progressively increasing position size
+        Wallets progressively increasing position size (inputs: 'trades')
         """
         # TODO: Implement velocity scaling detection
         return []
 
-    def pattern_layering(self, clusters, trades, wallet_tracker):
+    def pattern_layering(self, views):
         """
         Pattern 5: Layering (PLACEHOLDER - Add your logic)
-        Multiple entries at different price levels
+        Multiple entries at different price levels (inputs: 'trades')
         """
         # TODO: Implement layering detection
         return []
+
+    # ========== ADD YOUR OWN PATTERNS HERE ==========
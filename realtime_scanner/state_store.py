@@ -0,0 +1,180 @@
+"""
+Wallet Tracker State Store
+Compact binary snapshots plus an append-only per-cycle journal, so a save
+writes only what changed and a restart is one bulk load plus a short replay
+
+Files (prefix = config.STATE_FILE_PREFIX):
+- <prefix>.snapshot.npz  dictionary-encoded position columns, replaced atomically
+- <prefix>.journal       framed records: [len u32][crc32 u32][zlib(json)]
+
+A chain checkpoint can ride along in the same record or snapshot, so the
+scanner's position and the tracker state it describes commit together.
+"""
+import json
+import os
+import struct
+import zlib
+import numpy as np
+import config
+
+RECORD_HEADER = struct.Struct('<II')
+
+
+def encode_vocab(values):
+    """str list -> compact utf-8 bytes column (1 byte/char instead of numpy's 4)"""
+    return np.array([v.encode() for v in values], dtype=np.bytes_)
+
+
+def decode_vocab(column):
+    return [v.decode() for v in column.tolist()]
+
+
+class StateStore:
+    def __init__(self, prefix=config.STATE_FILE_PREFIX,
+                 snapshot_every=config.STATE_SNAPSHOT_EVERY_CYCLES,
+                 journal_max_bytes=config.STATE_JOURNAL_MAX_BYTES):
+        self.prefix = prefix
+        self.snapshot_path = prefix + '.snapshot.npz'
+        self.journal_path = prefix + '.journal'
+        self.snapshot_every = snapshot_every
+        self.journal_max_bytes = journal_max_bytes
+
+        # Sequence number of the last cycle written (snapshot or journal)
+        self.seq = 0
+        self.cycles_since_snapshot = 0
+        # State changed outside the journal (legacy import): snapshot on next save
+        self.snapshot_requested = False
+
+    # ========== WRITING ==========
+
+    def request_snapshot(self):
+        """Make the next save a full snapshot"""
+        self.snapshot_requested = True
+
+    def should_snapshot(self):
+        """Snapshot every N cycles, or sooner if requested or the journal has grown large"""
+        if self.snapshot_requested or self.cycles_since_snapshot + 1 >= self.snapshot_every:
+            return True
+        try:
+            return os.path.getsize(self.journal_path) >= self.journal_max_bytes
+        except OSError:
+            return False
+
+    def append(self, ops, checkpoint=None):
+        """
+        Append one cycle's changes to the journal, in the order they happened
+
+        ops: ('+', wallet, market_id, outcome, volume_usd, entry_epoch, shares)
+        for a trade, ('-', wallet, market_id, outcome) for an evicted position,
+        ('~', wallet, market_id, outcome, volume_usd, shares) for a reverted trade
+        """
+        self.seq += 1
+        record = {'seq': self.seq, 'ops': ops}
+        if checkpoint is not None:
+            record['checkpoint'] = checkpoint
+        payload = zlib.compress(json.dumps(record, separators=(',', ':')).encode())
+
+        with open(self.journal_path, 'ab') as f:
+            f.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.cycles_since_snapshot += 1
+
+    def write_snapshot(self, wallets, tokens, outcomes, pos_wallet, pos_token, pos_outcome,
+                       pos_volume, pos_entry, pos_shares, checkpoint=None):
+        """
+        Replace the snapshot with the full state (atomic temp + rename)
+
+        Positions are integer codes into the wallet/token/outcome vocabularies.
+        Journal records up to this snapshot's seq are skipped on replay, so a
+        crash between the rename and the journal reset is harmless.
+        """
+        self.seq += 1
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                seq=np.int64(self.seq),
+                wallets=encode_vocab(wallets),
+                tokens=encode_vocab(tokens),
+                outcomes=encode_vocab(outcomes),
+                pos_wallet=np.asarray(pos_wallet, dtype=np.int32),
+                pos_token=np.asarray(pos_token, dtype=np.int32),
+                pos_outcome=np.asarray(pos_outcome, dtype=np.int16),
+                pos_volume=np.asarray(pos_volume, dtype=np.float64),
+                pos_entry=np.asarray(pos_entry, dtype=np.float64),
+                pos_shares=np.asarray(pos_shares, dtype=np.float64),
+                checkpoint=np.bytes_(json.dumps(checkpoint).encode()),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        # Everything in the journal is now covered by the snapshot
+        with open(self.journal_path, 'wb'):
+            pass
+        self.cycles_since_snapshot = 0
+        self.snapshot_requested = False
+
+    # ========== RECOVERY ==========
+
+    def load_snapshot(self):
+        """Snapshot columns as a dict (vocabularies decoded to str lists), or None"""
+        try:
+            with np.load(self.snapshot_path) as state:
+                snapshot = {
+                    'seq': int(state['seq']),
+                    'wallets': decode_vocab(state['wallets']),
+                    'tokens': decode_vocab(state['tokens']),
+                    'outcomes': decode_vocab(state['outcomes']),
+                }
+                for name in ('pos_wallet', 'pos_token', 'pos_outcome', 'pos_volume', 'pos_entry'):
+                    snapshot[name] = state[name]
+                # Snapshots from before entry prices were tracked have no shares
+                snapshot['pos_shares'] = (state['pos_shares'] if 'pos_shares' in state.files
+                                          else np.zeros(len(snapshot['pos_volume'])))
+                snapshot['checkpoint'] = (json.loads(state['checkpoint'].item())
+                                          if 'checkpoint' in state.files else None)
+        except FileNotFoundError:
+            return None
+
+        self.seq = max(self.seq, snapshot['seq'])
+        return snapshot
+
+    def read_journal(self, after_seq=0):
+        """
+        Journal records newer than after_seq, oldest first
+
+        A torn record at the tail (crash mid-append) is dropped and truncated
+        away so later appends start on a clean boundary.
+        """
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+
+        records = []
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+
+            record = json.loads(zlib.decompress(payload))
+            if record['seq'] > after_seq:
+                records.append(record)
+            self.seq = max(self.seq, record['seq'])
+            offset = start + length
+
+        if offset < len(data):
+            print(f"Dropping {len(data) - offset} bytes of torn journal tail")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(offset)
+
+        self.cycles_since_snapshot = len(records)
+        return records
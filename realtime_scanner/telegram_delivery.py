@@ -0,0 +1,269 @@
+"""
+Telegram Delivery
+Async sendMessage over one pooled aiohttp session, a token-bucket rate limit,
+retries that honour Telegram's retry_after, and a durable outbox so queued
+alerts survive crashes and Telegram outages
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import aiohttp
+import config
+
+# Telegram rejects longer messages
+MAX_MESSAGE_CHARS = 4096
+# Bad token (401/404) or the bot was blocked / removed from the chat (403):
+# no retry can succeed, so delivery stops and the outbox keeps the messages
+FATAL_STATUSES = (401, 403, 404)
+COALESCE_SEPARATOR = "\n━━━━━━━━━━━━━━━━━━━━\n"
+
+
+class TokenBucket:
+    """`rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Outbox:
+    """
+    Messages waiting for delivery, in an append-only JSON-lines file
+
+    {"op": "queue", "id": n, "text": ..., "label": ...}
+    {"op": "sent", "ids": [n, ...]}
+
+    Every append is fsynced, so a queued alert is never lost and a delivered
+    one is never queued again. The file is rewritten (pending messages only)
+    once it passes compact_bytes. Appends may come from worker threads (the
+    fsync is kept off the event loop), so file and state change under a lock.
+    """
+
+    def __init__(self, path=config.TELEGRAM_OUTBOX_FILE, compact_bytes=config.TELEGRAM_OUTBOX_COMPACT_BYTES):
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self.pending = {}  # id -> record, oldest first
+        self.next_id = 1
+        self.exists = os.path.exists(path)
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Crash mid-append: drop the partial line before appending after it
+                print(f"⚠️  Dropping torn record at the end of {self.path}")
+                self._rewrite()
+                return
+            self._apply(record)
+
+    def _apply(self, record):
+        if record['op'] == 'queue':
+            self.pending[record['id']] = record
+            self.next_id = max(self.next_id, record['id'] + 1)
+        elif record['op'] == 'sent':
+            for id_ in record['ids']:
+                self.pending.pop(id_, None)
+
+    def _append(self, record):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.exists = True
+
+    def queue(self, text, label=''):
+        """Add a message"""
+        with self.lock:
+            record = {'op': 'queue', 'id': self.next_id, 'text': text, 'label': label}
+            self._append(record)
+            self._apply(record)
+
+    def mark_sent(self, ids):
+        with self.lock:
+            self._append({'op': 'sent', 'ids': list(ids)})
+            for id_ in ids:
+                self.pending.pop(id_, None)
+            if os.path.getsize(self.path) >= self.compact_bytes:
+                self._rewrite()
+
+    def compact(self):
+        """Rewrite the file as just the pending messages (atomic)"""
+        with self.lock:
+            self._rewrite()
+
+    def _rewrite(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            for record in self.pending.values():
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.exists = True
+
+
+class TelegramSender:
+    """
+    Drains an Outbox into one chat, oldest first
+
+    A single delivery loop keeps the chat's messages in order; the session's
+    connection pool keeps the TLS connection to the Bot API alive between
+    sends. When several alerts are waiting (a burst), up to
+    TELEGRAM_COALESCE_MAX of them go out as one message.
+    """
+
+    def __init__(self, bot_token, chat_id, outbox, api_url=config.TELEGRAM_API_URL):
+        self.url = f"{api_url}/bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+        self.outbox = outbox
+        self.bucket = TokenBucket(config.TELEGRAM_MESSAGES_PER_MINUTE / 60, config.TELEGRAM_BURST)
+
+        self.wakeup = None  # asyncio.Event, created inside the running loop
+        self.loop = None
+        self.closing = False
+        self.fatal = None  # Why delivery stopped for good (a FATAL_STATUSES answer)
+        self.deadline = None
+        self.solo_ids = set()  # Rejected as part of a coalesced message: send alone
+
+        self.messages_sent = 0
+        self.alerts_sent = 0
+        self.dropped = 0
+
+    def notify(self):
+        """New messages are in the outbox (callable from any thread)"""
+        if self.wakeup is not None:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def close(self, timeout=config.TELEGRAM_SHUTDOWN_FLUSH_SECONDS):
+        """Finish what's queued (for up to timeout seconds), then stop"""
+        self.closing = True
+        self.deadline = time.monotonic() + timeout
+        self.notify()
+
+    def _out_of_time(self, delay=0):
+        return self.closing and time.monotonic() + delay > self.deadline
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        connector = aiohttp.TCPConnector(limit=config.TELEGRAM_POOL_SIZE, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=config.TELEGRAM_TIMEOUT_SECONDS)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            while True:
+                if not self.outbox.pending:
+                    if self.closing:
+                        return
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                if self._out_of_time():
+                    print(f"⚠️  {len(self.outbox.pending)} Telegram messages left in the outbox for next start")
+                    return
+
+                ids, text = self._next_message()
+                await self._deliver(session, ids, text)
+                if self.fatal:
+                    print(f"❌ Telegram delivery stopped ({self.fatal}), "
+                          f"{len(self.outbox.pending)} messages kept in the outbox")
+                    return
+
+    def _next_message(self):
+        """Oldest pending message, merged with the ones behind it if there's a backlog"""
+        records = iter(list(self.outbox.pending.values()))
+        first = next(records)
+        ids, texts = [first['id']], [first['text']]
+        if not config.TELEGRAM_COALESCE or first['id'] in self.solo_ids:
+            return ids, first['text']
+
+        length = len(first['text'])
+        for record in records:
+            if len(ids) >= config.TELEGRAM_COALESCE_MAX or record['id'] in self.solo_ids:
+                break
+            length += len(COALESCE_SEPARATOR) + len(record['text'])
+            if length + 40 > MAX_MESSAGE_CHARS:  # Room for the header
+                break
+            ids.append(record['id'])
+            texts.append(record['text'])
+
+        if len(ids) == 1:
+            return ids, first['text']
+        return ids, f"📦 <b>{len(ids)} signals</b>\n" + COALESCE_SEPARATOR.join(texts)
+
+    async def _deliver(self, session, ids, text):
+        """Send one message, retrying until it's accepted, rejected for good, or we run out of time"""
+        payload = {
+            'chat_id': self.chat_id,
+            'text': text,
+            'parse_mode': 'HTML',
+            'disable_web_page_preview': True,
+        }
+        attempt = 0
+
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with session.post(self.url, json=payload) as resp:
+                    status = resp.status
+                    body = await resp.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                status, body = None, {'description': str(e) or type(e).__name__}
+
+            if status == 200:
+                labels = [self.outbox.pending[id_].get('label') for id_ in ids]
+                await asyncio.to_thread(self.outbox.mark_sent, ids)
+                self.messages_sent += 1
+                self.alerts_sent += len(ids)
+                print(f"✅ Sent alert: {', '.join(label for label in labels if label) or 'message'}")
+                return
+
+            description = (body or {}).get('description', '')
+            if status == 400:
+                # Telegram won't ever take this text (bad HTML, too long...)
+                if len(ids) > 1:
+                    self.solo_ids.update(ids)  # Retry the parts one by one
+                    return
+                print(f"❌ Telegram rejected message {ids[0]}: {description}")
+                await asyncio.to_thread(self.outbox.mark_sent, ids)
+                self.dropped += 1
+                return
+
+            if status in FATAL_STATUSES:
+                self.fatal = f"{status}: {description}"
+                return
+
+            if status == 429:
+                delay = (body.get('parameters') or {}).get('retry_after', 1)
+            else:
+                attempt += 1
+                delay = min(config.TELEGRAM_RETRY_BASE_SECONDS * 2 ** (attempt - 1),
+                            config.TELEGRAM_RETRY_MAX_SECONDS)
+                delay *= 0.5 + random.random() / 2  # Jitter
+
+            print(f"Telegram send failed ({status or 'network'}: {description}), retrying in {delay:.1f}s")
+            if self._out_of_time(delay):
+                return
+            await asyncio.sleep(delay)
@@ -1,71 +1,112 @@
 """
 Telegram Notifier
-Sends formatted alerts to Telegram
-Uses direct requests API (matches proven p-signals implementation)
+Formats alerts and queues them for async delivery (see telegram_delivery.py)
 """
+import asyncio
+import os
 import requests
 import config
 import json
-from datetime import datetime
+from alert_store import AlertStore
+from telegram_delivery import Outbox, TelegramSender
 
 class TelegramNotifier:
-    def __init__(self):
+    def __init__(self, outbox_file=config.TELEGRAM_OUTBOX_FILE, api_url=config.TELEGRAM_API_URL,
+                 alert_store=None):
         self.bot_token = config.TELEGRAM_BOT_TOKEN if config.TELEGRAM_BOT_TOKEN else None
         self.chat_id = config.TELEGRAM_CHAT_ID if config.TELEGRAM_CHAT_ID else None
-        self.sent_signals = set()  # Track sent signals to avoid duplicates
-        self.load_sent_history()
-
-    def load_sent_history(self):
-        """Load previously sent signals"""
+        self.api_url = api_url
+
+        # When each signal was last alerted, to skip repeats
+        if alert_store is None:
+            migrate = not os.path.exists(config.ALERT_STORE_FILE)
+            alert_store = AlertStore()
+            if migrate:
+                self.import_sent_history(alert_store)
+        self.alert_store = alert_store
+
+        # Messages queued but not yet delivered
+        self.outbox = Outbox(outbox_file)
+        self.sender = None
+        if self.bot_token and self.chat_id:
+            self.sender = TelegramSender(self.bot_token, self.chat_id, self.outbox, api_url)
+        self.delivery = None
+
+    def import_sent_history(self, alert_store):
+        """One-time import of the clusters in the old sent_signals.json (IDs were market_outcome_wallets)"""
         try:
             with open('sent_signals.json', 'r') as f:
-                data = json.load(f)
-                self.sent_signals = set(data)
+                legacy = json.load(f)
         except FileNotFoundError:
-            pass
+            return
 
-    def save_sent_history(self):
-        """Save sent signals history"""
-        with open('sent_signals.json', 'w') as f:
-            json.dump(list(self.sent_signals), f)
+        largest = {}
+        for signal_id in legacy:
+            key, _, num_wallets = signal_id.rpartition('_')
+            if key and num_wallets.isdigit():
+                largest[key] = max(largest.get(key, 0), int(num_wallets))
+        for key, num_wallets in largest.items():
+            alert_store.record(f"cluster_{key}", {'num_wallets': num_wallets})
+
+    def start(self):
+        """Start delivering queued messages (call from inside the event loop)"""
+        if self.sender is None:
+            return
+        if self.outbox.exists:
+            self.outbox.compact()
+        if self.outbox.pending:
+            print(f"📡 Resending {len(self.outbox.pending)} undelivered Telegram messages")
+        self.delivery = asyncio.create_task(self.sender.run())
+
+    async def close(self, timeout=config.TELEGRAM_SHUTDOWN_FLUSH_SECONDS):
+        """Deliver what's still queued (up to timeout seconds); the rest waits in the outbox"""
+        if self.delivery is None:
+            return
+        self.sender.close(timeout)
+        try:
+            await asyncio.wait_for(self.delivery, timeout + config.TELEGRAM_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"⚠️  {len(self.outbox.pending)} Telegram messages left in the outbox for next start")
+        self.delivery = None
 
     def send_signal_alert(self, signal):
-        """Send Telegram alert for a detected signal"""
-        if not self.bot_token or not self.chat_id:
-            print(f"[TELEGRAM] Would send: {signal['pattern_name']}")
+        """Queue a Telegram alert for a detected signal (delivered in the background)"""
+        key, metrics = self.signal_key(signal)
+        if key is not None and not self.alert_store.should_alert(key, metrics):
             return
 
-        # Create unique ID for signal
-        if signal['type'] == 'cluster':
-            cluster = signal['cluster']
-            signal_id = f"{cluster['market_id']}_{cluster['outcome']}_{cluster['num_wallets']}"
-        else:
-            signal_id = f"{signal['type']}_{datetime.now().isoformat()}"
-
-        # Check if already sent
-        if signal_id in self.sent_signals:
+        if not self.bot_token or not self.chat_id:
+            print(f"[TELEGRAM] Would send: {signal['pattern_name']}")
             return
 
-        # Format message
-        message = self.format_signal_message(signal)
-
-        # Send using direct Telegram API (matches p-signals pattern)
-        success = self._send_telegram(message)
+        if key is not None:
+            self.alert_store.record(key, metrics)
+        self._queue(self.format_signal_message(signal), signal['pattern_name'])
 
-        if success:
-            # Track as sent
-            self.sent_signals.add(signal_id)
-            self.save_sent_history()
-            print(f"✅ Sent alert: {signal['pattern_name']}")
-        else:
-            print(f"❌ Failed to send Telegram alert")
+    @staticmethod
+    def signal_key(signal):
+        """(dedupe key, metrics that can re-alert it) for a signal; key None = always alert"""
+        if signal['type'] in ('cluster', 'synchronized'):
+            cluster = signal['cluster']
+            return (f"{signal['type']}_{cluster['market_id']}_{cluster['outcome']}",
+                    {'num_wallets': cluster['num_wallets'], 'total_volume': cluster['total_volume']})
+        if signal['type'] == 'whale':
+            position = signal['position']
+            return (f"whale_{position['wallet']}_{position['market_id']}_{position['outcome']}",
+                    {'position_volume': position['position_volume']})
+        return None, None
+
+    def _queue(self, message, label=''):
+        self.outbox.queue(message, label)
+        if self.sender:
+            self.sender.notify()
 
     def _send_telegram(self, message, parse_mode="HTML"):
-        """Send message via direct Telegram API call (matches p-signals implementation)"""
+        """Send one message right away, blocking (connection test only; alerts go through the outbox)"""
         if not self.bot_token or not self.chat_id:
             return False
 
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        url = f"{self.api_url}/bot{self.bot_token}/sendMessage"
         payload = {
             "chat_id": self.chat_id,
             "text": message,
@@ -74,7 +115,7 @@ class TelegramNotifier:
         }
 
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = requests.post(url, json=payload, timeout=config.TELEGRAM_TIMEOUT_SECONDS)
             return resp.status_code == 200
         except Exception as e:
             print(f"Telegram error: {e}")
@@ -285,14 +326,12 @@ Monitoring Polygon blockchain for insider signals!
 • Min Conviction: {int(config.MIN_CONVICTION*100)}%
 • Min Wallets: {config.MIN_WALLETS_CLUSTER}+
 
-<b>Scan Interval:</b> Every {config.SCAN_INTERVAL_SECONDS//60} minutes
+<b>Scan Mode:</b> {'Streaming (every block)' if config.SCAN_MODE == 'stream' else f'Every {config.SCAN_INTERVAL_SECONDS} seconds'}
 
 Ready to detect signals! 🚀
 """
 
-        success = self._send_telegram(message)
-        if not success:
-            print(f"Failed to send startup message")
+        self._queue(message, 'startup message')
 
     def send_daily_summary(self, stats):
         """Send daily summary of detected signals"""
@@ -310,9 +349,7 @@ Ready to detect signals! 🚀
 <b>Status:</b> ✅ Running
 """
 
-        success = self._send_telegram(message)
-        if not success:
-            print(f"Failed to send summary")
+        self._queue(message, 'daily summary')
 
     def test_connection(self):
         """Test Telegram connection (matches p-signals pattern)"""
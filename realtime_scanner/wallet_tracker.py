@@ -4,48 +4,255 @@ Monitors wallets and calculates conviction levels
 """
 from collections import defaultdict
 from datetime import datetime, timedelta
+import heapq
 import json
+import math
+import config
+from cluster_aggregation import PositionBatch
+from state_store import StateStore
+
+# A reverted position with less than this left is treated as empty
+REVERT_DUST_USD = 1e-6
 
 class WalletTracker:
-    def __init__(self):
+    def __init__(self, min_volume=1000, min_conviction=0.80):
+        # Thresholds the incremental conviction index is maintained for
+        self.min_volume = min_volume
+        self.min_conviction = min_conviction
+
         # wallet_address -> {market_id -> {outcome -> volume}}
         self.wallet_positions = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
 
         # wallet_address -> total_volume
         self.wallet_totals = defaultdict(float)
 
-        # market_id -> {outcome -> [wallet_addresses]}
+        # market_id -> {outcome -> {wallets qualifying at min_volume/min_conviction}}
         self.market_clusters = defaultdict(lambda: defaultdict(set))
 
+        # wallet_address -> {(market_id, outcome)} it currently qualifies on
+        self.wallet_qualifying = {}
+
+        # The same at the whale pattern's thresholds (no clusters kept), so
+        # that pattern reads an index rather than scanning every position
+        self.whale_thresholds = (config.WHALE_MIN_VOLUME, config.WHALE_MIN_CONVICTION)
+        self.wallet_whale = {}
+
+        # (market_id, outcome) whose members or member volumes changed since
+        # the last detect_clusters(changed_only=True)
+        self.changed_clusters = set()
+
         # Track when positions were entered
         self.position_timestamps = {}
 
-    def add_trade(self, wallet, market_id, outcome, volume_usd, timestamp=None):
-        """Add a trade to tracker"""
+        # (wallet, market_id, outcome) -> outcome tokens bought, so the
+        # volume-weighted entry price is position volume / shares
+        self.position_shares = {}
+
+        # Min-heap of (entry_time, wallet, market_id, outcome) so cleanup
+        # pops only what expired; entries whose key was since removed or
+        # re-entered are skipped when popped
+        self.expiry_heap = []
+
+        # Changes since the last save_state, written as one journal record
+        self.journal = []
+        self.state_store = None
+
+        # Chain checkpoint saved with this state (set by save_state/load_state)
+        self.checkpoint = None
+
+    def add_trade(self, wallet, market_id, outcome, volume_usd, timestamp=None, shares=0):
+        """Add a trade to tracker (shares = outcome tokens bought, for the entry price)"""
         if timestamp is None:
             timestamp = datetime.now()
 
         # Update wallet position
         self.wallet_positions[wallet][market_id][outcome] += volume_usd
-        self.wallet_totals[wallet] += volume_usd
+        self._recompute_total(wallet)
 
         # Track timestamp
         key = (wallet, market_id, outcome)
         if key not in self.position_timestamps:
             self.position_timestamps[key] = timestamp
+            heapq.heappush(self.expiry_heap, (timestamp, wallet, market_id, outcome))
+        if shares:
+            self.position_shares[key] = self.position_shares.get(key, 0) + shares
+        self.journal.append(('+', wallet, market_id, outcome, volume_usd, timestamp.timestamp(), shares))
 
-    def get_wallet_conviction(self, wallet, market_id, outcome):
-        """Calculate wallet's conviction on specific position"""
+        # Only this wallet's convictions moved
+        self._refresh_wallet(wallet)
+
+    def revert_trade(self, wallet, market_id, outcome, volume_usd, shares=0):
+        """Undo an add_trade whose block was reorged out"""
+        if self._revert(wallet, market_id, outcome, volume_usd, shares):
+            self.journal.append(('~', wallet, market_id, outcome, volume_usd, shares))
+            self._recompute_total(wallet)
+            self._refresh_wallet(wallet)
+
+    def _revert(self, wallet, market_id, outcome, volume_usd, shares=0):
+        """
+        Take a trade back out of its position (totals/index left to the caller)
+
+        A position with nothing left (bar float dust) is dropped entirely,
+        the same as an eviction. Returns False if the position is already gone.
+        """
+        outcomes = self.wallet_positions.get(wallet, {}).get(market_id)
+        if outcomes is None or outcome not in outcomes:
+            return False
+
+        key = (wallet, market_id, outcome)
+        remaining = outcomes[outcome] - volume_usd
+        if remaining <= REVERT_DUST_USD:
+            self._remove_position(wallet, market_id, outcome)
+            return True
+
+        outcomes[outcome] = remaining
+        if shares and key in self.position_shares:
+            remaining_shares = self.position_shares[key] - shares
+            if remaining_shares > 0:
+                self.position_shares[key] = remaining_shares
+            else:
+                del self.position_shares[key]
+        return True
+
+    def _recompute_total(self, wallet):
+        """
+        Set a wallet's total to the exact sum of its positions
+
+        Running += / -= on floats drifts and never gets back to zero after
+        evictions; a wallet only has a handful of positions, so summing them
+        is cheap. Wallets with no positions left are dropped entirely.
+        """
+        markets = self.wallet_positions.get(wallet)
+        if not markets:
+            self.wallet_positions.pop(wallet, None)
+            self.wallet_totals.pop(wallet, None)
+            return
+
+        self.wallet_totals[wallet] = math.fsum(
+            volume for outcomes in markets.values() for volume in outcomes.values()
+        )
+
+    def _refresh_wallet(self, wallet):
+        """
+        Recompute which positions of one wallet clear the index thresholds
+
+        A trade changes the wallet's total, so every one of its positions is
+        re-checked - but only this wallet's, never the whole tracker.
+        """
+        old = self.wallet_qualifying.get(wallet, set())
+        new = set()
+        whale = set()
+        whale_volume, whale_conviction = self.whale_thresholds
+
+        total_volume = self.wallet_totals.get(wallet, 0)
+        if total_volume >= min(self.min_volume, whale_volume) and total_volume > 0:
+            for market_id, outcomes in self.wallet_positions.get(wallet, {}).items():
+                for outcome, position_volume in outcomes.items():
+                    conviction = position_volume / total_volume
+                    if total_volume >= self.min_volume and conviction >= self.min_conviction:
+                        new.add((market_id, outcome))
+                    if total_volume >= whale_volume and conviction >= whale_conviction:
+                        whale.add((market_id, outcome))
+
+        if whale:
+            self.wallet_whale[wallet] = whale
+        else:
+            self.wallet_whale.pop(wallet, None)
+
+        for market_id, outcome in old - new:
+            members = self.market_clusters[market_id][outcome]
+            members.discard(wallet)
+            if not members:
+                del self.market_clusters[market_id][outcome]
+                if not self.market_clusters[market_id]:
+                    del self.market_clusters[market_id]
+
+        for market_id, outcome in new - old:
+            self.market_clusters[market_id][outcome].add(wallet)
+
+        if new:
+            self.wallet_qualifying[wallet] = new
+        else:
+            self.wallet_qualifying.pop(wallet, None)
+
+        # Membership changes, and member volume changes, both move the cluster
+        self.changed_clusters |= old | new
+
+    def _uses_index(self, min_volume, min_conviction):
+        """True if a query's thresholds are the ones the index is kept for"""
+        return min_volume == self.min_volume and min_conviction == self.min_conviction
+
+    def _position_index(self, min_volume, min_conviction):
+        """wallet -> qualifying (market_id, outcome) index for these thresholds, or None"""
+        if self._uses_index(min_volume, min_conviction):
+            return self.wallet_qualifying
+        if (min_volume, min_conviction) == self.whale_thresholds:
+            return self.wallet_whale
+        return None
+
+    def _position(self, wallet, market_id, outcome):
+        """Position record for one wallet/market/outcome"""
         position_volume = self.wallet_positions[wallet][market_id][outcome]
         total_volume = self.wallet_totals[wallet]
+        return {
+            'wallet': wallet,
+            'market_id': market_id,
+            'outcome': outcome,
+            'position_volume': position_volume,
+            'total_volume': total_volume,
+            'conviction': position_volume / total_volume,
+            'timestamp': self.position_timestamps.get(
+                (wallet, market_id, outcome),
+                datetime.now()
+            ),
+            'entry_price': self.get_entry_price(wallet, market_id, outcome)
+        }
+
+    def get_entry_price(self, wallet, market_id, outcome):
+        """Volume-weighted entry price of a position, or None if no shares are known"""
+        shares = self.position_shares.get((wallet, market_id, outcome))
+        if not shares:
+            return None
+        return self.wallet_positions[wallet][market_id][outcome] / shares
+
+    def get_wallet_conviction(self, wallet, market_id, outcome):
+        """Calculate wallet's conviction on specific position"""
+        position_volume = self.wallet_positions.get(wallet, {}).get(market_id, {}).get(outcome, 0)
+        total_volume = self.wallet_totals.get(wallet, 0)
 
         if total_volume == 0:
             return 0
 
         return position_volume / total_volume
 
-    def get_high_conviction_wallets(self, min_volume=1000, min_conviction=0.80):
-        """Find wallets with high conviction (80%+ on single position)"""
+    def get_position(self, wallet, market_id, outcome):
+        """Position record for one wallet/market/outcome, or None if it has none"""
+        if outcome not in self.wallet_positions.get(wallet, {}).get(market_id, {}):
+            return None
+        return self._position(wallet, market_id, outcome)
+
+    def num_wallets(self):
+        """Wallets with at least one live position"""
+        return len(self.wallet_totals)
+
+    def get_high_conviction_wallets(self, min_volume=1000, min_conviction=0.80, entered_after=None):
+        """
+        Find wallets with high conviction (80%+ on single position)
+
+        entered_after (datetime): only positions entered at or after it; they
+        are filtered before any position record is built
+        """
+        index = self._position_index(min_volume, min_conviction)
+        if index is not None:
+            # Read straight from an incrementally maintained index
+            timestamps = self.position_timestamps
+            return [
+                self._position(wallet, market_id, outcome)
+                for wallet, keys in index.items()
+                for market_id, outcome in keys
+                if entered_after is None or timestamps[(wallet, market_id, outcome)] >= entered_after
+            ]
+
         high_conviction = []
 
         for wallet, total_volume in self.wallet_totals.items():
@@ -57,112 +264,223 @@ class WalletTracker:
                 for outcome, position_volume in outcomes.items():
                     conviction = position_volume / total_volume
 
-                    if conviction >= min_conviction:
-                        high_conviction.append({
-                            'wallet': wallet,
-                            'market_id': market_id,
-                            'outcome': outcome,
-                            'position_volume': position_volume,
-                            'total_volume': total_volume,
-                            'conviction': conviction,
-                            'timestamp': self.position_timestamps.get(
-                                (wallet, market_id, outcome),
-                                datetime.now()
-                            )
-                        })
+                    if conviction >= min_conviction and (
+                            entered_after is None
+                            or self.position_timestamps[(wallet, market_id, outcome)] >= entered_after):
+                        high_conviction.append(self._position(wallet, market_id, outcome))
 
         return high_conviction
 
-    def detect_clusters(self, min_wallets=5, min_volume=1000, min_conviction=0.80):
-        """Find clusters of high-conviction wallets on same market"""
-        # Get all high conviction wallets
-        high_conviction = self.get_high_conviction_wallets(min_volume, min_conviction)
-
-        # Group by market and outcome
-        clusters = defaultdict(list)
-        for position in high_conviction:
-            key = (position['market_id'], position['outcome'])
-            clusters[key].append(position)
-
-        # Filter to clusters with min_wallets+
-        signals = []
-        for (market_id, outcome), wallets in clusters.items():
-            if len(wallets) >= min_wallets:
-                signals.append({
-                    'market_id': market_id,
-                    'outcome': outcome,
-                    'num_wallets': len(wallets),
-                    'wallets': wallets,
-                    'total_volume': sum(w['position_volume'] for w in wallets),
-                    'avg_conviction': sum(w['conviction'] for w in wallets) / len(wallets),
-                    'first_entry': min(w['timestamp'] for w in wallets),
-                    'latest_entry': max(w['timestamp'] for w in wallets)
-                })
-
-        return signals
-
-    def cleanup_old_data(self, hours=72):
-        """Remove positions older than X hours"""
-        cutoff = datetime.now() - timedelta(hours=hours)
-
-        old_keys = [
-            key for key, timestamp in self.position_timestamps.items()
-            if timestamp < cutoff
-        ]
-
-        for wallet, market_id, outcome in old_keys:
-            volume = self.wallet_positions[wallet][market_id][outcome]
-
-            # Remove from tracking
-            del self.wallet_positions[wallet][market_id][outcome]
-            self.wallet_totals[wallet] -= volume
-            del self.position_timestamps[(wallet, market_id, outcome)]
-
-            # Clean empty dicts
-            if not self.wallet_positions[wallet][market_id]:
-                del self.wallet_positions[wallet][market_id]
-            if not self.wallet_positions[wallet]:
-                del self.wallet_positions[wallet]
-                del self.wallet_totals[wallet]
-
-    def save_state(self, filename='wallet_tracker_state.json'):
-        """Save tracker state to file"""
-        state = {
-            'wallet_positions': {
-                w: {m: dict(o) for m, o in markets.items()}
-                for w, markets in self.wallet_positions.items()
-            },
-            'wallet_totals': dict(self.wallet_totals),
-            'position_timestamps': {
-                f"{k[0]}_{k[1]}_{k[2]}": v.isoformat()
-                for k, v in self.position_timestamps.items()
-            }
-        }
+    def detect_clusters(self, min_wallets=5, min_volume=1000, min_conviction=0.80,
+                        changed_only=False):
+        """
+        Find clusters of high-conviction wallets on same market
 
-        with open(filename, 'w') as f:
-            json.dump(state, f, indent=2)
+        With the tracker's own thresholds the members come straight from the
+        maintained index; changed_only=True further limits it to clusters
+        whose membership or volume changed since the last changed_only call.
+        Aggregates are computed in one vectorized pass (cluster_aggregation);
+        a cluster's wallets() lists member addresses, resolved on first call.
+        """
+        batch = PositionBatch()
 
-    def load_state(self, filename='wallet_tracker_state.json'):
-        """Load tracker state from file"""
-        try:
-            with open(filename, 'r') as f:
-                state = json.load(f)
+        if self._uses_index(min_volume, min_conviction):
+            if changed_only:
+                keys = self.changed_clusters
+                self.changed_clusters = set()
+            else:
+                keys = [
+                    (market_id, outcome)
+                    for market_id, outcomes in self.market_clusters.items()
+                    for outcome in outcomes
+                ]
+
+            positions, totals, timestamps, shares = (self.wallet_positions, self.wallet_totals,
+                                                     self.position_timestamps, self.position_shares)
+            for market_id, outcome in keys:
+                members = self.market_clusters.get(market_id, {}).get(outcome)
+                if not members or len(members) < min_wallets:
+                    continue
+
+                wallets = list(members)
+                volumes = [positions[w][market_id][outcome] for w in wallets]
+                batch.add_group(
+                    market_id, outcome, wallets, volumes,
+                    [v / totals[w] for w, v in zip(wallets, volumes)],
+                    [timestamps[(w, market_id, outcome)].timestamp() for w in wallets],
+                    [shares.get((w, market_id, outcome), 0) for w in wallets],
+                )
+
+            return batch.clusters(min_wallets)
+
+        for wallet, total_volume in self.wallet_totals.items():
+            if total_volume < min_volume:
+                continue
+
+            for market_id, outcomes in self.wallet_positions[wallet].items():
+                for outcome, position_volume in outcomes.items():
+                    conviction = position_volume / total_volume
+                    if conviction >= min_conviction:
+                        key = (wallet, market_id, outcome)
+                        batch.add(wallet, market_id, outcome, position_volume, conviction,
+                                  self.position_timestamps[key].timestamp(),
+                                  self.position_shares.get(key, 0))
+
+        return batch.clusters(min_wallets)
+
+    def cleanup_old_data(self, hours=72, now=None):
+        """Remove positions older than X hours before now (cost is O(expired positions))"""
+        cutoff = (now or datetime.now()) - timedelta(hours=hours)
 
-            # Restore wallet positions
-            for wallet, markets in state['wallet_positions'].items():
-                for market_id, outcomes in markets.items():
-                    for outcome, volume in outcomes.items():
-                        self.wallet_positions[wallet][market_id][outcome] = volume
+        heap = self.expiry_heap
+        touched = set()
 
-            # Restore totals
-            self.wallet_totals = defaultdict(float, state['wallet_totals'])
+        while heap and heap[0][0] < cutoff:
+            timestamp, wallet, market_id, outcome = heapq.heappop(heap)
+            key = (wallet, market_id, outcome)
 
-            # Restore timestamps
-            for key_str, timestamp_str in state['position_timestamps'].items():
-                wallet, market_id, outcome = key_str.split('_', 2)
-                key = (wallet, market_id, outcome)
-                self.position_timestamps[key] = datetime.fromisoformat(timestamp_str)
+            # Stale heap entry: position already gone or re-entered later
+            if self.position_timestamps.get(key) != timestamp:
+                continue
+            self._remove_position(wallet, market_id, outcome)
+            self.journal.append(('-', *key))
+            touched.add(wallet)
+
+        for wallet in touched:
+            self._recompute_total(wallet)
+            self._refresh_wallet(wallet)
+
+    def _remove_position(self, wallet, market_id, outcome):
+        """Drop one position (totals and index are refreshed by the caller)"""
+        self.position_timestamps.pop((wallet, market_id, outcome), None)
+        self.position_shares.pop((wallet, market_id, outcome), None)
+
+        # .get() so the defaultdicts don't recreate empty entries
+        markets = self.wallet_positions.get(wallet)
+        if markets is None:
+            return
+        outcomes = markets.get(market_id)
+        if outcomes is not None:
+            outcomes.pop(outcome, None)
+            if not outcomes:
+                del markets[market_id]
+
+    def _store(self, prefix):
+        if self.state_store is None or (prefix is not None and prefix != self.state_store.prefix):
+            self.state_store = StateStore(prefix) if prefix is not None else StateStore()
+        return self.state_store
+
+    def save_state(self, prefix=None, checkpoint=None):
+        """
+        Persist this cycle's changes
 
+        Normally one journal record of the trades added and positions evicted
+        since the last save; every few cycles a full snapshot instead.
+        checkpoint (JSON-able) is written in the same record, so it always
+        matches the state it was saved with.
+        """
+        store = self._store(prefix)
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        if store.should_snapshot():
+            store.write_snapshot(*self._snapshot_columns(), checkpoint=self.checkpoint)
+        elif self.journal or checkpoint is not None:
+            store.append(self.journal, checkpoint)
+        self.journal = []
+
+    def _snapshot_columns(self):
+        """Positions dictionary-encoded as (vocabularies, code/value columns)"""
+        wallets, tokens, outcomes = {}, {}, {}
+        pos_wallet, pos_token, pos_outcome, pos_volume, pos_entry, pos_shares = [], [], [], [], [], []
+
+        for key, entered in self.position_timestamps.items():
+            wallet, market_id, outcome = key
+            pos_wallet.append(wallets.setdefault(wallet, len(wallets)))
+            pos_token.append(tokens.setdefault(market_id, len(tokens)))
+            pos_outcome.append(outcomes.setdefault(outcome, len(outcomes)))
+            pos_volume.append(self.wallet_positions[wallet][market_id][outcome])
+            pos_entry.append(entered.timestamp())
+            pos_shares.append(self.position_shares.get(key, 0))
+
+        return (list(wallets), list(tokens), list(outcomes),
+                pos_wallet, pos_token, pos_outcome, pos_volume, pos_entry, pos_shares)
+
+    def load_state(self, prefix=None):
+        """Load tracker state: latest snapshot, then replay the journal after it"""
+        store = self._store(prefix)
+        snapshot = store.load_snapshot()
+        records = store.read_journal(snapshot['seq'] if snapshot else 0)
+        if snapshot is None and not records:
+            if not self._load_legacy_json(store.prefix + '.json'):
+                return False
+            # The import is in no journal record: the next save must snapshot it
+            store.request_snapshot()
             return True
+
+        self.__init__(self.min_volume, self.min_conviction)
+        self.state_store = store
+
+        if snapshot is not None:
+            self.checkpoint = snapshot['checkpoint']
+            wallets, tokens, outcomes = snapshot['wallets'], snapshot['tokens'], snapshot['outcomes']
+            positions = self.wallet_positions
+            timestamps = self.position_timestamps
+            fromtimestamp = datetime.fromtimestamp
+            for w, t, o, volume, entered, shares in zip(
+                    snapshot['pos_wallet'].tolist(), snapshot['pos_token'].tolist(),
+                    snapshot['pos_outcome'].tolist(), snapshot['pos_volume'].tolist(),
+                    snapshot['pos_entry'].tolist(), snapshot['pos_shares'].tolist()):
+                key = (wallets[w], tokens[t], outcomes[o])
+                positions[key[0]][key[1]][key[2]] = volume
+                timestamps[key] = fromtimestamp(entered)
+                if shares:
+                    self.position_shares[key] = shares
+
+        # Same effect as add_trade / cleanup, without per-trade index upkeep
+        for record in records:
+            for op in record['ops']:
+                if op[0] == '+':
+                    _, wallet, market_id, outcome, volume, entered, *shares = op
+                    key = (wallet, market_id, outcome)
+                    self.wallet_positions[wallet][market_id][outcome] += volume
+                    self.position_timestamps.setdefault(key, datetime.fromtimestamp(entered))
+                    if shares and shares[0]:
+                        self.position_shares[key] = self.position_shares.get(key, 0) + shares[0]
+                elif op[0] == '~':
+                    self._revert(*op[1:])
+                else:
+                    self._remove_position(*op[1:])
+            self.checkpoint = record.get('checkpoint', self.checkpoint)
+
+        self._rebuild_indexes()
+        return True
+
+    def _load_legacy_json(self, filename='wallet_tracker_state.json'):
+        """One-time import of the old pretty-printed JSON state"""
+        try:
+            with open(filename, 'r') as f:
+                state = json.load(f)
         except FileNotFoundError:
             return False
+
+        # Timestamps are looked up by rebuilding the composite key from the
+        # nested positions, never by splitting it (outcomes may contain '_')
+        timestamps = state['position_timestamps']
+        for wallet, markets in state['wallet_positions'].items():
+            for market_id, outcomes in markets.items():
+                for outcome, volume in outcomes.items():
+                    self.wallet_positions[wallet][market_id][outcome] = volume
+                    entered = timestamps.get(f"{wallet}_{market_id}_{outcome}")
+                    self.position_timestamps[(wallet, market_id, outcome)] = \
+                        datetime.fromisoformat(entered) if entered else datetime.now()
+
+        self._rebuild_indexes()
+        return True
+
+    def _rebuild_indexes(self):
+        """Rebuild the expiry heap, totals and conviction index from positions"""
+        self.expiry_heap = [(ts, *key) for key, ts in self.position_timestamps.items()]
+        heapq.heapify(self.expiry_heap)
+        for wallet in list(self.wallet_positions):
+            self._recompute_total(wallet)
+            self._refresh_wallet(wallet)
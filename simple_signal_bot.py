@@ -6,101 +6,99 @@ You bet manually on Kalshi or wherever you want
 """
 
 import os
+import sys
 import json
-import requests
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from telegram import Bot
 import asyncio
 
+# Share the market catalogue client with the realtime scanner
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'realtime_scanner'))
+from market_catalogue import MarketCatalogue, parse_market_tokens
+from alert_store import AlertStore
+from market_categorizer import MarketCategorizer
+from market_snapshot import MarketSnapshot
+
 # Configuration
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
-CHECK_INTERVAL = int(os.environ.get('CHECK_INTERVAL_MINUTES', '60'))
+POLL_SECONDS = int(os.environ.get('POLL_SECONDS', '30'))  # Incremental poll: only markets updated since the last
+CHECK_INTERVAL = int(os.environ.get('CHECK_INTERVAL_MINUTES', '60'))  # Full rescan of every market
 
 # Polymarket API
 POLYMARKET_API = "https://gamma-api.polymarket.com"
 
-# State file to track sent alerts
-SENT_ALERTS_FILE = 'sent_alerts.json'
+# One pooled client for every poll
+catalogue = MarketCatalogue(gamma_api=POLYMARKET_API)
+
+# Same keyword categories as the realtime scanner
+categorizer = MarketCategorizer()
+
+# State file to track sent alerts: a market alerts again after 24 hours,
+# or sooner if its 24h volume reaches the next tier
+SENT_ALERTS_FILE = 'sent_alerts.jsonl'
+LEGACY_SENT_ALERTS_FILE = 'sent_alerts.json'
+VOLUME_TIERS = [50000, 100000, 250000, 1000000]
 
 def load_sent_alerts():
-    """Load previously sent alerts"""
-    if os.path.exists(SENT_ALERTS_FILE):
+    """Open the alert store, importing the old sent_alerts.json once"""
+    migrate = not os.path.exists(SENT_ALERTS_FILE)
+    alerts = AlertStore(SENT_ALERTS_FILE, ttl_seconds=24 * 3600, tiers={'volume_24h': VOLUME_TIERS})
+    if migrate and os.path.exists(LEGACY_SENT_ALERTS_FILE):
         try:
-            with open(SENT_ALERTS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_sent_alerts(alerts):
-    """Save sent alerts"""
-    with open(SENT_ALERTS_FILE, 'w') as f:
-        json.dump(alerts, f, indent=2)
-
-def get_politics_signals():
-    """Fetch Politics category markets from Polymarket"""
-    try:
-        response = requests.get(f"{POLYMARKET_API}/markets", timeout=10)
-        response.raise_for_status()
-        markets = response.json()
-
-        signals = []
-        for market in markets:
-            # Filter to Politics
-            question = market.get('question', '').lower()
-            category = market.get('groupItemTitle', '').lower()
-
-            is_politics = (
-                category == 'politics' or
-                'trump' in question or
-                'government' in question or
-                'shutdown' in question or
-                'congress' in question or
-                'senate' in question or
-                'president' in question or
-                'biden' in question or
-                'cabinet' in question or
-                'white house' in question
-            )
-
-            # Exclude unwanted categories
-            is_excluded = (
-                'bitcoin' in question or
-                'crypto' in question or
-                'gold' in question or
-                'silver' in question or
-                'game' in question or
-                'gta' in question or
-                'nfl' in question or
-                'nba' in question
-            )
-
-            if not is_politics or is_excluded:
-                continue
-
-            tokens = market.get('tokens', [])
-            for token in tokens:
-                price = float(token.get('price', 1))
-                volume_24h = float(market.get('volume24hr', 0))
-
-                # Signal criteria: Politics, underdogs, volume spike
-                if price <= 0.60 and volume_24h >= 50000:
-                    signals.append({
-                        'question': market.get('question'),
-                        'outcome': token.get('outcome'),
-                        'price': price,
-                        'volume_24h': volume_24h,
-                        'market_id': market.get('conditionId'),
-                        'end_date': market.get('endDate'),
-                        'url': f"https://polymarket.com/event/{market.get('slug', '')}"
-                    })
-
-        return signals
-    except Exception as e:
-        print(f"Error fetching markets: {e}")
+            with open(LEGACY_SENT_ALERTS_FILE, 'r') as f:
+                for signal_id, sent_time in json.load(f).items():
+                    alerts.record(signal_id, now=datetime.fromisoformat(sent_time).timestamp())
+        except (ValueError, AttributeError):
+            pass
+    return alerts
+
+sent_alerts = load_sent_alerts()
+
+def market_signals(market):
+    """Signals for one gamma market: Politics, underdog price, 24h volume spike"""
+    # Filter to Politics, dropping unwanted categories
+    found = categorizer.matches(market.get('question', ''))
+    category = market.get('groupItemTitle', '').lower()
+
+    is_politics = category == 'politics' or 'Politics' in found
+    is_excluded = 'Excluded' in found
+
+    if not is_politics or is_excluded:
         return []
 
+    signals = []
+    volume_24h = float(market.get('volume24hr', 0) or 0)
+    for token_id, outcome, price in parse_market_tokens(market):
+        # Signal criteria: Politics, underdogs, volume spike
+        if 0 < price <= 0.60 and volume_24h >= 50000:
+            signals.append({
+                'question': market.get('question'),
+                'outcome': outcome,
+                'price': price,
+                'volume_24h': volume_24h,
+                'market_id': market.get('conditionId'),
+                'end_date': market.get('endDate'),
+                'url': f"https://polymarket.com/event/{market.get('slug', '')}"
+            })
+    return signals
+
+# Signal state of every market as of the last poll
+snapshot = MarketSnapshot(market_signals)
+
+def get_politics_signals(full=False):
+    """
+    Politics signals that are new or changed since the last poll
+
+    A poll only fetches markets updated since the previous one (usually one
+    conditional page) and compares them with the snapshot. full=True walks
+    every market, catching 24h volumes that changed without an update.
+    Fetch errors propagate, so a failed full check isn't taken as done.
+    """
+    markets = catalogue.iter_updated_markets(full=full, active='true', closed='false')
+    return snapshot.diff(markets, full=full)
+
 def calculate_conviction(price, volume_24h):
     """Calculate conviction level"""
     if price < 0.30 and volume_24h >= 100000:
@@ -174,49 +172,38 @@ May also be on Polymarket: <a href="{signal['url']}">View here</a>
         print(f"Error sending Telegram: {e}")
         return False
 
-async def check_and_alert():
-    """Main function - check signals and send alerts"""
+async def check_and_alert(bot, full=False):
+    """Main function - check changed markets for signals and send alerts"""
 
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        print("❌ Error: TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID not set!")
-        return
+    if full:
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Full check for Politics signals...")
 
-    bot = Bot(token=TELEGRAM_BOT_TOKEN)
-
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checking for Politics signals...")
-
-    # Load sent alerts
-    sent_alerts = load_sent_alerts()
-
-    # Get current signals
-    signals = get_politics_signals()
-    print(f"Found {len(signals)} potential signals")
+    # Signals from markets that changed since the last poll
+    signals = get_politics_signals(full)
+    if full or signals:
+        print(f"Found {len(signals)} {'potential' if full else 'new/changed'} signals")
 
     new_alerts = 0
     for signal in signals:
         # Create unique ID
         signal_id = f"{signal['market_id']}_{signal['outcome']}"
 
-        # Check if already sent (within 24 hours)
-        if signal_id in sent_alerts:
-            sent_time = datetime.fromisoformat(sent_alerts[signal_id])
-            if datetime.now() - sent_time < timedelta(hours=24):
-                continue
+        # Check if already sent (within 24 hours, at this volume tier)
+        metrics = {'volume_24h': signal['volume_24h']}
+        if not sent_alerts.should_alert(signal_id, metrics):
+            continue
 
         # Send alert
         print(f"🚨 New signal: {signal['question']} - {signal['outcome']}")
 
         if await send_signal_alert(bot, signal):
-            sent_alerts[signal_id] = datetime.now().isoformat()
+            sent_alerts.record(signal_id, metrics)
             new_alerts += 1
             await asyncio.sleep(1)  # Rate limit
 
-    # Save updated alerts
-    save_sent_alerts(sent_alerts)
-
     if new_alerts > 0:
         print(f"✅ Sent {new_alerts} new alert(s)")
-    else:
+    elif full:
         print("✅ No new signals")
 
 async def send_startup_message():
@@ -254,10 +241,10 @@ I'll monitor Polymarket for Politics signals 24/7 and alert you!
 3. Bet manually based on conviction
 4. Track your results
 
-Check interval: Every {interval} minutes
+Check interval: changed markets every {poll} seconds, full check every {interval} minutes
 
 Ready to find signals! 🚀
-""".format(interval=CHECK_INTERVAL)
+""".format(poll=POLL_SECONDS, interval=CHECK_INTERVAL)
 
     try:
         await bot.send_message(
@@ -276,22 +263,34 @@ async def main_loop():
     print("="*60)
     print("POLITICS SIGNAL BOT - ALERTS ONLY")
     print("="*60)
-    print(f"Check interval: Every {CHECK_INTERVAL} minutes")
+    print(f"Check interval: changed markets every {POLL_SECONDS}s, full check every {CHECK_INTERVAL} minutes")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("You'll get Telegram alerts to bet manually")
     print("="*60)
     print()
 
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+        print("❌ Error: TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID not set!")
+        return
+
+    bot = Bot(token=TELEGRAM_BOT_TOKEN)
+    last_full_check = None
+
     while True:
+        now = time.monotonic()
+        full = last_full_check is None or now - last_full_check >= CHECK_INTERVAL * 60
         try:
-            await check_and_alert()
+            await check_and_alert(bot, full)
+            if full:
+                last_full_check = now
+                print(f"Polling changed markets every {POLL_SECONDS}s, next full check in {CHECK_INTERVAL} minutes...\n")
         except Exception as e:
+            # A failed full check stays due and is retried on the next poll
             print(f"❌ Error: {e}")
             import traceback
             traceback.print_exc()
 
-        print(f"Next check in {CHECK_INTERVAL} minutes...\n")
-        await asyncio.sleep(CHECK_INTERVAL * 60)
+        await asyncio.sleep(POLL_SECONDS)
 
 if __name__ == "__main__":
     try:
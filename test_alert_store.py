@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the alert dedupe store: TTL expiry, tiered re-alerts, and the
+append-only file surviving restarts and compaction
+"""
+import sys
+import os
+import tempfile
+import time
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+from alert_store import AlertStore
+
+TIERS = {'num_wallets': [5, 10, 20], 'total_volume': [10_000, 50_000]}
+HOUR = 3600
+
+
+def make_store(path, ttl_hours=48):
+    return AlertStore(path, ttl_seconds=ttl_hours * HOUR, tiers=TIERS)
+
+
+def test_tiers_and_ttl():
+    """Repeats are skipped until a metric reaches a new tier or the entry expires"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(os.path.join(tmp, 'alerts.jsonl'))
+        cluster = lambda wallets, volume: {'num_wallets': wallets, 'total_volume': volume}
+
+        assert store.check_and_record('m1_Yes', cluster(5, 12_000), now=0)
+        assert not store.check_and_record('m1_Yes', cluster(6, 12_000), now=HOUR)
+        assert not store.check_and_record('m1_Yes', cluster(9, 40_000), now=2 * HOUR)
+        assert store.check_and_record('m1_Yes', cluster(10, 40_000), now=3 * HOUR)  # Wallet tier
+        assert store.check_and_record('m1_Yes', cluster(10, 60_000), now=4 * HOUR)  # Volume tier
+        assert not store.check_and_record('m1_Yes', cluster(10, 60_000), now=51 * HOUR)
+        assert store.check_and_record('m1_Yes', cluster(10, 60_000), now=52 * HOUR)  # Expired
+
+        # Shrinking never re-alerts; untiered metrics are ignored
+        assert not store.check_and_record('m1_Yes', {'num_wallets': 5, 'other': 1e9}, now=53 * HOUR)
+        # Keys without metrics only expire
+        assert store.check_and_record('whale_1', now=0)
+        assert not store.check_and_record('whale_1', now=47 * HOUR)
+    print("✅ Re-alerts on a new tier or after the TTL, not before")
+
+
+def test_persistence_and_compaction():
+    """The newest record per key wins on reload; stale records are compacted away"""
+    config.ALERT_STORE_COMPACT_MIN = 10
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alerts.jsonl')
+        store = make_store(path)
+        start = time.time() - HOUR
+        for n in range(100):
+            store.record(f"m{n % 5}_Yes", {'num_wallets': n}, now=start + n)
+        assert len(store) == 5
+        with open(path) as f:
+            assert len(f.readlines()) <= 2 * 10 + 1
+
+        # Torn final write is ignored
+        with open(path, 'a') as f:
+            f.write('{"key": "m9_')
+
+        reloaded = make_store(path)
+        assert reloaded.entries == store.entries
+        assert not reloaded.should_alert('m4_Yes', {'num_wallets': 99})
+        assert reloaded.should_alert('m4_Yes', {'num_wallets': 99}, now=start + 99 + 48 * HOUR)
+
+        # Expired entries are dropped when the file is reopened
+        with open(path, 'a') as f:
+            f.write('\n')
+        expired = AlertStore(path, ttl_seconds=1, tiers=TIERS)
+        assert len(expired) == 0
+        with open(path) as f:
+            assert f.read() == ''
+    print("✅ Alert store survives restarts and compacts itself")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ALERT STORE TEST")
+    print("=" * 60)
+
+    test_tiers_and_ttl()
+    test_persistence_and_compaction()
+
+    print("\n✅ All alert store tests passed")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test reorg handling: chain checkpoint rollback against both wallet stores,
+and the checkpoint committing atomically with tracker state
+"""
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from checkpoint import ChainCheckpoint, logs_match_block
+from state_store import StateStore
+from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+
+TRACKERS = (WalletTracker, ColumnarWalletTracker)
+START = datetime.now() - timedelta(hours=1)
+
+
+def make_chain(first_block, last_block, seed, fork='a'):
+    """block -> (hash, [buys]); wallets repeat so reverts hit partly-filled positions"""
+    rng = random.Random(seed)
+    chain = {}
+    for block in range(first_block, last_block + 1):
+        buys = []
+        for _ in range(rng.randrange(4)):
+            buys.append([f"0x{rng.randrange(12):040x}", str(rng.randrange(3)), rng.choice(['Yes', 'No']),
+                         round(rng.uniform(500, 3000), 2), round(rng.uniform(1000, 6000), 2)])
+        chain[block] = (f"0x{fork}{block:063x}", buys)
+    return chain
+
+
+def apply(tracker, checkpoint, chain, blocks):
+    for block in blocks:
+        block_hash, buys = chain[block]
+        for wallet, market_id, outcome, usdc, shares in buys:
+            tracker.add_trade(wallet, market_id, outcome, usdc, START + timedelta(seconds=block), shares=shares)
+        checkpoint.record(block, block, block_hash, buys)
+
+
+def summary(tracker):
+    """Every position, via the public cluster API (same on both stores)"""
+    clusters = tracker.detect_clusters(min_wallets=1, min_volume=0, min_conviction=0)
+    return tracker.num_wallets(), sorted(
+        (c['market_id'], c['outcome'], c['num_wallets'], round(c['total_volume'], 6),
+         round(c['entry_price'] or 0, 9)) for c in clusters)
+
+
+def test_rollback_to_common_ancestor():
+    """A fork at block 106 undoes exactly the trades of 106+"""
+    old = make_chain(100, 112, seed=1)
+    new = {**old, **make_chain(106, 112, seed=2, fork='b')}
+
+    for tracker_class in TRACKERS:
+        tracker, checkpoint = tracker_class(), ChainCheckpoint()
+        apply(tracker, checkpoint, old, range(100, 113))
+
+        assert not checkpoint.extends(new[112][0])  # Parent of the new fork's next block
+        ancestor = checkpoint.rollback(lambda n: new[n][0], tracker.revert_trade)
+        assert ancestor == 105 and checkpoint.block == 105
+
+        expected, _ = tracker_class(), ChainCheckpoint()
+        apply(expected, _, old, range(100, 106))
+        assert summary(tracker) == summary(expected), tracker_class.__name__
+
+        # Re-applying the new fork continues cleanly from the ancestor
+        assert checkpoint.extends(old[105][0])
+        apply(tracker, checkpoint, new, range(106, 113))
+        apply(expected, _, new, range(106, 113))
+        assert summary(tracker) == summary(expected)
+        print(f"✅ {tracker_class.__name__}: rolled back to the common ancestor")
+
+
+def test_reorg_deeper_than_window():
+    """Past the window everything kept is undone and scanning resumes before it"""
+    chain = make_chain(100, 140, seed=3)
+    tracker, checkpoint = WalletTracker(), ChainCheckpoint(window=10)
+    apply(tracker, checkpoint, chain, range(100, 141))
+    oldest = checkpoint.recent[0][0]
+
+    ancestor = checkpoint.rollback(lambda n: 'replaced', tracker.revert_trade)
+    assert ancestor == oldest - 1 and not checkpoint.recent
+
+    expected, _ = WalletTracker(), ChainCheckpoint()
+    apply(expected, _, chain, range(100, oldest))
+    assert summary(tracker) == summary(expected)
+    print("✅ Deep reorg rewinds past the whole window")
+
+
+def test_checkpoint_commits_with_state():
+    """Journal records and snapshots carry the checkpoint they were saved with"""
+    chain = make_chain(100, 131, seed=4)
+    fork = make_chain(121, 130, seed=5, fork='b')
+
+    for tracker_class in TRACKERS:
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, 'state')
+            tracker, checkpoint = tracker_class(), ChainCheckpoint()
+            tracker.state_store = StateStore(prefix, snapshot_every=4)
+
+            # Journal, journal, journal, snapshot, then journals with reverts in them
+            for start in range(100, 120, 5):
+                apply(tracker, checkpoint, chain, range(start, start + 5))
+                tracker.save_state(checkpoint=checkpoint.to_dict())
+            apply(tracker, checkpoint, chain, range(120, 125))
+            assert checkpoint.rollback(lambda n: fork.get(n, chain[n])[0], tracker.revert_trade) == 120
+            tracker.save_state(checkpoint=checkpoint.to_dict())
+            for start in (121, 126):
+                apply(tracker, checkpoint, fork, range(start, start + 5))
+                tracker.save_state(checkpoint=checkpoint.to_dict())
+
+            restored = tracker_class()
+            restored.load_state(prefix)
+            assert restored.checkpoint == checkpoint.to_dict()
+            assert summary(restored) == summary(tracker)
+
+            # A torn write loses the state change and its checkpoint together
+            before = restored.checkpoint
+            apply(restored, ChainCheckpoint.from_dict(before), chain, [131])
+            restored.save_state(checkpoint={'block': 131, 'recent': []})
+            with open(prefix + '.journal', 'r+b') as f:
+                f.truncate(os.path.getsize(prefix + '.journal') - 3)
+
+            reloaded = tracker_class()
+            reloaded.load_state(prefix)
+            assert reloaded.checkpoint == before
+            assert summary(reloaded) == summary(tracker)
+        print(f"✅ {tracker_class.__name__}: checkpoint and state commit together")
+
+
+def test_logs_match_block():
+    """Logs from a replaced block are spotted by their block hash"""
+    logs = [
+        {'blockNumber': '0x64', 'blockHash': '0xAA'},
+        {'blockNumber': 101, 'blockHash': bytes.fromhex('bb')},
+    ]
+    assert logs_match_block(logs, 100, '0xaa')
+    assert logs_match_block(logs, 101, '0xbb')
+    assert not logs_match_block(logs, 101, '0xcc')
+    assert logs_match_block(logs, 102, '0xdd')
+    print("✅ Log block hashes checked against the header")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("CHECKPOINT / REORG TEST")
+    print("=" * 60)
+
+    test_rollback_to_common_ancestor()
+    test_reorg_deeper_than_window()
+    test_checkpoint_commits_with_state()
+    test_logs_match_block()
+
+    print("\n✅ All checkpoint tests passed")
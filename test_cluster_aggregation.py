@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test cluster aggregation: per-group aggregates, and cluster records that
+behave as plain dicts with their members behind wallets()
+"""
+import sys
+import os
+import json
+from datetime import datetime
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from cluster_aggregation import PositionBatch
+from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+
+ENTERED = datetime(2024, 11, 5, 18, 0)
+
+
+def test_aggregates():
+    """Counts, volume, mean conviction, entry span and VWAP per (market, outcome)"""
+    batch = PositionBatch()
+    batch.add('0xa', 'm1', 'Yes', 2000.0, 0.9, 100.0, 4000.0)
+    batch.add('0xb', 'm1', 'Yes', 1000.0, 1.0, 300.0, 0)  # Shares unknown: left out of the price
+    batch.add('0xc', 'm2', 'No', 500.0, 0.8, 200.0, 1000.0)
+
+    clusters = {c['market_id']: c for c in batch.clusters(min_wallets=1)}
+    m1 = clusters['m1']
+    assert m1['num_wallets'] == 2 and m1['total_volume'] == 3000.0
+    assert abs(m1['avg_conviction'] - 0.95) < 1e-12
+    assert (m1['first_entry'], m1['latest_entry']) == (datetime.fromtimestamp(100), datetime.fromtimestamp(300))
+    assert m1['entry_price'] == 0.5
+    assert list(batch.clusters(min_wallets=2)) == [m1]
+    print("✅ Aggregates per group, VWAP over members with known shares")
+
+
+def test_wallets_not_a_key():
+    """Members come from wallets(); get/in/dict()/json all see the same plain dict"""
+    for tracker_class in (WalletTracker, ColumnarWalletTracker):
+        tracker = tracker_class(min_volume=1000, min_conviction=0.8)
+        for wallet in ('0xa', '0xb', '0xc'):
+            tracker.add_trade(wallet, 'm1', 'Yes', 2000.0, ENTERED, shares=4000)
+        cluster, = tracker.detect_clusters(min_wallets=3, min_volume=1000, min_conviction=0.8)
+
+        assert sorted(cluster.wallets()) == ['0xa', '0xb', '0xc'], tracker_class.__name__
+        assert cluster.wallets() is cluster.wallets()  # Resolved once
+        assert 'wallets' not in cluster and cluster.get('wallets') is None
+        assert set(dict(cluster)) == set(cluster.keys()) == set(json.loads(json.dumps(cluster, default=str)))
+        try:
+            cluster['wallets']
+            raise AssertionError("'wallets' is not a key")
+        except KeyError:
+            pass
+    print("✅ wallets() on both stores; the record is a consistent plain dict")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("CLUSTER AGGREGATION TEST")
+    print("=" * 60)
+
+    test_aggregates()
+    test_wallets_not_a_key()
+
+    print("\n✅ All cluster aggregation tests passed")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test the columnar wallet store against WalletTracker: same positions,
+convictions and clusters, including vocabularies wider than a byte, and
+a clear error once ids no longer fit the packed key
+"""
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import columnar_wallet_tracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+from wallet_tracker import WalletTracker
+
+NOW = datetime.now()
+
+
+def cluster_view(clusters):
+    return sorted((c['market_id'], c['outcome'], c['num_wallets'], round(c['total_volume'], 6),
+                   round(c['avg_conviction'], 9)) for c in clusters)
+
+
+def position_view(position):
+    return (position['market_id'], position['outcome'], position['position_volume'],
+            round(position['conviction'], 9))
+
+
+def many_outcome_trades(num_outcomes=300, seed=7):
+    """Trades on tokA over num_outcomes labels plus tokB/outcome0: past 256 labels a byte-wide
+    outcome field would wrap tokA's ids onto tokB's"""
+    rng = random.Random(seed)
+    trades = []
+    for i in range(num_outcomes):
+        for w in range(2):
+            trades.append((f'0xa{i}_{w}', 'tokA', f'outcome{i}', rng.uniform(1000, 5000)))
+    for w in range(6):
+        trades.append((f'0xb{w}', 'tokB', 'outcome0', rng.uniform(1000, 5000)))
+    # Wallets spread over both markets so convictions depend on the right totals
+    for i in range(num_outcomes):
+        trades.append((f'0xmix{i % 5}', 'tokA', f'outcome{i}', 100.0))
+    for w in range(5):
+        trades.append((f'0xmix{w}', 'tokB', 'outcome0', 50000.0))
+    rng.shuffle(trades)
+    return trades
+
+
+def test_matches_wallet_tracker_past_256_outcomes():
+    """Positions and clusters agree with WalletTracker when there are more than 256 outcome labels"""
+    trades = many_outcome_trades()
+    dict_tracker, columnar = WalletTracker(), ColumnarWalletTracker()
+    for wallet, market_id, outcome, volume in trades:
+        dict_tracker.add_trade(wallet, market_id, outcome, volume, NOW)
+        columnar.add_trade(wallet, market_id, outcome, volume, NOW)
+
+    assert len(columnar.outcome_ids) > 256
+    for wallet, market_id, outcome, _ in trades:
+        assert (position_view(columnar.get_position(wallet, market_id, outcome))
+                == position_view(dict_tracker.get_position(wallet, market_id, outcome)))
+
+    expected = cluster_view(dict_tracker.detect_clusters(min_wallets=2))
+    assert ('tokB', 'outcome0', 11) in [c[:3] for c in expected]
+    assert cluster_view(columnar.detect_clusters(min_wallets=2)) == expected
+
+    # Same after a snapshot round trip (keys are rebuilt by the bulk load)
+    with tempfile.TemporaryDirectory() as tmp:
+        columnar.save_state(os.path.join(tmp, 'state'))
+        restored = ColumnarWalletTracker()
+        restored.load_state(os.path.join(tmp, 'state'))
+    assert cluster_view(restored.detect_clusters(min_wallets=2)) == expected
+    print(f"✅ {len(columnar.outcome_ids)} outcome labels: same positions and clusters as WalletTracker")
+
+
+def test_expiry_past_256_outcomes():
+    """changed_only detection sees clusters shrink after cleanup, as WalletTracker does"""
+    dict_tracker, columnar = WalletTracker(), ColumnarWalletTracker()
+    for tracker in (dict_tracker, columnar):
+        for i in range(300):
+            tracker.add_trade(f'0xa{i}', 'tokA', f'outcome{i}', 2000, NOW)
+        for w in range(6):
+            tracker.add_trade(f'0xb{w}', 'tokB', 'outcome0', 2000, NOW - timedelta(hours=100 if w < 2 else 0))
+        tracker.detect_clusters(min_wallets=2, changed_only=True)
+        tracker.cleanup_old_data(hours=72, now=NOW)
+
+    expected = cluster_view(dict_tracker.detect_clusters(min_wallets=2, changed_only=True))
+    assert expected and expected[0][:3] == ('tokB', 'outcome0', 4)
+    assert cluster_view(columnar.detect_clusters(min_wallets=2, changed_only=True)) == expected
+    print("✅ Expired members re-detect the right (token, outcome)")
+
+
+def test_id_overflow_raises():
+    """An id that doesn't fit its key field raises instead of colliding"""
+    saved = columnar_wallet_tracker.OUTCOME_BITS
+    columnar_wallet_tracker.OUTCOME_BITS = 2
+    try:
+        tracker = ColumnarWalletTracker()
+        for i in range(4):
+            tracker.add_trade('0xa', 'tokA', f'outcome{i}', 1000, NOW)
+        try:
+            tracker.add_trade('0xa', 'tokA', 'outcome4', 1000, NOW)
+        except OverflowError:
+            pass
+        else:
+            raise AssertionError("fifth outcome label should overflow a 2-bit field")
+    finally:
+        columnar_wallet_tracker.OUTCOME_BITS = saved
+    print("✅ Id overflow raises OverflowError")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("COLUMNAR WALLET TRACKER TEST")
+    print("=" * 60)
+
+    test_matches_wallet_tracker_past_256_outcomes()
+    test_expiry_past_256_outcomes()
+    test_id_overflow_raises()
+
+    print("\n✅ All columnar wallet tracker tests passed")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the shared event table: typed parsing, missing values, the file-hash
+cache, and the backtest aggregations on top of it
+"""
+import os
+import tempfile
+
+import numpy as np
+
+import backtest_by_threshold
+import analyze_time_window
+from event_table import load_events, parse_events
+
+REPO_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'BACKTEST_BY_WALLET_COUNT.csv')
+
+ROWS = """num_wallets,event_name,total_volume,avg_focus_pct,potential_roi,category,status,first_entry,latest_entry
+5,Will A?,"35,922",96.5%,376%,Politics,WIN,2024-01-01 00:00:00,2024-01-01 03:00:00
+UNKNOWN,Will B?,,N/A,,,,,
+21,Will C?,"1,200",80%,oops,Geopolitics,loss,2024-01-02 00:00:00,2024-01-02 12:00:00
+"""
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_typed_columns():
+    """Numbers, percents and thousands parse; missing and bad values are explicit"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'events.csv')
+        write(path, ROWS)
+        table = parse_events(path)
+
+    assert len(table) == 3
+    assert table['wallet_count'][0] == 5 and np.isnan(table['wallet_count'][1])
+    assert table['total_volume'].tolist()[::2] == [35922, 1200] and np.isnan(table['total_volume'][1])
+    assert table['avg_conviction'][0] == 96.5 and table['roi'][0] == 376
+    assert np.isnan(table['roi'][2])  # 'oops' is read as missing, with a warning
+    assert table['category'].tolist() == ['Politics', 'Unknown', 'Geopolitics']
+    assert table['status'].tolist() == ['WIN', 'UNVERIFIED', 'LOSS']
+    assert table.verified.tolist() == [True, False, True]
+    assert table.time_window_hours[0] == 3 and np.isnan(table.time_window_hours[1])
+    assert np.isnan(table['entry_price']).all()  # Column not in this file
+    print("✅ Typed columns, explicit missing values")
+
+
+def test_cache_keyed_by_file_hash():
+    """An unchanged file loads from the cache; a changed one is parsed again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path, cache = os.path.join(tmp, 'events.csv'), os.path.join(tmp, 'cache')
+        write(path, ROWS)
+        first = load_events(path, cache)
+        assert len(os.listdir(cache)) == 1
+        second = load_events(path, cache)
+        for name in first.columns:
+            np.testing.assert_array_equal(first[name], second[name])
+
+        write(path, ROWS.replace('Will A?', 'Will Z?'))
+        assert load_events(path, cache)['event_name'][0] == 'Will Z?'
+        assert len(os.listdir(cache)) == 2
+    print("✅ Cache hit on an unchanged file, re-parse on a changed one")
+
+
+def test_backtest_aggregations():
+    """Threshold results on the repo's CSV"""
+    table = load_events(REPO_CSV, cache_dir=None)
+    results = backtest_by_threshold.analyze_threshold(table, 5)
+    assert (results['total_signals'], results['verified'], results['wins']) == (130, 36, 23)
+    assert round(results['avg_roi_per_signal']) == 341
+    assert sum(results['signals_by_category'].values()) == 130
+    assert results['losses'] == 13 and len(results['worst_signals']) == backtest_by_threshold.TOP_SIGNALS
+    best = [signal['roi'] for signal in results['best_signals']]
+    assert best == sorted(best, reverse=True) and best[0] == max(table['roi'][table.win])
+
+    large = backtest_by_threshold.analyze_threshold(table, 5, 19)
+    assert large['total_signals'] + backtest_by_threshold.analyze_threshold(table, 20)['total_signals'] == 130
+
+    # Without entry times every event is assumed inside the window
+    windowed = analyze_time_window.analyze_threshold(table, 5)
+    assert windowed['unknown_time_window'] == 130 and windowed['wins'] == 23
+    print(f"✅ 5+ wallets: {results['win_rate']:.1f}% win rate, +{results['avg_roi_per_signal']:.0f}% avg ROI")
+
+
+def test_time_window_filter():
+    """Events with known entry times outside the window are left out"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'events.csv')
+        write(path, ROWS)
+        table = parse_events(path)
+    results = analyze_time_window.analyze_threshold(table, 5, max_time_hours=6)
+    assert results['total_signals'] == 2 and results['outside_time_window'] == 1
+    assert results['within_time_window'] == 1 and results['wins'] == 1 and results['losses'] == 0
+    assert results['total_roi'] == 376
+    print("✅ 6-hour window drops the 12-hour cluster")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("EVENT TABLE TEST")
+    print("=" * 60)
+
+    test_typed_columns()
+    test_cache_keyed_by_file_hash()
+    test_backtest_aggregations()
+    test_time_window_filter()
+
+    print("\n✅ All event table tests passed")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test the fill archive: day partitions, token/wallet/time queries,
+compaction, reorg rollback, feeding a replay and block-time timestamps
+"""
+import hashlib
+import shutil
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from log_decoder import Fill, block_times, decode_fills
+from fill_archive import FillArchive
+from replay import Replay
+
+# Two hours either side of a UTC midnight
+START = datetime(2024, 6, 1, 22, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def make_fills(n=240, first_block=60_000_000):
+    """One fill a minute across midnight, three wallets, four tokens"""
+    fills = []
+    for i in range(n):
+        fill = Fill(f"0xwallet{i % 3}", f"{7000 + i % 4}", 'buy' if i % 5 else 'sell', 100.0 + i, 40.0 + i,
+                    START + timedelta(minutes=i), first_block + i, i % 7,
+                    '0x' + hashlib.sha256(str(i).encode()).hexdigest())
+        fill.outcome = 'Yes' if i % 2 else 'No'
+        fill.question = f"Market {7000 + i % 4}?"
+        fill.category = 'Politics'
+        fills.append(fill)
+    return fills
+
+
+def signature(fill):
+    return (fill.wallet, fill.token_id, fill.side, fill.shares, fill.usdc, fill.timestamp,
+            fill.block_number, fill.log_index, fill.tx_hash, fill.outcome, fill.question, fill.category)
+
+
+def test_round_trip_and_queries():
+    """Every field survives; token/wallet/time queries match a plain filter"""
+    fills = make_fills()
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = FillArchive(tmp, compact_segments=1000)
+        for i in range(0, len(fills), 50):  # One segment per "persist"
+            archive.append(fills[i:i + 50])
+            archive.flush()
+        assert archive.days() == ['2024-06-01', '2024-06-02'], archive.days()
+
+        assert [signature(f) for f in archive.fills()] == [signature(f) for f in fills]
+
+        by_token = archive.query(token_id='7001')
+        assert by_token['token_id'] == ['7001'] * 60
+        assert by_token['block_number'].tolist() == [f.block_number for f in fills if f.token_id == '7001']
+
+        both = list(archive.fills(token_id='7002', wallet='0xwallet1'))
+        assert [signature(f) for f in both] == \
+            [signature(f) for f in fills if f.token_id == '7002' and f.wallet == '0xwallet1']
+
+        start, end = START + timedelta(minutes=100), START + timedelta(minutes=130)
+        window = archive.query(start, end)
+        assert window['block_number'].tolist() == [f.block_number for f in fills if start <= f.timestamp < end]
+
+        assert archive.query(token_id='nope')['timestamp'].size == 0
+        assert archive.query(START + timedelta(days=3))['timestamp'].size == 0
+    print(f"✅ Round trip of {len(fills)} fills over 2 days; token, wallet and time queries match")
+
+
+def test_compaction_and_rollback():
+    """Segments merge without changing results; a reorg drops fills above the ancestor"""
+    fills = make_fills()
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = FillArchive(tmp, compact_segments=3)
+        for i in range(0, len(fills), 20):
+            archive.append(fills[i:i + 20])
+            archive.flush()
+        for day in archive.days():
+            assert len(archive._segments(day)) < 3, (day, len(archive._segments(day)))
+        assert [signature(f) for f in archive.fills()] == [signature(f) for f in fills]
+
+        # Reorg back to the 200th block: written and still-pending fills above it go
+        archive.append(make_fills(5, first_block=60_000_240))
+        ancestor = fills[199].block_number
+        archive.rollback(ancestor)
+        archive.flush()
+        assert [signature(f) for f in archive.fills()] == [signature(f) for f in fills[:200]]
+
+        # Segments a crash left behind after compaction replaced them are ignored
+        day = archive.days()[-1]
+        archive.append(fills[-5:])
+        archive.flush()
+        backups = [(s.path, os.path.join(tmp, os.path.basename(s.path))) for s in archive._segments(day)]
+        assert len(backups) == 2
+        for path, backup in backups:
+            shutil.copytree(path, backup)
+        archive.compact(day)
+        for path, backup in backups:
+            os.rename(backup, path)
+        assert len(archive._segments(day)) == 1
+        assert [signature(f) for f in archive.fills()] == [signature(f) for f in fills[:200] + fills[-5:]]
+    print("✅ Compaction keeps results; rollback drops fills above the reorg ancestor")
+
+
+def test_replay_from_archive():
+    """The replay reads the archive directly"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = FillArchive(tmp)
+        archive.append(make_fills())
+        archive.append(make_fills()[:10])  # Archived twice (crash before a checkpoint)
+        archive.flush()
+        replay = Replay()
+        replay.run(archive.fills())
+    assert replay.stats['fills'] == 250 and replay.stats['duplicate_fills'] == 10, replay.stats
+    print("✅ Replay straight from the archive, re-archived fills deduped")
+
+
+def order_filled_log(block, index, maker, block_timestamp=None):
+    """Raw JSON-RPC OrderFilled log: maker buys 250 shares of token 42 for $100"""
+    log = {
+        'topics': ['0x' + '00' * 32, '0x' + f"{block:064x}", '0x' + f"{maker:064x}", '0x' + f"{0xfeed:064x}"],
+        'data': '0x' + ''.join(f"{word:064x}" for word in (0, 42, 100 * 10**6, 250 * 10**6, 0)),
+        'blockNumber': hex(block),
+        'transactionHash': '0x' + hashlib.sha256(f"{block}-{index}".encode()).hexdigest(),
+        'logIndex': hex(index),
+    }
+    if block_timestamp is not None:
+        log['blockTimestamp'] = hex(block_timestamp)
+    return log
+
+
+def test_archived_at_block_time():
+    """Fills decoded days after their blocks are archived (and partitioned) at block time"""
+    first, last = 60_000_000, 60_000_100
+    # Block 'first' is 23:59:00 UTC on June 1st; two-second blocks run over midnight
+    first_time = int(datetime(2024, 6, 1, 23, 59, tzinfo=timezone.utc).timestamp())
+    header_times = {first: first_time, last: first_time + 2 * (last - first)}
+    logs = [order_filled_log(first, 0, 0xa1), order_filled_log(first + 20, 0, 0xa2),
+            order_filled_log(last, 0, 0xa3),
+            order_filled_log(first + 50, 1, 0xa4, block_timestamp=first_time + 2 * 50 + 1)]
+
+    fills = decode_fills(logs, block_times(logs, header_times))
+    expected = [first_time, first_time + 40, first_time + 200, first_time + 101]
+    assert [f.timestamp for f in fills] == [datetime.fromtimestamp(t) for t in expected]
+    for fill in fills:
+        fill.outcome = 'Yes'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = FillArchive(tmp)
+        archive.append(fills)
+        archive.flush()  # Long after the blocks: the wall clock is years later
+        assert archive.days() == ['2024-06-01', '2024-06-02'], archive.days()
+        archived = sorted(archive.fills(), key=lambda f: f.block_number)
+    assert [f.timestamp for f in archived] == sorted(datetime.fromtimestamp(t) for t in expected)
+    print("✅ Fills archived at their block's time, not when they were decoded")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("FILL ARCHIVE TEST")
+    print("=" * 60)
+
+    test_round_trip_and_queries()
+    test_compaction_and_rollback()
+    test_replay_from_archive()
+    test_archived_at_block_time()
+
+    print("\n✅ All fill archive tests passed")
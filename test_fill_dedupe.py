@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test fill deduplication: refetched and overlapping ranges, hourly bucket
+expiry, reorg forgetting, and the buckets surviving a restart
+"""
+import hashlib
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from log_decoder import Fill
+from fill_dedupe import SeenFills
+
+HOUR = 3600
+START = 1_700_000_000 - 1_700_000_000 % HOUR  # On a bucket boundary
+
+
+def make_fills(first_block, last_block, per_block=3):
+    """per_block fills in each block of [first_block, last_block]"""
+    fills = []
+    for block in range(first_block, last_block + 1):
+        tx_hash = '0x' + hashlib.sha256(str(block).encode()).hexdigest()
+        for index in range(per_block):
+            fills.append(Fill(f"0xwallet{index}", '42', 'buy', 10.0, 5.0, datetime.now(), block, index, tx_hash))
+    return fills
+
+
+def blocks(fills):
+    return sorted({fill.block_number for fill in fills})
+
+
+def test_overlapping_refetch():
+    """A refetched overlapping range only lets its unseen blocks through"""
+    seen = SeenFills(window_seconds=48 * HOUR)
+    new, keys = seen.filter_new(make_fills(100, 119), now=START)
+    assert len(new) == 60 and None not in keys
+
+    # 110-129 overlaps the first range by ten blocks, and a fill repeats inside the batch
+    refetched = make_fills(110, 129)
+    new, _ = seen.filter_new(refetched + refetched[-1:], now=START + 60)
+    assert blocks(new) == list(range(120, 130)) and len(new) == 30
+
+    # Fills without a tx hash can't be identified and always pass
+    unknown = Fill('0xwallet', '42', 'buy', 10.0, 5.0, datetime.now())
+    new, keys = seen.filter_new([unknown, unknown], now=START + 120)
+    assert len(new) == 2 and keys == [None, None]
+    print("✅ Overlapping refetch passes only the blocks not seen before")
+
+
+def test_bucket_expiry():
+    """Keys last the window, then expire a whole hourly bucket at a time"""
+    seen = SeenFills(window_seconds=3 * HOUR, bucket_seconds=HOUR)
+    seen.filter_new(make_fills(1, 10), now=START + 10)  # Bucket 0
+    seen.filter_new(make_fills(11, 20), now=START + HOUR + 10)  # Bucket 1
+    assert len(seen) == 60 and len(seen.sealed) == 1
+
+    # 3h later bucket 0 is still inside the window: both ranges are duplicates
+    new, _ = seen.filter_new(make_fills(1, 20), now=START + 3 * HOUR + 5)
+    assert new == []
+
+    # Once bucket 0 falls out of the window its keys are gone; bucket 1's aren't
+    new, _ = seen.filter_new(make_fills(1, 20), now=START + 4 * HOUR + 5)
+    assert blocks(new) == list(range(1, 11))
+    print("✅ Buckets expire whole once they leave the window")
+
+
+def test_restart_restores_window():
+    """Saved buckets come back on restart, including ones far older than the reorg window"""
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, 'seen_fills')
+        seen = SeenFills(window_seconds=48 * HOUR, directory=directory)
+        for hour in range(30):  # A ten-block range every hour for 30 hours
+            _, keys = seen.filter_new(make_fills(hour * 100, hour * 100 + 9), now=START + hour * HOUR)
+            if hour % 10 == 0:
+                seen.save()  # Persisting part way through an hour
+        seen.save()
+        assert len(os.listdir(directory)) == 30
+
+        # Reorg: the last range is forgotten, and that has to survive the restart too
+        seen.forget(keys)
+        seen.save()
+
+        now = START + 30 * HOUR
+        restarted = SeenFills(window_seconds=48 * HOUR, directory=directory)
+        assert restarted.load(now=now) == 29 * 30
+        everything = [fill for hour in range(30) for fill in make_fills(hour * 100, hour * 100 + 9)]
+        new, _ = restarted.filter_new(everything, now=now)
+        assert blocks(new) == list(range(2900, 2910))
+
+        # Restarting long after: expired buckets are neither loaded nor kept on disk
+        later = SeenFills(window_seconds=48 * HOUR, directory=directory)
+        assert later.load(now=START + 60 * HOUR) == (29 - 12) * 30  # Hours 12..28 are left
+        later.save()
+        assert sorted(int(name[:-len('.npy')]) for name in os.listdir(directory))[0] == START // HOUR + 12
+    print("✅ Restart restores the whole window, forgets included, and drops expired buckets")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("FILL DEDUPE TEST")
+    print("=" * 60)
+
+    test_overlapping_refetch()
+    test_bucket_expiry()
+    test_restart_restores_window()
+
+    print("\n✅ All fill dedupe tests passed")
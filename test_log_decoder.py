@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test the OrderFilled decoder on real-shaped logs (web3's HexBytes and raw
+JSON-RPC hex strings): Fill fields, buy/sell side, 6-decimal prices, and
+malformed logs being skipped
+"""
+import sys
+import os
+from datetime import datetime
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+from log_decoder import MIN_DATA_BYTES, decode_fills, decode_logs, decode_order_filled
+
+NOW = datetime(2024, 11, 5, 20, 15)
+
+MAKER = '0x9d84ce0306f8551e02efef1680475fc0f1dc1344'
+TAKER = '0x4bfb41d5b3570defd03c39a9a4d8de6bd8b8982e'
+TOKEN_ID = 21742633143463906290569050155826241533067272736897614950488156847949938836455
+ORDER_HASH = '0x8d3b1a6f0e2c94a4b7d5c1e0f9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0'
+TX_HASH = '0x5f4d3c2b1a09f8e7d6c5b4a39281706f5e4d3c2b1a09f8e7d6c5b4a392817060'
+
+
+def padded(address):
+    """An address as a 32-byte indexed topic"""
+    return '0x' + '00' * 12 + address[2:]
+
+
+def raw_log(maker_asset_id, taker_asset_id, maker_amount, taker_amount, fee=0, block=64_123_456, log_index=187):
+    """An OrderFilled log as eth_getLogs / eth_subscribe return it over raw JSON-RPC"""
+    words = (maker_asset_id, taker_asset_id, maker_amount, taker_amount, fee)
+    return {
+        'address': config.CTF_EXCHANGE.lower(),
+        'topics': [config.ORDER_FILLED_TOPIC, ORDER_HASH, padded(MAKER), padded(TAKER)],
+        'data': '0x' + ''.join(f"{word:064x}" for word in words),
+        'blockNumber': hex(block),
+        'blockHash': '0x' + 'ab' * 32,
+        'transactionHash': TX_HASH,
+        'transactionIndex': '0x2a',
+        'logIndex': hex(log_index),
+        'removed': False,
+    }
+
+
+def web3_log(log):
+    """The same log as web3's get_logs returns it: HexBytes and ints"""
+    return AttributeDict({
+        'address': config.CTF_EXCHANGE,
+        'topics': [HexBytes(topic) for topic in log['topics']],
+        'data': HexBytes(log['data']),
+        'blockNumber': int(log['blockNumber'], 16),
+        'blockHash': HexBytes(log['blockHash']),
+        'transactionHash': HexBytes(log['transactionHash']),
+        'transactionIndex': int(log['transactionIndex'], 16),
+        'logIndex': int(log['logIndex'], 16),
+        'removed': False,
+    })
+
+
+def test_buy_fill():
+    """Maker pays USDC (asset 0) for outcome tokens: a buy, priced usdc / shares"""
+    # 1,250 shares for $652.50 at 6 decimals: 0.522 per share
+    log = raw_log(0, TOKEN_ID, 652_500_000, 1_250_000_000, fee=1_305_000)
+    for shape in (log, web3_log(log)):
+        fills = decode_fills([shape], NOW)
+        assert len(fills) == 1
+        fill = fills[0]
+        assert fill.wallet == MAKER and fill.side == 'buy'
+        assert fill.token_id == str(TOKEN_ID)
+        assert fill.shares == 1250.0 and fill.usdc == 652.5
+        assert abs(fill.price - 0.522) < 1e-12
+        assert (fill.block_number, fill.log_index, fill.tx_hash) == (64_123_456, 187, TX_HASH)
+        assert fill.timestamp == NOW and fill.outcome == 'Unknown'
+
+    event = decode_order_filled(log)
+    assert event.maker == MAKER and event.taker == TAKER and event.fee == 1_305_000
+    print("✅ Buy: maker wallet, token id, shares, USDC and 0.522 price from both log shapes")
+
+
+def test_sell_fill():
+    """Maker gives outcome tokens for USDC: a sell of the maker asset"""
+    # 40.5 shares for $38.475: 0.95 per share
+    fill = decode_fills([raw_log(TOKEN_ID, 0, 40_500_000, 38_475_000)], NOW)[0]
+    assert fill.side == 'sell' and fill.token_id == str(TOKEN_ID)
+    assert fill.shares == 40.5 and fill.usdc == 38.475
+    assert abs(fill.price - 0.95) < 1e-12
+
+    # Sub-cent amounts keep their 6 decimals
+    fill = decode_fills([raw_log(0, TOKEN_ID, 1, 3)], NOW)[0]
+    assert fill.usdc == 0.000001 and fill.shares == 0.000003
+    print("✅ Sell: maker asset sold for USDC, 6-decimal scaling")
+
+
+def test_skipped_fills():
+    """Token-for-token and zero-share fills decode as events but give no Fill"""
+    logs = [raw_log(TOKEN_ID, TOKEN_ID + 1, 10_000_000, 10_000_000), raw_log(0, TOKEN_ID, 5_000_000, 0)]
+    assert len(decode_logs(logs)) == 2
+    assert decode_fills(logs, NOW) == []
+    print("✅ Token-for-token and zero-share fills are dropped")
+
+
+def test_malformed_logs():
+    """Malformed logs are skipped without losing the good ones around them"""
+    good = raw_log(0, TOKEN_ID, 652_500_000, 1_250_000_000)
+
+    truncated = dict(good, data=good['data'][:2 + 2 * 100])  # 100 of 160 bytes
+    short_fee = dict(good, data=good['data'][:2 + 2 * MIN_DATA_BYTES])  # Some providers trim the fee word
+    no_data = {key: value for key, value in good.items() if key != 'data'}
+    not_hex = dict(good, data='0x' + 'zz' * 160)
+    odd_hex = dict(good, data=good['data'][:-1])
+    few_topics = dict(good, topics=good['topics'][:3])
+    bad_topic = dict(good, topics=good['topics'][:2] + ['0xnothex', good['topics'][3]])
+    odd_topic = dict(good, topics=good['topics'][:2] + [7, good['topics'][3]])
+    bad_block = dict(good, blockNumber='0xqq')
+    web3_truncated = web3_log(good)
+    web3_truncated = AttributeDict(dict(web3_truncated, data=HexBytes(bytes(web3_truncated['data'])[:120])))
+
+    malformed = [truncated, no_data, not_hex, odd_hex, few_topics, bad_topic, odd_topic, bad_block, web3_truncated]
+    for log in malformed:
+        assert decode_logs([log]) == [], log
+
+    fills = decode_fills([good] + malformed + [short_fee, good], NOW)
+    assert len(fills) == 3 and all(fill.shares == 1250.0 for fill in fills)
+    print(f"✅ {len(malformed)} malformed logs skipped (truncated data included), good ones kept")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LOG DECODER TEST")
+    print("=" * 60)
+
+    test_buy_fill()
+    test_sell_fill()
+    test_skipped_fills()
+    test_malformed_logs()
+
+    print("\n✅ All log decoder tests passed")
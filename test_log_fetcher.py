@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test the adaptive log fetcher against a fake provider that rejects wide
+ranges: ranges shrink and grow, never run past the requested end, and
+concurrent fetch workers share the sizing state without losing blocks
+"""
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+from log_fetcher import AdaptiveLogFetcher
+
+LOGS_PER_BLOCK = 3
+
+
+class FakeEth:
+    """eth.get_logs over a chain with LOGS_PER_BLOCK logs per block, rejecting ranges over max_span"""
+
+    def __init__(self, max_span, delay=0.0):
+        self.max_span = max_span
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get_logs(self, params):
+        from_block, to_block = params['fromBlock'], params['toBlock']
+        with self.lock:
+            self.requests.append((from_block, to_block))
+        time.sleep(self.delay)
+        if to_block - from_block + 1 > self.max_span:
+            raise ValueError({'code': -32005, 'message': 'query returned more than 10000 results'})
+        return [{'blockNumber': block, 'logIndex': i}
+                for block in range(from_block, to_block + 1) for i in range(LOGS_PER_BLOCK)]
+
+
+class FakeWeb3:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def make_fetcher(eth, fetcher_class=AdaptiveLogFetcher):
+    """Fetcher on the fake provider, without the rate limit"""
+    saved = config.RPC_MAX_REQUESTS_PER_SECOND
+    config.RPC_MAX_REQUESTS_PER_SECOND = 0
+    try:
+        return fetcher_class(FakeWeb3(eth))
+    finally:
+        config.RPC_MAX_REQUESTS_PER_SECOND = saved
+
+
+def blocks_of(logs):
+    return sorted({log['blockNumber'] for log in logs})
+
+
+def test_shrinks_within_the_range():
+    """A rejected range is split, and no request runs past to_block"""
+    eth = FakeEth(max_span=300)
+    fetcher = make_fetcher(eth)
+    fetcher.batch_size = 1000
+
+    logs = fetcher.fetch(1, 950)
+    assert blocks_of(logs) == list(range(1, 951)) and len(logs) == 950 * LOGS_PER_BLOCK
+    assert all(1 <= start <= end <= 950 for start, end in eth.requests), eth.requests
+    assert fetcher.ceiling is not None and fetcher.batch_size < fetcher.ceiling
+    print(f"✅ 950 blocks in {len(eth.requests)} requests, range settled at {fetcher.batch_size}")
+
+
+class RacingFetcher(AdaptiveLogFetcher):
+    """Another worker grows the shared range right after this one first shrinks it"""
+    raced = False
+
+    def _shrink(self, span):
+        size = super()._shrink(span)
+        if not self.raced:
+            self.raced = True
+            self.batch_size = config.MAX_BLOCK_BATCH_SIZE
+        return size
+
+
+def test_shrink_race():
+    """The retry after a split uses the size it shrank to, clamped to to_block"""
+    eth = FakeEth(max_span=300)
+    fetcher = make_fetcher(eth, RacingFetcher)
+    fetcher.batch_size = 1000
+
+    logs = fetcher.fetch(1, 950)
+    assert blocks_of(logs) == list(range(1, 951))
+    assert all(end <= 950 for _, end in eth.requests), eth.requests
+    print("✅ A concurrent resize between split and retry doesn't overrun the range")
+
+
+def test_concurrent_workers():
+    """Workers sharing one fetcher each get exactly their own window, whatever the others do to the size"""
+    eth = FakeEth(max_span=120, delay=0.001)
+    fetcher = make_fetcher(eth)
+    fetcher.batch_size = 1000
+    windows = [(start, start + 399) for start in range(1, 8001, 400)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda window: fetcher.fetch(*window), windows))
+
+    for (start, end), logs in zip(windows, results):
+        assert blocks_of(logs) == list(range(start, end + 1))
+        assert len(logs) == (end - start + 1) * LOGS_PER_BLOCK
+    for start, end in eth.requests:
+        window = next(w for w in windows if w[0] <= start <= w[1])
+        assert end <= window[1], (start, end, window)
+    assert config.MIN_BLOCK_BATCH_SIZE <= fetcher.batch_size <= config.MAX_BLOCK_BATCH_SIZE
+    print(f"✅ {len(windows)} concurrent windows, {len(eth.requests)} requests, none past its window")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LOG FETCHER TEST")
+    print("=" * 60)
+
+    test_shrinks_within_the_range()
+    test_shrink_race()
+    test_concurrent_workers()
+
+    print("\n✅ All log fetcher tests passed")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Test the streaming log source against a local fake node
+Replays recorded OrderFilled logs over JSON-RPC: eth_getLogs/eth_blockNumber
+on HTTP and eth_subscribe (logs, newHeads) on a websocket
+
+Run with a recording (a JSON list of eth_getLogs results) to replay real
+captured logs instead of the synthetic ones:
+    python test_log_stream.py recorded_logs.json
+"""
+import sys
+import os
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import websockets
+from web3 import Web3
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+from datetime import datetime
+from log_fetcher import AdaptiveLogFetcher
+from log_decoder import decode_fills
+from log_stream import LogStream
+from wallet_tracker import WalletTracker
+
+# Fast timings for a local node
+config.STREAM_POLL_SECONDS = 0.05
+config.STREAM_IDLE_TIMEOUT_SECONDS = 2
+config.STREAM_RECONNECT_DELAY_SECONDS = 0.05
+config.CATCHUP_WINDOW_BLOCKS = 5
+config.RPC_MAX_REQUESTS_PER_SECOND = 0
+
+
+def word(value):
+    return f"{value:064x}"
+
+
+def make_log(block, index, maker, token_id, usdc, shares):
+    """Raw JSON-RPC OrderFilled log: maker buys shares of token_id for usdc"""
+    return {
+        'address': config.CTF_EXCHANGE.lower(),
+        'topics': [
+            config.ORDER_FILLED_TOPIC,
+            '0x' + word(block * 1000 + index),  # orderHash
+            '0x' + word(maker),
+            '0x' + word(0xfeed),
+        ],
+        # makerAssetId (0 = USDC), takerAssetId, makerAmount, takerAmount, fee
+        'data': '0x' + word(0) + word(token_id) + word(int(usdc * 1e6)) + word(int(shares * 1e6)) + word(0),
+        'blockNumber': hex(block),
+        'blockHash': '0x' + word(block),
+        'transactionHash': '0x' + word(block * 1000 + index + 1),
+        'transactionIndex': hex(index),
+        'logIndex': hex(index),
+        'removed': False,
+    }
+
+
+def make_recording(first_block, num_blocks):
+    """A few fills in most blocks, none in every fifth"""
+    logs = []
+    for block in range(first_block, first_block + num_blocks):
+        if block % 5 == 0:
+            continue
+        for index in range(block % 3 + 1):
+            logs.append(make_log(block, index, 0x1000 + block * 10 + index, 42 + index, 100 + index, 250))
+    return logs
+
+
+def load_recording(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def log_keys(logs):
+    """(block, log index, tx hash) per fill, whichever format the logs came in"""
+    return [(f.block_number, f.log_index, f.tx_hash) for f in decode_fills(logs, datetime.now())]
+
+
+class FakeNode:
+    """
+    In-process node replaying recorded logs
+
+    Blocks up to `head` are on chain; mine() adds the next recorded block
+    and pushes its logs then its header to every websocket subscriber.
+    """
+
+    def __init__(self, logs, head):
+        self.blocks = {}
+        for log in logs:
+            self.blocks.setdefault(int(log['blockNumber'], 16), []).append(log)
+        self.head = head
+        self.subscribers = {}  # websocket -> {subscription id: kind}
+        self.next_sub = 0
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                body = json.dumps({'jsonrpc': '2.0', 'id': request['id'],
+                                   'result': node.call(request['method'], request.get('params', []))}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.http_url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def call(self, method, params):
+        if method == 'eth_blockNumber':
+            return hex(self.head)
+        if method == 'eth_chainId':
+            return hex(137)
+        if method == 'eth_getLogs':
+            query = params[0]
+            start, end = int(query['fromBlock'], 16), int(query['toBlock'], 16)
+            return [log for block in range(start, min(end, self.head) + 1)
+                    for log in self.blocks.get(block, [])
+                    if log['topics'][0] == query['topics'][0]]
+        raise ValueError(f"unsupported method {method}")
+
+    # ========== WEBSOCKET ==========
+
+    async def start_ws(self):
+        self.ws_server = await websockets.serve(self.serve_ws, '127.0.0.1', 0)
+        self.ws_url = f"ws://127.0.0.1:{self.ws_server.sockets[0].getsockname()[1]}"
+
+    async def serve_ws(self, ws):
+        subs = self.subscribers[ws] = {}
+        try:
+            async for raw in ws:
+                request = json.loads(raw)
+                self.next_sub += 1
+                sub_id = hex(self.next_sub)
+                subs[sub_id] = request['params'][0]
+                await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': sub_id}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.subscribers.pop(ws, None)
+
+    async def notify(self, kind, result):
+        for ws, subs in list(self.subscribers.items()):
+            for sub_id, sub_kind in subs.items():
+                if sub_kind == kind:
+                    try:
+                        await ws.send(json.dumps({'jsonrpc': '2.0', 'method': 'eth_subscription',
+                                                  'params': {'subscription': sub_id, 'result': result}}))
+                    except websockets.ConnectionClosed:
+                        pass
+
+    async def mine(self, reorg_replay=False):
+        """
+        Next block: its logs, then its header, like a real node
+
+        reorg_replay also retracts each log (removed=True, as after a reorg)
+        and sends it again, as if the replacing block included it too.
+        """
+        self.head += 1
+        for log in self.blocks.get(self.head, []):
+            await self.notify('logs', log)
+            if reorg_replay:
+                await self.notify('logs', dict(log, removed=True))
+                await self.notify('logs', log)
+        await self.notify('newHeads', {'number': hex(self.head)})
+
+    async def drop_connections(self):
+        for ws in list(self.subscribers):
+            await ws.close()
+
+    def close(self):
+        self.http.shutdown()
+        if hasattr(self, 'ws_server'):
+            self.ws_server.close()
+
+
+def make_stream(node, ws_url, confirmations=0, fetch_backfill=True):
+    fetcher = AdaptiveLogFetcher(Web3(Web3.HTTPProvider(node.http_url)))
+    return LogStream(fetcher, lambda: node.head, ws_url=ws_url, confirmations=confirmations,
+                     fetch_backfill=fetch_backfill)
+
+
+async def follow(stream, from_block, until_block, stopping):
+    """Collect ranges until until_block has been yielded, fetching any that come without logs"""
+    ranges = []
+    unfetched = []
+    async for from_b, to_b, logs in stream.ranges(from_block, stopping):
+        if logs is None:
+            unfetched.append((from_b, to_b))
+            logs = await asyncio.to_thread(stream.log_fetcher.fetch, from_b, to_b)
+        ranges.append((from_b, to_b, logs))
+        if to_b >= until_block:
+            stopping.set()
+    stream.unfetched = unfetched
+    return ranges
+
+
+def check_ranges(ranges, node, from_block, until_block):
+    """Consecutive, gap-free ranges carrying exactly the node's logs, in order"""
+    assert ranges[0][0] == from_block, ranges[0]
+    for (_, prev_end, _), (start, _, _) in zip(ranges, ranges[1:]):
+        assert start == prev_end + 1, (prev_end, start)
+
+    streamed = log_keys([log for _, _, logs in ranges for log in logs])
+    expected = log_keys([log for block in range(from_block, ranges[-1][1] + 1)
+                         for log in node.blocks.get(block, [])])
+    assert streamed == expected, (len(streamed), len(expected))
+    assert ranges[-1][1] >= until_block
+
+
+async def run_websocket_stream(logs, first_block, last_block, drop_at=None, confirmations=0,
+                               fetch_backfill=True):
+    """Start mid-history, backfill, then follow newly mined blocks over the websocket"""
+    start_head = first_block + (last_block - first_block) // 3
+    node = FakeNode(logs, head=start_head)
+    await node.start_ws()
+    stream = make_stream(node, node.ws_url, confirmations, fetch_backfill)
+    stopping = asyncio.Event()
+    until_block = last_block - max(confirmations, 1)
+    try:
+        follower = asyncio.create_task(follow(stream, first_block, until_block, stopping))
+        while node.head < last_block and not follower.done():
+            await asyncio.sleep(0.005)
+            if stream.mode == 'websocket':
+                await node.mine(reorg_replay=True)
+                if node.head == drop_at:
+                    await node.drop_connections()
+        ranges = await asyncio.wait_for(follower, 10)
+    finally:
+        node.close()
+    return node, stream, ranges
+
+
+def test_websocket_streaming():
+    """Backfill from the checkpoint, then one range per block with no gaps or repeats"""
+    logs = make_recording(100, 60)
+    node, stream, ranges = asyncio.run(run_websocket_stream(logs, 100, 159))
+    check_ranges(ranges, node, 100, 158)
+    assert stream.mode == 'websocket'
+    # Live blocks come one at a time
+    assert all(start == end for start, end, _ in ranges[-10:])
+    print("✅ Websocket stream backfills then follows block by block")
+
+
+def test_reconnect_resumes():
+    """A dropped subscription resumes from the next block, nothing missed or repeated"""
+    logs = make_recording(100, 60)
+    node, stream, ranges = asyncio.run(run_websocket_stream(logs, 100, 159, drop_at=130))
+    check_ranges(ranges, node, 100, 158)
+    assert stream.reconnects >= 1
+    print(f"✅ Reconnected {stream.reconnects}x without gaps or duplicates")
+
+
+def test_backfill_left_to_consumer():
+    """fetch_backfill=False: catch-up windows come without logs, live blocks with them"""
+    logs = make_recording(100, 60)
+    node, stream, ranges = asyncio.run(run_websocket_stream(logs, 100, 159, fetch_backfill=False))
+    check_ranges(ranges, node, 100, 158)
+
+    # The catch-up from the start head came as full windows for the consumer to fetch
+    assert stream.unfetched[0] == (100, 104) and len(stream.unfetched) >= 4, stream.unfetched
+    unfetched = set(stream.unfetched)
+    live = [(start, end) for start, end, _ in ranges if (start, end) not in unfetched]
+    assert live and all(start == end for start, end in live[-10:])
+    assert min(start for start, _ in live) > max(end for _, end in stream.unfetched)
+    print(f"✅ {len(unfetched)} catch-up windows left to the consumer, then block by block")
+
+
+def test_confirmation_depth():
+    """Blocks are only released once the head is `confirmations` past them"""
+    logs = make_recording(100, 40)
+    node, stream, ranges = asyncio.run(run_websocket_stream(logs, 100, 139, confirmations=3))
+    check_ranges(ranges, node, 100, 136)
+    assert ranges[-1][1] == node.head - 3, (ranges[-1], node.head)
+    print("✅ Stream stays 3 blocks behind the head")
+
+
+def test_polling_fallback():
+    """No websocket: tight eth_getLogs polling still delivers every block"""
+    config.STREAM_MAX_WS_FAILURES = 2
+
+    async def scenario():
+        node = FakeNode(make_recording(100, 40), head=110)
+        stream = make_stream(node, 'ws://127.0.0.1:1')  # Nothing listening
+        stopping = asyncio.Event()
+        try:
+            follower = asyncio.create_task(follow(stream, 100, 139, stopping))
+            while node.head < 139:
+                await asyncio.sleep(0.01)
+                if stream.mode == 'poll':
+                    node.head += 1
+            return node, stream, await asyncio.wait_for(follower, 10)
+        finally:
+            node.close()
+
+    node, stream, ranges = asyncio.run(scenario())
+    check_ranges(ranges, node, 100, 139)
+    assert stream.mode == 'poll'
+    print("✅ Polling fallback delivers every block")
+
+
+def test_incremental_detection():
+    """Detection per streamed block flags the cluster in the block it forms"""
+    # Five wallets buy the same token, one per block
+    logs = [make_log(200 + i, 0, 0xa0 + i, 7, 2000, 5000) for i in range(5)]
+    node, stream, ranges = asyncio.run(run_websocket_stream(logs, 195, 210))
+
+    tracker = WalletTracker(min_volume=1000, min_conviction=0.8)
+    flagged_at = None
+    for start, end, block_logs in ranges:
+        for fill in decode_fills(block_logs, datetime.now()):
+            tracker.add_trade(fill.wallet, fill.token_id, 'Yes', fill.usdc, shares=fill.shares)
+        if tracker.detect_clusters(min_wallets=5, changed_only=True) and flagged_at is None:
+            flagged_at = end
+    assert flagged_at == 204, flagged_at
+    print("✅ Cluster detected in the block the fifth wallet entered")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LOG STREAM TEST")
+    print("=" * 60)
+
+    if len(sys.argv) > 1:
+        recording = load_recording(sys.argv[1])
+        blocks = sorted({int(log['blockNumber'], 16) for log in recording})
+        node, stream, ranges = asyncio.run(run_websocket_stream(recording, blocks[0], blocks[-1]))
+        check_ranges(ranges, node, blocks[0], blocks[-1] - 1)
+        print(f"✅ Replayed {len(recording)} recorded logs over {len(ranges)} ranges")
+    else:
+        test_websocket_streaming()
+        test_reconnect_resumes()
+        test_backfill_left_to_consumer()
+        test_confirmation_depth()
+        test_polling_fallback()
+        test_incremental_detection()
+
+    print("\n✅ All log stream tests passed")
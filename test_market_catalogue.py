@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Test the market catalogue client against a local fixture server
+Serves paginated gamma /markets and cursor-paginated CLOB listings from memory
+"""
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from market_catalogue import MarketCatalogue, parse_market_tokens
+
+
+def make_markets(n):
+    """Gamma-shaped fixture markets, newest updatedAt last"""
+    return [
+        {
+            'conditionId': f"0xc{i:04d}",
+            'question': f"Fixture market {i}?",
+            'outcomes': '["Yes", "No"]',
+            'outcomePrices': '["0.25", "0.75"]',
+            'clobTokenIds': json.dumps([str(1000 + 2 * i), str(1001 + 2 * i)]),
+            'updatedAt': f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}Z",
+        }
+        for i in range(n)
+    ]
+
+
+class FixtureServer:
+    """Tiny in-process Polymarket API: /markets (offset) and /sampling-simplified-markets (cursor)"""
+
+    def __init__(self, markets):
+        self.markets = markets
+        self.requests = []
+        self.not_modified = 0
+        self.fail_offset = None  # Answer the /markets page at this offset with a 500
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                server.requests.append((url.path, query))
+
+                if url.path == '/markets' and query.get('offset') == [str(server.fail_offset)]:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                if url.path == '/markets':
+                    body = server.gamma_page(query)
+                elif url.path == '/sampling-simplified-markets':
+                    body = server.clob_page(query)
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                payload = json.dumps(body).encode()
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def gamma_page(self, query):
+        markets = self.markets
+        if 'clob_token_ids' in query:
+            wanted = set(query['clob_token_ids'])
+            markets = [m for m in markets if wanted & set(json.loads(m['clobTokenIds']))]
+        if query.get('order') == ['updatedAt']:
+            markets = sorted(markets, key=lambda m: m['updatedAt'],
+                             reverse=query.get('ascending') == ['false'])
+
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', ['100'])[0])
+        return markets[offset:offset + limit]
+
+    def clob_page(self, query):
+        start = int(query.get('next_cursor', ['0'])[0])
+        data = [
+            {'condition_id': m['conditionId'],
+             'tokens': [{'token_id': t, 'outcome': 'Yes', 'price': 0.5}
+                        for t in json.loads(m['clobTokenIds'])]}
+            for m in self.markets[start:start + 7]
+        ]
+        end = start + 7
+        return {'data': data, 'next_cursor': str(end) if end < len(self.markets) else 'LTE='}
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+def test_gamma_pagination():
+    """Every page is walked, one request per page"""
+    server = FixtureServer(make_markets(23))
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url, page_size=5)
+        markets = list(catalogue.iter_markets())
+
+        assert [m['conditionId'] for m in markets] == [f"0xc{i:04d}" for i in range(23)]
+        assert len(server.requests) == 5
+        print("✅ gamma /markets walked all 5 pages")
+    finally:
+        server.close()
+
+
+def test_streaming_stops_early():
+    """Consumers that stop early don't fetch the remaining pages"""
+    server = FixtureServer(make_markets(50))
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url, page_size=10)
+        for i, market in enumerate(catalogue.iter_markets()):
+            if i == 12:
+                break
+
+        assert len(server.requests) == 2
+        print("✅ streaming consumer stopped after 2 of 5 pages")
+    finally:
+        server.close()
+
+
+def test_clob_cursor_pagination():
+    """CLOB listings follow next_cursor until the end marker"""
+    server = FixtureServer(make_markets(20))
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url)
+        markets = list(catalogue.iter_clob_markets())
+
+        assert len(markets) == 20
+        assert len(server.requests) == 3
+        assert parse_market_tokens(markets[0])[0] == ('1000', 'Yes', 0.5)
+        print("✅ CLOB cursor pagination walked 3 pages")
+    finally:
+        server.close()
+
+
+def test_incremental_refresh():
+    """Second sync only returns markets updated after the first"""
+    markets = make_markets(30)
+    server = FixtureServer(markets)
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url, page_size=10)
+        assert len(list(catalogue.iter_updated_markets())) == 30
+
+        markets.append(dict(make_markets(31)[30], updatedAt="2026-01-02T00:00:00Z"))
+        markets[3]['updatedAt'] = "2026-01-02T00:00:01Z"
+
+        server.requests.clear()
+        updated = list(catalogue.iter_updated_markets())
+
+        assert sorted(m['conditionId'] for m in updated) == ['0xc0003', '0xc0030']
+        assert len(server.requests) == 1
+        print("✅ incremental refresh fetched 1 page, 2 updated markets")
+    finally:
+        server.close()
+
+
+def test_full_walk():
+    """full=True walks everything again; a walk that fails part way keeps the old sync point"""
+    markets = make_markets(30)
+    server = FixtureServer(markets)
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url, page_size=10)
+        list(catalogue.iter_updated_markets())
+        synced = catalogue.last_sync
+        assert list(catalogue.iter_updated_markets()) == []
+        assert len(list(catalogue.iter_updated_markets(full=True))) == 30
+        assert catalogue.last_sync == synced
+
+        markets[5]['updatedAt'] = "2026-01-02T00:00:00Z"
+        server.fail_offset = 20
+        try:
+            list(catalogue.iter_updated_markets(full=True))
+            raise AssertionError("the failed page should propagate")
+        except requests.HTTPError:
+            pass
+        assert catalogue.last_sync == synced  # The change is still ahead of the sync point
+        server.fail_offset = None
+        assert [m['conditionId'] for m in catalogue.iter_updated_markets()] == ['0xc0005']
+
+        catalogue.reset()
+        assert len(list(catalogue.iter_updated_markets())) == 30
+        print("✅ full walk on demand, failed walk retried from the old sync point")
+    finally:
+        server.close()
+
+
+def test_conditional_requests():
+    """An unchanged first page comes back as a 304 and the poll stops there"""
+    markets = make_markets(30)
+    server = FixtureServer(markets)
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url, page_size=10)
+        assert len(list(catalogue.iter_updated_markets())) == 30
+        assert len(catalogue.validators) == 1  # Only the first page is kept
+
+        server.requests.clear()
+        assert list(catalogue.iter_updated_markets()) == []
+        assert len(server.requests) == 1 and server.not_modified == 1 and catalogue.not_modified == 1
+
+        # A change invalidates the page: the new body is fetched and used
+        markets[7]['updatedAt'] = "2026-01-02T00:00:00Z"
+        assert [m['conditionId'] for m in catalogue.iter_updated_markets()] == ['0xc0007']
+        assert server.not_modified == 1
+
+        # Plain walks stay unconditional
+        list(catalogue.iter_markets())
+        assert server.not_modified == 1
+        print("✅ unchanged poll answered with one 304")
+    finally:
+        server.close()
+
+
+def test_token_lookup():
+    """Targeted lookup by CLOB token id and gamma token parsing"""
+    server = FixtureServer(make_markets(10))
+    try:
+        catalogue = MarketCatalogue(gamma_api=server.url, clob_api=server.url)
+        markets = catalogue.get_markets_for_tokens(['1005', '1010'])
+
+        assert [m['conditionId'] for m in markets] == ['0xc0002', '0xc0005']
+        assert parse_market_tokens(markets[0]) == [('1004', 'Yes', 0.25), ('1005', 'No', 0.75)]
+        print("✅ targeted token lookup")
+    finally:
+        server.close()
+
+
+class SlowCatalogue(MarketCatalogue):
+    """Counts full syncs and holds each one open until `release` is set"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.syncs = 0
+        self.running = 0
+        self.overlapped = False
+        self.release = threading.Event()
+
+    def iter_updated_markets(self, **params):
+        self.syncs += 1
+        self.running += 1
+        self.overlapped |= self.running > 1
+        try:
+            self.release.wait(5)
+            yield from super().iter_updated_markets(**params)
+        finally:
+            self.running -= 1
+
+
+def test_one_sync_across_workers():
+    """Enrich workers starting together sync the catalogue once; the others don't wait for it"""
+    from blockchain_scanner import BlockchainScanner
+    from log_decoder import Fill
+
+    server = FixtureServer(make_markets(10))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # The scanner's market cache file lands here
+        try:
+            scanner = BlockchainScanner()
+            scanner.catalogue = catalogue = SlowCatalogue(gamma_api=server.url, clob_api=server.url)
+            done = []
+
+            def enrich(token_id):
+                fill = Fill('0xwallet', token_id, 'buy', 10.0, 5.0, None)
+                done.append(scanner.enrich_with_polymarket_data([fill])[0])
+
+            workers = [threading.Thread(target=enrich, args=(str(token),)) for token in (1000, 1003, 1004)]
+            for worker in workers:
+                worker.start()
+            # The workers that didn't get the sync finish on targeted lookups meanwhile
+            deadline = time.monotonic() + 5
+            while len(done) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(done) == 2 and catalogue.running == 1
+            catalogue.release.set()
+            for worker in workers:
+                worker.join(5)
+
+            assert catalogue.syncs == 1 and not catalogue.overlapped
+            assert sorted(fill.outcome for fill in done) == ['No', 'Yes', 'Yes']
+            scanner.enrich_with_polymarket_data([])  # Not due again yet
+            assert catalogue.syncs == 1
+            print("✅ One catalogue sync across concurrent enrich workers")
+        finally:
+            os.chdir(cwd)
+            server.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MARKET CATALOGUE TEST")
+    print("=" * 60)
+
+    test_gamma_pagination()
+    test_streaming_stops_early()
+    test_clob_cursor_pagination()
+    test_incremental_refresh()
+    test_full_walk()
+    test_conditional_requests()
+    test_token_lookup()
+    test_one_sync_across_workers()
+
+    print("\n✅ ALL TESTS PASSED")
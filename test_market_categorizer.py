@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test market categorisation: whole-word keyword matching, category
+precedence and per-market memoisation
+"""
+import sys
+import os
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from market_categorizer import MarketCategorizer
+
+
+def test_whole_words():
+    """Keywords inside other words no longer match; inflections still do"""
+    categorizer = MarketCategorizer()
+    cases = {
+        "Will Tesla's revenue top 100 billion?": 'Other',  # 'bill'
+        "Will it rain whether or not the forecast says so?": 'Other',  # 'eth'
+        "Will the Senate ethics committee report by June?": 'Politics',  # 'eth'
+        "Will ETH close above $5,000?": 'Excluded',
+        "Democratic nominee for the 2028 elections?": 'Politics',
+        "Will the Fed cut interest rates in March?": 'Financial',
+        "Will the Federal   Reserve pause?": 'Financial',
+        "Will the Lakers win the NBA championships?": 'Excluded',
+        "Will Trump attend the Super Bowl?": 'Excluded',  # Politics + excluded
+        "Bitcoin ETF approved before the recession?": 'Financial',  # Financial wins over excluded
+        "Will the White House announce a new cabinet pick?": 'Politics',
+        "Will voter turnout exceed 60%?": 'Politics',  # Silent e: vote -> voter
+        "Will voters approve Prop 1?": 'Politics',
+        "Has Ohio voted yes on Issue 1?": 'Politics',
+        "Will early voting top 50M ballots?": 'Politics',
+        "How many votes will Measure 2 get?": 'Politics',
+    }
+    for question, expected in cases.items():
+        assert categorizer.categorize(question) == expected, (question, categorizer.matches(question))
+    print(f"✅ {len(cases)} questions categorised on whole words")
+
+
+def test_memoised_per_market():
+    """Repeat lookups come from the memo until the question text changes"""
+    categorizer = MarketCategorizer(max_entries=2)
+    assert categorizer.categorize("Government shutdown?", '0x1') == 'Politics'
+    categorizer.words.clear()  # Any real matching now finds nothing
+    assert categorizer.categorize("Government shutdown?", '0x1') == 'Politics'
+    assert categorizer.categorize("Government shutdown by Friday?", '0x1') == 'Other'
+
+    categorizer.categorize("a", '0x2')
+    categorizer.categorize("b", '0x3')
+    assert list(categorizer.memo) == ['0x2', '0x3']
+    print("✅ Categories memoised per condition_id, bounded")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MARKET CATEGORIZER TEST")
+    print("=" * 60)
+
+    test_whole_words()
+    test_memoised_per_market()
+
+    print("\n✅ All market categorizer tests passed")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the market snapshot: a poll only returns signals that are new or
+changed, markets that leave the criteria can cross back in, and a full
+pass returns everything and forgets delisted markets
+"""
+import sys
+import os
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from market_snapshot import MarketSnapshot
+
+
+def signals_for(market):
+    """The simple bot's criteria, on flat fixture markets"""
+    if market['price'] <= 0.60 and market['volume24hr'] >= 50000:
+        return [{'market_id': market['conditionId'], 'outcome': 'Yes',
+                 'price': market['price'], 'volume_24h': market['volume24hr']}]
+    return []
+
+
+def market(condition_id, price, volume):
+    return {'conditionId': condition_id, 'price': price, 'volume24hr': volume}
+
+
+def ids(signals):
+    return sorted(signal['market_id'] for signal in signals)
+
+
+def test_only_changes():
+    """Unchanged markets are skipped; price or volume moves are returned"""
+    snapshot = MarketSnapshot(signals_for)
+    assert ids(snapshot.diff([market('a', 0.3, 60000), market('b', 0.4, 70000), market('c', 0.9, 90000)],
+                             full=True)) == ['a', 'b']
+
+    # Same state again: nothing to do
+    assert snapshot.diff([market('a', 0.3, 60000), market('b', 0.4, 70000)]) == []
+
+    # Volume moved on 'b', 'c' dropped to 0.55 (crossed the price line)
+    assert ids(snapshot.diff([market('b', 0.4, 120000), market('c', 0.55, 90000)])) == ['b', 'c']
+    print("✅ Poll returns only new and changed signals")
+
+
+def test_crossing_back():
+    """A market that leaves the criteria is a change again when it comes back"""
+    snapshot = MarketSnapshot(signals_for)
+    assert ids(snapshot.diff([market('a', 0.3, 60000)])) == ['a']
+    assert snapshot.diff([market('a', 0.3, 40000)]) == []  # Volume fell under 50k
+    assert 'a' not in snapshot.state
+    assert ids(snapshot.diff([market('a', 0.3, 60000)])) == ['a']
+    print("✅ Crossing out and back in is a new signal")
+
+
+def test_full_pass():
+    """A full pass returns every current signal and drops markets not listed"""
+    snapshot = MarketSnapshot(signals_for)
+    snapshot.diff([market('a', 0.3, 60000), market('b', 0.4, 70000)])
+    assert ids(snapshot.diff([market('a', 0.3, 60000)], full=True)) == ['a']
+    assert set(snapshot.state) == {'a'}
+    print("✅ Full pass rebuilds the snapshot")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MARKET SNAPSHOT TEST")
+    print("=" * 60)
+
+    test_only_changes()
+    test_crossing_back()
+    test_full_pass()
+
+    print("\n✅ All market snapshot tests passed")
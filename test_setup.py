@@ -4,6 +4,7 @@ Quick test to verify scanner setup
 """
 import sys
 import os
+import tempfile
 
 # Add realtime_scanner to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
@@ -66,6 +67,18 @@ def test_classes():
     """Test if classes can be instantiated"""
     print("\nTesting class instantiation...")
 
+    # The scanner opens its market cache (and state files) in the working
+    # directory: use a scratch one so a test run leaves nothing behind
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            return instantiate_classes()
+        finally:
+            os.chdir(cwd)
+
+def instantiate_classes():
+    """Instantiate each class (in the current directory)"""
     try:
         from wallet_tracker import WalletTracker
         tracker = WalletTracker()
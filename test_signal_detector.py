@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test the signal detector: column-view patterns, legacy-style patterns,
+parallel execution and per-pattern timings
+"""
+import sys
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+from log_decoder import Fill
+from signal_detector import SignalDetector
+from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+
+NOW = datetime.now()
+ALL_PATTERNS = ['high_conviction_cluster', 'whale_entry', 'synchronized_entry']
+
+
+def make_cluster(market_id, num_wallets, price, total_volume=20000, avg_conviction=0.95,
+                 category='Politics', question='Will it happen?', spread_hours=0.5):
+    return {
+        'market_id': market_id, 'outcome': 'Yes', 'num_wallets': num_wallets,
+        'total_volume': total_volume, 'avg_conviction': avg_conviction, 'price': price,
+        'category': category, 'question': question,
+        'first_entry': NOW - timedelta(hours=spread_hours), 'latest_entry': NOW,
+    }
+
+
+def make_buy(wallet, token_id, usdc, outcome='Yes', hours_ago=0):
+    fill = Fill(wallet, token_id, 'buy', usdc * 2, usdc, NOW - timedelta(hours=hours_ago))
+    fill.outcome = outcome
+    return fill
+
+
+def scores(signals, kind='cluster'):
+    return {s['cluster']['market_id']: s['conviction'] for s in signals if s['type'] == kind}
+
+
+def test_high_conviction_scoring():
+    """Filters and scoring rules match the pattern's documented order"""
+    clusters = [
+        make_cluster('very-high-20', 20, 0.25),
+        make_cluster('very-high-10', 10, 0.35),
+        make_cluster('high-5', 5, 0.45),
+        make_cluster('high-3', 3, 0.55, avg_conviction=0.92),
+        make_cluster('medium-2', 2, 0.55, avg_conviction=0.85, total_volume=6000),
+        make_cluster('medium-1', 1, 0.55, total_volume=6000),
+        make_cluster('low', 1, 0.55, total_volume=2000),
+        make_cluster('too-pricey', 20, 0.65),
+        make_cluster('no-price', 20, None),
+        make_cluster('sports', 20, 0.25, category='Excluded'),
+        make_cluster('unknown', 20, 0.25, question='Unknown'),
+    ]
+    signals = SignalDetector().detect_all(clusters, [], WalletTracker())
+    assert scores(signals) == {
+        'very-high-20': 'VERY HIGH', 'very-high-10': 'VERY HIGH', 'high-5': 'HIGH', 'high-3': 'HIGH',
+        'medium-2': 'MEDIUM', 'medium-1': 'MEDIUM', 'low': 'LOW',
+    }, scores(signals)
+    assert all(s['pattern_name'] == "High Conviction Signal" for s in signals)
+    print(f"✅ High conviction: {len(signals)} clusters scored, 4 filtered out")
+
+
+def test_whale_and_synchronized():
+    """Whales are recent all-in $10K+ positions; synchronized from tight clusters"""
+    config.SIGNAL_PATTERNS = ALL_PATTERNS
+    try:
+        for tracker_class in (WalletTracker, ColumnarWalletTracker):
+            tracker = tracker_class()
+            trades = [
+                make_buy('0xwhale', 'm1', 12000),  # $12K, all-in: whale
+                make_buy('0xsmall', 'm1', 3000),  # Too small
+                make_buy('0xspread', 'm2', 9000), make_buy('0xspread', 'm3', 9000),  # 50% conviction
+                make_buy('0xold', 'm4', 15000, hours_ago=3),  # Entered hours ago
+                make_buy('0xunknown', 'm5', 15000, outcome='Unknown'),
+            ]
+            for t in trades:
+                tracker.add_trade(t.wallet, t.token_id, t.outcome, t.usdc, t.timestamp, shares=t.shares)
+            clusters = [make_cluster('tight', 6, 0.9, category='Other'),
+                        make_cluster('slow', 6, 0.9, spread_hours=5),
+                        make_cluster('few', 4, 0.9)]
+
+            signals = SignalDetector().detect_all(clusters, trades, tracker)
+            whales = [s['position']['wallet'] for s in signals if s['type'] == 'whale']
+            assert whales == ['0xwhale'], (tracker_class.__name__, whales)
+            assert list(scores(signals, 'synchronized')) == ['tight']
+        print("✅ Whale entry and synchronized entry on both stores")
+    finally:
+        config.SIGNAL_PATTERNS = ['high_conviction_cluster']
+
+
+def test_whale_entry_window():
+    """A whale is reported for an hour after entry, whether or not it bought this cycle"""
+    config.SIGNAL_PATTERNS = ['whale_entry']
+    try:
+        for tracker_class in (WalletTracker, ColumnarWalletTracker):
+            tracker = tracker_class()
+            earlier = [
+                make_buy('0xrecent', 'm1', 12000, hours_ago=0.5),  # Bought in an earlier cycle
+                make_buy('0xstale', 'm2', 12000, hours_ago=1.5),  # Outside the hour
+            ]
+            for t in earlier:
+                tracker.add_trade(t.wallet, t.token_id, t.outcome, t.usdc, t.timestamp, shares=t.shares)
+            detector = SignalDetector()
+            now = NOW.timestamp()
+
+            # No buys at all this cycle: the recent whale still counts
+            whales = [s['position']['wallet'] for s in detector.detect_all([], [], tracker, now=now)]
+            assert whales == ['0xrecent'], (tracker_class.__name__, whales)
+
+            # Another wallet's buy this cycle doesn't hide it
+            other = make_buy('0xother', 'm3', 500)
+            tracker.add_trade(other.wallet, other.token_id, other.outcome, other.usdc, other.timestamp)
+            whales = [s['position']['wallet'] for s in detector.detect_all([], [other], tracker, now=now)]
+            assert whales == ['0xrecent'], (tracker_class.__name__, whales)
+
+            # Once the hour is up it's gone
+            assert detector.detect_all([], [], tracker, now=now + 3600) == []
+        print("✅ Whale entry looks back an hour, not just at this cycle's buys")
+    finally:
+        config.SIGNAL_PATTERNS = ['high_conviction_cluster']
+
+
+class NoScan(defaultdict):
+    """wallet_totals that fails the test if anything iterates the whole tracker"""
+
+    def items(self):
+        raise AssertionError("full tracker scan")
+
+
+def test_whale_entry_uses_index():
+    """With the shipped thresholds the dict store answers the whale view from an index"""
+    config.SIGNAL_PATTERNS = ['whale_entry']
+    try:
+        tracker = WalletTracker(min_volume=config.MIN_WALLET_VOLUME, min_conviction=config.MIN_CONVICTION)
+        trades = [
+            make_buy('0xwhale', 'm1', 12000),
+            make_buy('0xeighty', 'm2', 8200), make_buy('0xeighty', 'm3', 1800),  # 82%: whale, not clustered
+            make_buy('0xsmall', 'm1', 3000),
+        ]
+        for t in trades:
+            tracker.add_trade(t.wallet, t.token_id, t.outcome, t.usdc, t.timestamp, shares=t.shares)
+        tracker.wallet_totals = NoScan(float, tracker.wallet_totals)
+
+        signals = SignalDetector().detect_all([], trades, tracker, now=NOW.timestamp())
+        assert sorted(s['position']['wallet'] for s in signals) == ['0xeighty', '0xwhale']
+    finally:
+        config.SIGNAL_PATTERNS = ['high_conviction_cluster']
+    print("✅ Whale entry reads the whale index, no full tracker scan")
+
+
+def test_legacy_patterns_parallel_and_timed():
+    """Old-style patterns still work; parallel runs give the same signals; timings add up"""
+    def legacy_pattern(clusters, trades, wallet_tracker):
+        return [{'type': 'custom', 'conviction': 'LOW', 'cluster': c} for c in clusters if c['num_wallets'] > 10]
+
+    clusters = [make_cluster(f"m{n}", n, 0.3) for n in range(1, 30)]
+    buys = [make_buy('0xbuyer', 'm1', 500)]
+    results = []
+    config.SIGNAL_PATTERNS = ALL_PATTERNS
+    try:
+        for workers in (1, 4):
+            detector = SignalDetector(workers=workers)
+            detector.register_pattern(legacy_pattern, "Custom", "More than 10 wallets")
+            for _ in range(3):
+                signals = detector.detect_all(clusters, buys, WalletTracker())
+            results.append([(s['pattern_name'], s['type'], id(s.get('cluster'))) for s in signals])
+
+            timings = detector.timings
+            assert timings["Custom"]['calls'] == 3 and timings["Custom"]['signals'] == 3 * 19
+            assert timings["view:clusters"]['calls'] == 3  # Built once per cycle, shared by two patterns
+            assert "view:positions" in timings and "view:trades" not in timings
+
+            # No clusters, no buys: the cluster patterns are skipped, the whale scan still runs
+            detector.detect_all([], [], WalletTracker())
+            assert timings["Custom"]['calls'] == 4 and timings["High Conviction Signal"]['calls'] == 3
+            assert timings["Whale Entry"]['calls'] == 4
+    finally:
+        config.SIGNAL_PATTERNS = ['high_conviction_cluster']
+
+    assert results[0] == results[1]
+    print(f"✅ Legacy + view patterns, serial == parallel, timings for {len(timings)} entries")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("SIGNAL DETECTOR TEST")
+    print("=" * 60)
+
+    test_high_conviction_scoring()
+    test_whale_and_synchronized()
+    test_whale_entry_window()
+    test_whale_entry_uses_index()
+    test_legacy_patterns_parallel_and_timed()
+
+    print("\n✅ All signal detector tests passed")
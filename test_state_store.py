@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the snapshot + journal state files: the one-time import of the old
+JSON state survives the saves and restarts after it
+"""
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+from state_store import StateStore
+from wallet_tracker import WalletTracker
+
+ENTERED = datetime(2024, 11, 5, 18, 30)
+
+
+def write_legacy_state(path):
+    """The old pretty-printed JSON state, composite keys and all"""
+    state = {
+        'wallet_positions': {
+            '0xa': {'m1': {'Yes': 4000.0}},
+            '0xb': {'m1': {'Yes': 2500.0}, 'm2': {'No_or_draw': 500.0}},
+        },
+        'position_timestamps': {
+            '0xa_m1_Yes': ENTERED.isoformat(),
+            '0xb_m1_Yes': ENTERED.isoformat(),
+            '0xb_m2_No_or_draw': ENTERED.isoformat(),
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def positions(tracker):
+    return {key: (tracker.wallet_positions[key[0]][key[1]][key[2]], entered)
+            for key, entered in tracker.position_timestamps.items()}
+
+
+def test_legacy_import_survives_restart():
+    """Import -> save -> reload keeps the imported positions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, 'wallet_tracker_state')
+        write_legacy_state(prefix + '.json')
+
+        tracker = WalletTracker()
+        tracker.state_store = StateStore(prefix, snapshot_every=1000)
+        assert tracker.load_state(prefix)
+        imported = positions(tracker)
+        assert imported[('0xb', 'm2', 'No_or_draw')] == (500.0, ENTERED) and len(imported) == 3
+
+        # A quiet cycle: nothing for the journal, but the import has to be written out
+        tracker.save_state(checkpoint={'block': 100, 'recent': []})
+        assert os.path.exists(prefix + '.snapshot.npz')
+
+        # Later cycles go back to journal records
+        tracker.add_trade('0xc', 'm3', 'Yes', 1500.0, ENTERED, shares=3000)
+        tracker.save_state(checkpoint={'block': 101, 'recent': []})
+        assert os.path.getsize(prefix + '.journal') > 0
+
+        restarted = WalletTracker()
+        assert restarted.load_state(prefix)
+        assert positions(restarted) == positions(tracker)
+        assert ('0xa', 'm1', 'Yes') in positions(restarted)
+        assert restarted.checkpoint == {'block': 101, 'recent': []}
+    print("✅ Imported legacy state is snapshotted on the first save and survives restart")
+
+
+def test_no_state():
+    """Nothing on disk: nothing loaded, and no snapshot forced"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = WalletTracker()
+        assert not tracker.load_state(os.path.join(tmp, 'wallet_tracker_state'))
+        assert not tracker.state_store.snapshot_requested
+    print("✅ Fresh start loads nothing")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("STATE STORE TEST")
+    print("=" * 60)
+
+    test_legacy_import_survives_restart()
+    test_no_state()
+
+    print("\n✅ All state store tests passed")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Test async Telegram delivery against a local mock Bot API:
+rate limiting, retry_after, retries, coalescing, and the durable outbox
+"""
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from datetime import datetime
+
+from aiohttp import web
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+
+# Fast timings for a local server
+config.TELEGRAM_BOT_TOKEN = 'TEST:TOKEN'
+config.TELEGRAM_CHAT_ID = '42'
+config.TELEGRAM_RETRY_BASE_SECONDS = 0.02
+config.TELEGRAM_RETRY_MAX_SECONDS = 0.1
+config.TELEGRAM_TIMEOUT_SECONDS = 2
+
+from alert_store import AlertStore
+from telegram_delivery import TokenBucket
+from telegram_notifier import TelegramNotifier
+
+
+class MockBotAPI:
+    """
+    sendMessage endpoint recording every accepted message
+
+    `script` holds the responses to give before accepting again, e.g.
+    [429, 500] answers the next two calls with a rate limit then a server
+    error. Texts containing 'REJECT' are refused with a 400, like bad HTML.
+    """
+
+    def __init__(self):
+        self.messages = []  # (time, text)
+        self.calls = 0
+        self.peers = set()
+        self.script = []
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/sendMessage', self.send_message)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def send_message(self, request):
+        self.calls += 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+        payload = await request.json()
+        assert payload['chat_id'] == config.TELEGRAM_CHAT_ID and payload['parse_mode'] == 'HTML'
+
+        if self.script:
+            status = self.script.pop(0)
+            if status == 429:
+                return web.json_response({'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                                          'parameters': {'retry_after': 1}}, status=429)
+            return web.json_response({'ok': False, 'error_code': status, 'description': 'Bad Gateway'},
+                                     status=status)
+        if 'REJECT' in payload['text']:
+            return web.json_response({'ok': False, 'error_code': 400,
+                                      'description': "Bad Request: can't parse entities"}, status=400)
+
+        self.messages.append((time.monotonic(), payload['text']))
+        return web.json_response({'ok': True, 'result': {'message_id': len(self.messages)}})
+
+    def texts(self):
+        return [text for _, text in self.messages]
+
+
+def cluster_signal(n, num_wallets=5):
+    now = datetime.now()
+    return {
+        'type': 'cluster',
+        'pattern_name': f'Cluster {n}',
+        'pattern_description': 'test',
+        'conviction': 'HIGH',
+        'cluster': {
+            'market_id': f'market-{n}', 'outcome': 'Yes', 'num_wallets': num_wallets,
+            'total_volume': 10000, 'avg_conviction': 0.9, 'price': 0.4,
+            'question': f'Question {n}?', 'first_entry': now, 'latest_entry': now,
+        },
+    }
+
+
+async def deliver(server, outbox_file, signals, script=(), timeout=5):
+    """Queue signals, run delivery and shut down with the given flush timeout"""
+    alert_store = AlertStore(outbox_file.replace('outbox', 'alerts'))
+    notifier = TelegramNotifier(outbox_file, api_url=server.url, alert_store=alert_store)
+    notifier.start()
+    server.script = list(script)
+    for signal in signals:
+        notifier.send_signal_alert(signal)
+    await asyncio.sleep(0)
+    await notifier.close(timeout)
+    return notifier
+
+
+def run(scenario):
+    async def wrapper():
+        server = MockBotAPI()
+        await server.start()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                return await scenario(server, os.path.join(tmp, 'outbox.jsonl'))
+        finally:
+            await server.stop()
+    return asyncio.run(wrapper())
+
+
+def test_token_bucket():
+    """Bursts up to capacity, then one token per 1/rate seconds"""
+    async def scenario():
+        bucket = TokenBucket(rate=20, capacity=3)
+        start = time.monotonic()
+        times = []
+        for _ in range(7):
+            await bucket.acquire()
+            times.append(time.monotonic() - start)
+        return times
+
+    times = asyncio.run(scenario())
+    assert times[2] < 0.02, times
+    assert times[6] >= 4 / 20 - 0.01, times
+    print("✅ Token bucket: burst of 3, then 20/s")
+
+
+def test_rate_limited_delivery():
+    """Alerts go out in order, no faster than the rate limit, over one connection"""
+    config.TELEGRAM_COALESCE = False
+    config.TELEGRAM_MESSAGES_PER_MINUTE = 600  # 10/s
+    config.TELEGRAM_BURST = 1
+
+    async def scenario(server, outbox_file):
+        notifier = await deliver(server, outbox_file, [cluster_signal(n) for n in range(6)])
+        return server, notifier
+
+    server, notifier = run(scenario)
+    assert len(server.messages) == 6
+    assert [f'Question {n}?' in text for n, text in enumerate(server.texts())] == [True] * 6
+    gaps = [b[0] - a[0] for a, b in zip(server.messages, server.messages[1:])]
+    assert min(gaps) >= 0.09, gaps
+    assert len(server.peers) == 1, server.peers  # Connection reused
+    assert not notifier.outbox.pending
+    print(f"✅ 6 alerts, ≥{min(gaps):.2f}s apart, over {len(server.peers)} connection")
+
+
+def test_retries():
+    """429 waits retry_after; 5xx backs off and retries until accepted"""
+    config.TELEGRAM_COALESCE = False
+    config.TELEGRAM_MESSAGES_PER_MINUTE = 6000
+    config.TELEGRAM_BURST = 5
+
+    async def scenario(server, outbox_file):
+        start = time.monotonic()
+        await deliver(server, outbox_file, [cluster_signal(1), cluster_signal(2)], script=[429, 500, 502])
+        return server, start
+
+    server, start = run(scenario)
+    assert len(server.messages) == 2 and server.calls == 5
+    assert server.messages[0][0] - start >= 1.0  # Honoured retry_after=1
+    print("✅ 429 honoured retry_after, 5xx retried with backoff")
+
+
+def test_coalescing():
+    """A backlog goes out as a few merged messages; a rejected merge is split up"""
+    config.TELEGRAM_COALESCE = True
+    config.TELEGRAM_COALESCE_MAX = 5
+    config.TELEGRAM_MESSAGES_PER_MINUTE = 6000
+    config.TELEGRAM_BURST = 5
+
+    async def scenario(server, outbox_file):
+        signals = [cluster_signal(n) for n in range(12)]
+        signals[7]['cluster']['question'] = 'REJECT me'
+        notifier = await deliver(server, outbox_file, signals)
+        return server, notifier
+
+    server, notifier = run(scenario)
+    texts = server.texts()
+    delivered = [n for n in range(12) if any(f'Question {n}?' in text for text in texts)]
+    assert delivered == [n for n in range(12) if n != 7], delivered
+    assert texts[0].startswith('📦 <b>5 signals</b>')
+    assert len(texts) < 12, len(texts)
+    assert notifier.sender.dropped == 1 and not notifier.outbox.pending
+    print(f"✅ 12 alerts sent as {len(texts)} messages, the bad one dropped alone")
+
+
+def test_outbox_survives_restart():
+    """Alerts undelivered at shutdown are sent on the next start, and never twice"""
+    config.TELEGRAM_COALESCE = False
+    config.TELEGRAM_MESSAGES_PER_MINUTE = 6000
+    config.TELEGRAM_BURST = 5
+
+    async def scenario(server, outbox_file):
+        # Telegram down for the whole first run
+        first = await deliver(server, outbox_file, [cluster_signal(n) for n in range(3)],
+                              script=[500] * 1000, timeout=0.3)
+        assert not server.messages and len(first.outbox.pending) == 3
+
+        # A torn final write is ignored
+        with open(outbox_file, 'a') as f:
+            f.write('{"op": "qu')
+
+        # Restart: the backlog goes out, a repeat of a queued signal doesn't
+        second = await deliver(server, outbox_file, [cluster_signal(1), cluster_signal(3)])
+        assert not second.outbox.pending
+
+        # Third start: nothing left to resend, earlier signals still deduped
+        third = await deliver(server, outbox_file, [cluster_signal(0), cluster_signal(4, num_wallets=6)])
+        return server, third
+
+    server, third = run(scenario)
+    texts = server.texts()
+    assert [n for text in texts for n in range(5) if f'Question {n}?' in text] == [0, 1, 2, 3, 4], texts
+    assert third.sender.alerts_sent == 1
+    print("✅ Outbox resent undelivered alerts after restart, no duplicates")
+
+
+def test_fatal_status():
+    """A bad token or a blocked bot stops delivery at once; the alerts stay queued"""
+    config.TELEGRAM_COALESCE = False
+    config.TELEGRAM_MESSAGES_PER_MINUTE = 6000
+    config.TELEGRAM_BURST = 5
+
+    for status in (401, 403, 404):
+        async def scenario(server, outbox_file):
+            start = time.monotonic()
+            notifier = await deliver(server, outbox_file, [cluster_signal(1), cluster_signal(2)],
+                                     script=[status], timeout=5)
+            return server, notifier, time.monotonic() - start
+
+        server, notifier, elapsed = run(scenario)
+        assert server.calls == 1 and not server.messages, server.calls
+        assert notifier.sender.fatal.startswith(str(status))
+        assert len(notifier.outbox.pending) == 2
+        assert elapsed < 1, elapsed  # No retrying until the flush timeout
+    print("✅ 401/403/404 stop delivery after one call, alerts kept in the outbox")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TELEGRAM DELIVERY TEST")
+    print("=" * 60)
+
+    test_token_bucket()
+    test_rate_limited_delivery()
+    test_retries()
+    test_coalescing()
+    test_outbox_survives_restart()
+    test_fatal_status()
+
+    print("\n✅ All Telegram delivery tests passed")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test the threshold sweep: every combination matches a plain loop over the
+events, and the wallet-only rows match backtest_by_threshold
+"""
+import csv
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import backtest_by_threshold
+import event_table
+from threshold_sweep import load_events, sweep, rank, GRID
+
+CATEGORIES = ['Politics', 'Financial', 'Sports', 'Geopolitics']
+
+
+def write_events(path, n=300, seed=7):
+    """Event rows in the replay's signals CSV layout, with a few blanks"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['wallet_count', 'event_name', 'total_volume', 'avg_conviction', 'entry_price',
+                         'roi', 'category', 'status', 'first_entry', 'latest_entry'])
+        for i in range(n):
+            wallets = rng.choice([2, 3, 5, 8, 12, 25, 60, 150])
+            price = rng.choice([0, 0.05, 0.15, 0.25, 0.35, 0.45, 0.55, 0.7, 0.9])
+            status = rng.choice(['WIN', 'LOSS', 'UNVERIFIED'])
+            roi = f"{(1 / price - 1) * 100:.0f}%" if price else ''
+            first = start + timedelta(hours=i)
+            latest = first + timedelta(hours=rng.choice([0.5, 3, 12, 48]))
+            writer.writerow([
+                wallets if i % 50 else '', f"Event {i}", f"{wallets * rng.choice([300, 1500, 4000, 30000]):,}",
+                f"{rng.choice([55, 72, 85, 92.5, 97, 99.5, 100])}%", price, roi, rng.choice(CATEGORIES), status,
+                first.strftime('%Y-%m-%d %H:%M:%S'), latest.strftime('%Y-%m-%d %H:%M:%S') if i % 40 else '',
+            ])
+
+
+def reference(events, combo):
+    """Signals, verified, wins and total ROI for one combination, one event at a time"""
+    min_wallets, min_volume, min_conviction, max_price, window, category = combo
+    totals = [0, 0, 0, 0.0]
+    for i in range(len(events['category'])):
+        wallets = events['wallet_count'][i]
+        if not wallets >= min_wallets or not events['volume_per_wallet'][i] >= min_volume:
+            continue
+        if not events['avg_conviction'][i] >= min_conviction - 1e-9:
+            continue
+        if not 0 < events['entry_price'][i] <= max_price:
+            continue
+        if window is not None and not events['time_window'][i] <= window:
+            continue
+        if category is not None and events['category'][i] not in category:
+            continue
+        totals[0] += 1
+        totals[1] += bool(events['verified'][i])
+        totals[2] += bool(events['win'][i])
+        totals[3] += events['realised_roi'][i]
+    return totals
+
+
+def test_sweep_matches_loop():
+    """Every combination of a small grid equals the loop over the events"""
+    grid = {
+        'min_wallets': [2, 5, 20],
+        'min_volume': [0, 1000, 5000],
+        'min_conviction': [0.7, 0.925, 1.0],
+        'max_price': [0.2, 0.5, 1.0],
+        'time_window': [1, 24, None],
+        'category': [None, ('Politics', 'Financial'), ('Sports',)],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'events.csv')
+        write_events(path)
+        events = load_events(path, cache_dir=None)
+
+    results, names = sweep(events, grid, chunk_cells=1000)  # Several chunks
+    assert names == list(grid)
+    combos = list(itertools.product(*grid.values()))
+    assert len(results['signals']) == len(combos)
+    for i, combo in enumerate(combos):
+        assert tuple(results[name][i] for name in names) == combo
+        signals, verified, wins, roi = reference(events, combo)
+        assert (results['signals'][i], results['verified'][i], results['wins'][i]) == (signals, verified, wins), combo
+        assert abs(results['total_roi'][i] - roi) < 1e-6, combo
+    assert results['signals'].max() > 0 and results['wins'].max() > 0
+
+    order = rank(results, 3)
+    assert all(results['verified'][i] >= 3 for i in order)
+    assert list(results['avg_roi'][order]) == sorted(results['avg_roi'][order], reverse=True)
+    print(f"✅ {len(combos)} combinations match the per-event loop")
+
+
+def test_wallet_rows_match_backtest():
+    """With every other filter open, counts equal backtest_by_threshold.analyze_threshold"""
+    grid = dict(GRID, min_volume=[0], min_conviction=[0], max_price=[1.0], time_window=[None], category=[None])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'events.csv')
+        write_events(path)
+        events = load_events(path, cache_dir=None)
+        table = event_table.load_events(path, cache_dir=None)
+
+    results, _ = sweep(events, grid)
+    for i, min_wallets in enumerate(grid['min_wallets']):
+        expected = backtest_by_threshold.analyze_threshold(table.take(table['entry_price'] > 0), min_wallets)
+        assert results['signals'][i] == expected['total_signals'], min_wallets
+        assert results['wins'][i] == expected['wins'] and results['verified'][i] == expected['verified']
+    print("✅ Wallet thresholds agree with backtest_by_threshold")
+
+
+def test_full_grid_speed():
+    """The default grid (10k+ combinations) sweeps in seconds"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'events.csv')
+        write_events(path, n=2000)
+        events = load_events(path, cache_dir=None)
+
+    start = time.perf_counter()
+    results, _ = sweep(events)
+    elapsed = time.perf_counter() - start
+    assert len(results['signals']) >= 10_000
+    assert elapsed < 10, elapsed
+    print(f"✅ {len(results['signals']):,} combinations over 2,000 events in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("THRESHOLD SWEEP TEST")
+    print("=" * 60)
+
+    test_sweep_matches_loop()
+    test_wallet_rows_match_backtest()
+    test_full_grid_speed()
+
+    print("\n✅ All threshold sweep tests passed")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test WalletTracker's incremental indexes against a full scan of its
+positions after random add / revert / expiry sequences: the conviction
+index (and the whale one), clusters, and changed_only clusters; and the
+VWAP entry price both stores keep per position
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add realtime_scanner to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'realtime_scanner'))
+
+import config
+from wallet_tracker import WalletTracker
+from columnar_wallet_tracker import ColumnarWalletTracker
+
+START = datetime(2024, 11, 5, 12, 0)
+MIN_WALLETS = 3
+
+
+def scan(tracker, min_volume, min_conviction):
+    """{(wallet, market_id, outcome): conviction} straight from the positions"""
+    qualifying = {}
+    for wallet, markets in tracker.wallet_positions.items():
+        total = sum(volume for outcomes in markets.values() for volume in outcomes.values())
+        if total < min_volume or total <= 0:
+            continue
+        for market_id, outcomes in markets.items():
+            for outcome, volume in outcomes.items():
+                if volume / total >= min_conviction:
+                    qualifying[(wallet, market_id, outcome)] = volume / total
+    return qualifying
+
+
+def scanned_clusters(tracker):
+    """(market_id, outcome) -> (num_wallets, total_volume) for clusters of MIN_WALLETS+"""
+    groups = {}
+    for wallet, market_id, outcome in scan(tracker, tracker.min_volume, tracker.min_conviction):
+        volume = tracker.wallet_positions[wallet][market_id][outcome]
+        count, total = groups.get((market_id, outcome), (0, 0.0))
+        groups[(market_id, outcome)] = (count + 1, total + volume)
+    return {key: (count, round(total, 6)) for key, (count, total) in groups.items() if count >= MIN_WALLETS}
+
+
+def indexed(positions):
+    return {(p['wallet'], p['market_id'], p['outcome']): p['conviction'] for p in positions}
+
+
+def cluster_map(clusters):
+    return {(c['market_id'], c['outcome']): (c['num_wallets'], round(c['total_volume'], 6)) for c in clusters}
+
+
+def check(tracker, previous):
+    """Indexes match the scan; changed_only returns every cluster that moved, correctly aggregated"""
+    for thresholds in ((tracker.min_volume, tracker.min_conviction),
+                       (config.WHALE_MIN_VOLUME, config.WHALE_MIN_CONVICTION)):
+        got, expected = indexed(tracker.get_high_conviction_wallets(*thresholds)), scan(tracker, *thresholds)
+        assert got.keys() == expected.keys(), (thresholds, got.keys() ^ expected.keys())
+        assert all(abs(got[key] - expected[key]) < 1e-9 for key in got)
+
+    expected = scanned_clusters(tracker)
+    everything = tracker.detect_clusters(MIN_WALLETS, tracker.min_volume, tracker.min_conviction)
+    assert cluster_map(everything) == expected
+
+    changed = cluster_map(tracker.detect_clusters(MIN_WALLETS, tracker.min_volume, tracker.min_conviction,
+                                                  changed_only=True))
+    assert all(expected[key] == value for key, value in changed.items())
+    moved = {key for key, value in expected.items() if previous.get(key) != value}
+    assert moved <= changed.keys(), moved - changed.keys()
+    return expected
+
+
+def test_indexes_match_full_scan():
+    """Thousands of random buys, partial and full reverts, expiries and re-entries"""
+    rng = random.Random(21)
+    tracker = WalletTracker(min_volume=config.MIN_WALLET_VOLUME, min_conviction=config.MIN_CONVICTION)
+    wallets = [f"0x{n:040x}" for n in range(40)]
+    applied = []  # [wallet, market_id, outcome, usdc, shares] still in the tracker
+    previous = {}
+    now = START
+
+    for step in range(3000):
+        now += timedelta(minutes=1)
+        roll = rng.random()
+        if roll < 0.75 or not applied:
+            # Concentrated buys on a few markets so clusters form and break up
+            trade = [rng.choice(wallets), str(rng.randrange(6)), rng.choice(['Yes', 'No']),
+                     round(rng.choice([rng.uniform(50, 600), rng.uniform(2000, 12000)]), 2),
+                     round(rng.uniform(100, 20000), 2)]
+            tracker.add_trade(*trade[:4], timestamp=now, shares=trade[4])
+            applied.append(trade)
+        elif roll < 0.95:
+            # Reorg: take a recent buy back out (a position may keep other buys)
+            trade = applied.pop(rng.randrange(max(0, len(applied) - 20), len(applied)))
+            tracker.revert_trade(*trade)
+        else:
+            tracker.cleanup_old_data(hours=rng.choice([1, 3, 6]), now=now)
+            applied = [t for t in applied if (t[0], t[1], t[2]) in tracker.position_timestamps]
+
+        if step % 25 == 0:
+            previous = check(tracker, previous)
+
+    check(tracker, previous)
+    assert tracker.wallet_qualifying and tracker.wallet_whale
+    print(f"✅ Conviction, whale and cluster indexes match a full scan over 3000 steps")
+
+
+def test_rebuilt_indexes_match():
+    """Indexes rebuilt on load agree with ones kept up incrementally"""
+    rng = random.Random(5)
+    tracker = WalletTracker(min_volume=1000, min_conviction=0.8)
+    for n in range(500):
+        tracker.add_trade(f"0x{rng.randrange(30):040x}", str(rng.randrange(4)), 'Yes',
+                          rng.uniform(100, 9000), START + timedelta(seconds=n))
+
+    rebuilt = WalletTracker(min_volume=1000, min_conviction=0.8)
+    for wallet, markets in tracker.wallet_positions.items():
+        for market_id, outcomes in markets.items():
+            for outcome, volume in outcomes.items():
+                rebuilt.wallet_positions[wallet][market_id][outcome] = volume
+                rebuilt.position_timestamps[(wallet, market_id, outcome)] = \
+                    tracker.position_timestamps[(wallet, market_id, outcome)]
+    rebuilt._rebuild_indexes()
+
+    assert rebuilt.wallet_qualifying == tracker.wallet_qualifying
+    assert rebuilt.wallet_whale == tracker.wallet_whale
+    assert {m: dict(o) for m, o in rebuilt.market_clusters.items()} == \
+        {m: dict(o) for m, o in tracker.market_clusters.items()}
+    print("✅ Rebuilt indexes equal the incrementally kept ones")
+
+
+def test_entry_price_vwap():
+    """USDC over shares across buys, reverts and expiry; None without shares"""
+    for tracker_class in (WalletTracker, ColumnarWalletTracker):
+        name = tracker_class.__name__
+        tracker = tracker_class(min_volume=1000, min_conviction=0.8)
+        tracker.add_trade('0xa', 'm1', 'Yes', 1000.0, START, shares=2000)
+        tracker.add_trade('0xa', 'm1', 'Yes', 3000.0, START + timedelta(minutes=5), shares=4000)
+        assert abs(tracker.get_entry_price('0xa', 'm1', 'Yes') - 4000 / 6000) < 1e-12, name
+        position, = tracker.get_high_conviction_wallets(1000, 0.8)
+        assert abs(position['entry_price'] - 4000 / 6000) < 1e-12, name
+
+        # Reorging out the second buy takes its USDC and its shares back out
+        tracker.revert_trade('0xa', 'm1', 'Yes', 3000.0, 4000)
+        assert tracker.get_entry_price('0xa', 'm1', 'Yes') == 0.5, name
+        tracker.revert_trade('0xa', 'm1', 'Yes', 1000.0, 2000)
+        assert tracker.get_entry_price('0xa', 'm1', 'Yes') is None, name
+
+        # No share count (state saved before shares were kept): no price, not 0 or inf
+        tracker.add_trade('0xb', 'm2', 'No', 2000.0, START)
+        assert tracker.get_entry_price('0xb', 'm2', 'No') is None, name
+        position, = tracker.get_high_conviction_wallets(1000, 0.8)
+        assert not position['entry_price'], name
+
+        tracker.add_trade('0xc', 'm3', 'Yes', 1500.0, START + timedelta(hours=2), shares=3000)
+        tracker.cleanup_old_data(hours=1, now=START + timedelta(hours=2))
+        assert tracker.get_entry_price('0xb', 'm2', 'No') is None, name
+        assert tracker.get_entry_price('0xc', 'm3', 'Yes') == 0.5, name
+
+        # A position re-entered after expiry starts a fresh VWAP
+        tracker.add_trade('0xb', 'm2', 'No', 900.0, START + timedelta(hours=3), shares=1000)
+        assert abs(tracker.get_entry_price('0xb', 'm2', 'No') - 0.9) < 1e-12, name
+        print(f"✅ {name}: VWAP over buys, reverted and expired out, None without shares")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("WALLET TRACKER TEST")
+    print("=" * 60)
+
+    test_indexes_match_full_scan()
+    test_rebuilt_indexes_match()
+    test_entry_price_vwap()
+
+    print("\n✅ All wallet tracker tests passed")
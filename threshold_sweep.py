@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Threshold Sweep: every combination of signal filters in one pass
+Usage: python threshold_sweep.py [EVENTS.csv] [MIN_VERIFIED]
+
+Evaluates the full grid of (min_wallets, min_volume, min_conviction,
+max_price, time window, category) over an event table such as
+BACKTEST_BY_WALLET_COUNT.csv or replay_backtest.py's signals CSV, and
+ranks the combinations by average ROI.
+
+Each filter value becomes one boolean row over the events; a block of
+combinations is the AND of their rows, and signal / verified / win / ROI
+totals for every value of the last filter come out of a single matrix
+product. 10k+ combinations take well under a second.
+
+Columns used: wallet_count (or num_wallets), total_volume, avg_conviction,
+entry_price, roi, category, status, and first_entry / latest_entry if
+present. min_volume is compared to volume per wallet (total_volume /
+wallet_count), the only per-wallet figure an event row carries; without
+entry times the time window is not swept. Losses count as -100% ROI.
+"""
+import csv
+import os
+import sys
+import time
+import numpy as np
+
+import event_table
+
+GRID = {
+    'min_wallets': [2, 3, 5, 7, 10, 15, 20, 30, 50, 100],
+    'min_volume': [0, 500, 1000, 2000, 3000, 5000, 10000, 20000, 50000, 100000],
+    'min_conviction': [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 1.0],
+    'max_price': [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0],
+    'time_window': [1, 6, 24, None],  # Hours from first to latest entry (None = any)
+    'category': None,  # None = all, the live Politics+Financial filter, and each category present
+}
+
+SIGNAL_CATEGORIES = ('Politics', 'Financial')
+
+
+def load_events(filename, cache_dir=event_table.EVENT_CACHE_DIR):
+    """The sweep's columns, from the shared event table (NaN where a value is missing)"""
+    table = event_table.load_events(filename, cache_dir)
+    win, verified = table.win, table.verified
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volume_per_wallet = table['total_volume'] / table['wallet_count']
+    return {
+        'wallet_count': table['wallet_count'],
+        'volume_per_wallet': volume_per_wallet,
+        'avg_conviction': table['avg_conviction'] / 100,
+        'entry_price': table['entry_price'],
+        'time_window': table.time_window_hours,
+        'category': table['category'],
+        'verified': verified,
+        'win': win,
+        # Realised ROI in %: the listed ROI for a win, -100% for a loss
+        'realised_roi': np.where(win, np.nan_to_num(table['roi']), np.where(verified, -100.0, 0.0)),
+    }
+
+
+def filter_rows(events, grid):
+    """[(filter name, values, bool array values x events)] - one row per filter value"""
+    categories = grid['category']
+    if categories is None:
+        categories = [None, SIGNAL_CATEGORIES] + [(c,) for c in sorted(set(events['category']))]
+    windows = grid['time_window']
+    if np.isnan(events['time_window']).all():
+        windows = [None]  # No entry times to filter on
+
+    n = len(events['category'])
+    with np.errstate(invalid='ignore'):
+        price = events['entry_price']
+        return [
+            ('min_wallets', grid['min_wallets'],
+             events['wallet_count'][None, :] >= np.array(grid['min_wallets'])[:, None]),
+            ('min_volume', grid['min_volume'],
+             events['volume_per_wallet'][None, :] >= np.array(grid['min_volume'])[:, None]),
+            ('min_conviction', grid['min_conviction'],
+             events['avg_conviction'][None, :] >= np.array(grid['min_conviction'])[:, None] - 1e-9),
+            ('max_price', grid['max_price'],
+             (price[None, :] > 0) & (price[None, :] <= np.array(grid['max_price'])[:, None])),
+            ('time_window', windows,
+             np.array([np.ones(n, dtype=bool) if w is None else events['time_window'] <= w for w in windows])),
+            ('category', categories,
+             np.array([np.ones(n, dtype=bool) if c is None else np.isin(events['category'], c)
+                       for c in categories])),
+        ]
+
+
+def sweep(events, grid=GRID, chunk_cells=1 << 22):
+    """
+    Every combination of filter values -> signals, verified, wins, win rate,
+    average and total ROI, as a dict of columns (one entry per combination)
+    """
+    rows = filter_rows(events, grid)
+    names = [name for name, _, _ in rows]
+    shape = [len(values) for _, values, _ in rows]
+    n = len(events['category'])
+
+    # Per event: counts toward [signals, verified, wins, ROI], times each last-filter row
+    weights = np.stack([np.ones(n), events['verified'], events['win'], events['realised_roi']], axis=1)
+    last = rows[-1][2]
+    per_last = (last[:, :, None] * weights[None, :, :]).transpose(1, 0, 2).reshape(n, -1)
+
+    outer = int(np.prod(shape[:-1]))
+    totals = np.empty((outer, shape[-1], 4))
+    step = max(1, chunk_cells // max(n, 1))
+    for start in range(0, outer, step):
+        index = np.unravel_index(np.arange(start, min(start + step, outer)), shape[:-1])
+        mask = rows[0][2][index[0]]
+        for (_, _, filter_mask), i in zip(rows[1:-1], index[1:]):
+            mask = mask & filter_mask[i]
+        totals[start:start + len(mask)] = (mask.astype(np.float64) @ per_last).reshape(len(mask), shape[-1], 4)
+
+    totals = totals.reshape(-1, 4)
+    combos = np.unravel_index(np.arange(len(totals)), shape)
+    results = {name: [values[i] for i in combo.tolist()]
+               for (name, values, _), combo in zip(rows, combos)}
+    signals, verified, wins, roi = totals.T
+    results['signals'] = signals.astype(np.int64)
+    results['verified'] = verified.astype(np.int64)
+    results['wins'] = wins.astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        results['win_rate'] = np.where(verified > 0, wins / verified * 100, np.nan)
+        results['avg_roi'] = np.where(verified > 0, roi / verified, np.nan)
+    results['total_roi'] = roi
+    return results, names
+
+
+def rank(results, min_verified):
+    """Combination indexes with min_verified+ verified signals, best average ROI first"""
+    eligible = np.nonzero(results['verified'] >= min_verified)[0]
+    order = np.lexsort((-results['signals'][eligible], -results['win_rate'][eligible],
+                        -results['avg_roi'][eligible]))
+    return eligible[order]
+
+
+def label(name, value):
+    if name == 'category':
+        return 'All' if value is None else '+'.join(value)
+    if name == 'time_window':
+        return 'any' if value is None else f"{value}h"
+    return str(value)
+
+
+def write_results(path, results, names, order):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names + ['signals', 'verified', 'wins', 'win_rate', 'avg_roi', 'total_roi'])
+        for i in order.tolist():
+            writer.writerow([label(name, results[name][i]) for name in names] + [
+                results['signals'][i], results['verified'][i], results['wins'][i],
+                f"{results['win_rate'][i]:.1f}", f"{results['avg_roi'][i]:.0f}", f"{results['total_roi'][i]:.0f}"])
+
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__) or '.',
+                                                                  'BACKTEST_BY_WALLET_COUNT.csv')
+    min_verified = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("=" * 100)
+    print("THRESHOLD SWEEP")
+    print("=" * 100)
+
+    events = load_events(filename)
+    print(f"Loaded {len(events['category'])} events ({int(events['verified'].sum())} verified) from {filename}")
+
+    start = time.perf_counter()
+    results, names = sweep(events)
+    elapsed = time.perf_counter() - start
+    order = rank(results, min_verified)
+    print(f"Swept {len(results['signals']):,} combinations in {elapsed:.2f}s; "
+          f"{len(order):,} have {min_verified}+ verified signals")
+    if np.isnan(events['time_window']).all():
+        print("⚠️  No first_entry/latest_entry columns: time window not swept")
+
+    print(f"\n{'Wallets':>8} {'$/wallet':>9} {'Conv':>6} {'Price':>6} {'Window':>7} {'Category':<22} "
+          f"{'Signals':>8} {'Verified':>9} {'Win Rate':>9} {'Avg ROI':>9}")
+    print("-" * 100)
+    for i in order[:20].tolist():
+        print(f"{results['min_wallets'][i]:>7}+ {results['min_volume'][i]:>9,} {results['min_conviction'][i]:>6} "
+              f"{results['max_price'][i]:>6} {label('time_window', results['time_window'][i]):>7} "
+              f"{label('category', results['category'][i]):<22} {results['signals'][i]:>8} "
+              f"{results['verified'][i]:>9} {results['win_rate'][i]:>8.1f}% {results['avg_roi'][i]:>+8.0f}%")
+
+    write_results('SWEEP_RESULTS.csv', results, names, order)
+    print(f"\n💾 {len(order):,} ranked combinations written to SWEEP_RESULTS.csv")
+
+
+if __name__ == '__main__':
+    main()